@@ -0,0 +1,205 @@
+#Pre-fork launcher for the Broke Jumpshot Detector API
+#Loads heavy imports and PoseMLP weights once in the parent, then forks workers that share
+#that memory copy-on-write. Each worker builds its own PoseClassifier in the app lifespan.
+#
+#Signals sent to the parent:
+#  SIGHUP          reload weights in the parent and replace workers one by one
+#  SIGTERM/SIGINT  stop all workers gracefully, then exit
+
+import os
+import sys
+import gc
+import time
+import random
+import signal
+import socket
+from pathlib import Path
+
+import uvicorn
+
+#Parent directory for backend import
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from backend import main
+from cpu_governor import available_cpus
+
+#Environment variables
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+#Default: one worker per core this container may use (affinity mask and cgroup cpu.max quota, then CPU_BUDGET),
+#not os.cpu_count(), which reports the host's cores
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or len(available_cpus()[:main.CPU_BUDGET or None])
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "0"))  # 0 disables worker recycling
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+
+
+class PreforkLauncher:
+    def __init__(self, host=HOST, port=PORT, workers=WEB_CONCURRENCY,
+                 max_requests=MAX_REQUESTS, max_requests_jitter=MAX_REQUESTS_JITTER,
+                 graceful_timeout=GRACEFUL_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}  # pid -> worker id
+        self.sock = None
+        self.should_exit = False
+        self.should_reload = False
+
+    # Parent setup
+    def _bind_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _preload(self):
+        #Load weights before forking so every worker shares the same pages
+        main.load_model()
+        #Move everything allocated so far out of the collector's generations, so that
+        #collections in workers do not touch (and copy) the parent's objects
+        gc.collect()
+        gc.freeze()
+
+    # Workers
+    def _worker_max_requests(self):
+        if self.max_requests <= 0:
+            return None
+        #Jitter keeps workers from recycling at the same moment
+        return self.max_requests + random.randint(0, max(0, self.max_requests_jitter))
+
+    def _spawn_worker(self, worker_id):
+        pid = os.fork()
+        if pid != 0:
+            self.workers[pid] = worker_id
+            print(f"[launcher] Started worker {worker_id} (pid {pid})")
+            return pid
+
+        #Child: drop the parent's handlers, uvicorn installs its own for SIGINT/SIGTERM
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        random.seed()
+        #Read by the CPU governor in the app lifespan to size and place this worker's threads
+        os.environ["WEB_CONCURRENCY"] = str(self.num_workers)
+        os.environ["WORKER_INDEX"] = str(worker_id)
+        exit_code = 0
+        try:
+            config = uvicorn.Config(
+                main.app,
+                log_level=LOG_LEVEL,
+                limit_max_requests=self._worker_max_requests(),
+                timeout_graceful_shutdown=self.graceful_timeout,
+            )
+            server = uvicorn.Server(config)
+            server.run(sockets=[self.sock])
+        except Exception as e:
+            print(f"[launcher] Worker {worker_id} crashed: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _reap_workers(self):
+        #Collect exited children and return their worker ids
+        exited = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            worker_id = self.workers.pop(pid, None)
+            if worker_id is not None:
+                print(f"[launcher] Worker {worker_id} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}")
+                exited.append(worker_id)
+        return exited
+
+    def _signal_workers(self, sig):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+    def _rolling_restart(self):
+        print("[launcher] Reloading model weights and replacing workers...")
+        gc.unfreeze()
+        self._preload()
+        #Replace one worker at a time so the others keep serving
+        for pid, worker_id in list(self.workers.items()):
+            if self.should_exit:
+                return
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            exited = []
+            deadline = time.monotonic() + self.graceful_timeout
+            while pid in self.workers and time.monotonic() < deadline and not self.should_exit:
+                exited.extend(self._reap_workers())
+                time.sleep(0.1)
+            if pid in self.workers:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                self.workers.pop(pid, None)
+                exited.append(worker_id)
+            #Also replaces any other worker that exited while we waited
+            for exited_id in exited:
+                self._spawn_worker(exited_id)
+
+    # Signals
+    def _handle_exit(self, signum, frame):
+        self.should_exit = True
+
+    def _handle_reload(self, signum, frame):
+        self.should_reload = True
+
+    # Main loop
+    def run(self):
+        self._preload()
+        self.sock = self._bind_socket()
+        print(f"[launcher] Listening on http://{self.host}:{self.port} with {self.num_workers} workers")
+
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, self._handle_exit)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        for worker_id in range(self.num_workers):
+            self._spawn_worker(worker_id)
+
+        while not self.should_exit:
+            if self.should_reload:
+                self.should_reload = False
+                self._rolling_restart()
+            #Workers that exited (recycled after max requests or crashed) are replaced
+            for worker_id in self._reap_workers():
+                if not self.should_exit:
+                    self._spawn_worker(worker_id)
+            time.sleep(0.5)
+
+        self.shutdown()
+
+    def shutdown(self):
+        print("[launcher] Shutting down workers...")
+        self._signal_workers(signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._reap_workers()
+            time.sleep(0.1)
+        if self.workers:
+            print(f"[launcher] Killing {len(self.workers)} workers after graceful timeout")
+            self._signal_workers(signal.SIGKILL)
+            while self.workers:
+                self._reap_workers()
+                time.sleep(0.05)
+        self.sock.close()
+        print("[launcher] Done.")
+
+
+if __name__ == "__main__":
+    PreforkLauncher().run()
@@ -0,0 +1,274 @@
+"""
+Load generator and capacity report for the broke jumpshot detector backend
+Replays a directory of local videos against /analyze at increasing concurrency and writes
+a JSON + Markdown report (latency percentiles, throughput, 429/503/error rates, server RSS).
+
+Against a running server:
+    python backend/load_test.py ./video --url http://localhost:8000 --api-key $API_KEY --concurrency 1,2,4,8
+In-process with stub models (no server, no network, no model weights):
+    python backend/load_test.py ./video --in-process --stub --concurrency 1,2,4 --duration 20
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import asyncio
+import argparse
+import itertools
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import httpx
+
+#Parent directory for backend import
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+
+
+class StubPoseClassifier:
+    """Stands in for PoseClassifier: synthetic landmarks after a fixed delay, no MediaPipe graph"""
+
+    PHASES = ["Shot pocket"] * 10 + ["Set point"] * 10 + ["Follow through"] * 10
+
+    def __init__(self, delay_s=0.02):
+        import mediapipe as mp
+        self.mp_pose = mp.solutions.pose  # enum only, no model is loaded
+        self.delay_s = delay_s
+        self.calls = itertools.count()
+        self.rng = random.Random(0)
+        self.base = [(0.4 + 0.2 * self.rng.random(), 0.2 + 0.6 * i / 33) for i in range(33)]
+
+    def detect_pose(self, image):
+        time.sleep(self.delay_s)
+        landmarks = [types.SimpleNamespace(x=x + self.rng.gauss(0, 0.01), y=y + self.rng.gauss(0, 0.01), z=0.0, visibility=0.9)
+                     for x, y in self.base]
+        return types.SimpleNamespace(pose_landmarks=types.SimpleNamespace(landmark=landmarks))
+
+    def classify_shot_phase(self, results):
+        if not results.pose_landmarks:
+            return "No pose detected", 0.0
+        return self.PHASES[next(self.calls) % len(self.PHASES)], 0.8
+
+
+def setup_in_process(args):
+    """Returns (app, api_key, startup context) for running requests through httpx.ASGITransport"""
+    from contextlib import asynccontextmanager
+    from backend import main
+
+    main.API_KEY = args.api_key or "load-test"
+    if args.no_rate_limit:
+        main.limiter.enabled = False
+
+    if not args.stub:
+        #Real models: run the normal lifespan (weights from MODEL_WEIGHTS_PATH, MediaPipe pool)
+        return main.app, main.API_KEY, asynccontextmanager(main.lifespan)(main.app)
+
+    import torch
+    from classifier_pool import PoseClassifierPool
+    from frame_pool import FrameBufferPool
+    from pose_mlp import PoseMLP
+
+    @asynccontextmanager
+    async def stub_startup():
+        torch.manual_seed(0)
+        main.device = torch.device("cpu")
+        main.model = PoseMLP(input_dim=135, hidden_dim1=128, hidden_dim2=64, dropout=0.2, output_dim=1).eval()
+        main.classifier_pool = PoseClassifierPool(size=main.POSE_POOL_SIZE or 2,
+                                                  factory=lambda: StubPoseClassifier(args.stub_pose_ms / 1000.0))
+        main.frame_pool = FrameBufferPool(max_mb=main.FRAME_POOL_MAX_MB)
+        yield
+
+    return main.app, main.API_KEY, stub_startup()
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 1) if values else None
+
+
+async def sample_rss(client, in_process, samples, start, interval, stop):
+    #Server RSS over time: this process in-process, otherwise the rss_mb reported by /health
+    if in_process:
+        from backend.main import current_rss_mb
+    while not stop.is_set():
+        try:
+            if in_process:
+                rss = current_rss_mb()
+            else:
+                rss = (await client.get("/health", timeout=5)).json().get("rss_mb")
+            samples.append({"t": round(time.monotonic() - start, 2), "rss_mb": round(rss, 1) if rss is not None else None})
+        except Exception:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_stage(client, videos, api_key, concurrency, args, start):
+    #`concurrency` clients each send requests back to back until the stage's duration or request budget runs out
+    records = []
+    deadline = time.monotonic() + args.duration
+    budget = itertools.count()
+    video_cycle = itertools.cycle(videos)
+
+    async def user():
+        while time.monotonic() < deadline and (args.requests is None or next(budget) < args.requests):
+            name, data = next(video_cycle)
+            sent = time.monotonic()
+            try:
+                response = await client.post("/analyze", headers={"X-API-KEY": api_key},
+                                             files={"file": (name, data, "video/mp4")}, timeout=args.timeout)
+                status = response.status_code
+            except Exception as e:
+                status = 0
+                print(f"[load_test] Request failed: {type(e).__name__}: {e}")
+            records.append({"t": round(sent - start, 3), "latency_ms": (time.monotonic() - sent) * 1000, "status": status})
+
+    stage_start = time.monotonic()
+    await asyncio.gather(*[user() for _ in range(concurrency)])
+    elapsed = time.monotonic() - stage_start
+
+    ok = [r["latency_ms"] for r in records if r["status"] == 200]
+    count = len(records)
+    rate = lambda n: round(n / count, 4) if count else 0.0
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": count,
+        "ok": len(ok),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": percentile(ok, 50),
+        "p95_ms": percentile(ok, 95),
+        "p99_ms": percentile(ok, 99),
+        "mean_ms": round(float(np.mean(ok)), 1) if ok else None,
+        "rate_429": rate(sum(1 for r in records if r["status"] == 429)),
+        "rate_503": rate(sum(1 for r in records if r["status"] == 503)),
+        "error_rate": rate(sum(1 for r in records if r["status"] != 200)),
+        "statuses": {str(s): sum(1 for r in records if r["status"] == s) for s in sorted({r["status"] for r in records})},
+    }
+
+
+def capacity_summary(stages, slo_p95_ms, max_error_rate):
+    #Best stage that meets the latency SLO and error budget
+    passing = [s for s in stages if s["ok"] and s["p95_ms"] <= slo_p95_ms and s["error_rate"] <= max_error_rate]
+    if not passing:
+        return {"slo_p95_ms": slo_p95_ms, "max_error_rate": max_error_rate, "sustainable_concurrency": None, "throughput_rps": None}
+    best = max(passing, key=lambda s: (s["throughput_rps"], -s["concurrency"]))
+    return {
+        "slo_p95_ms": slo_p95_ms,
+        "max_error_rate": max_error_rate,
+        "sustainable_concurrency": best["concurrency"],
+        "throughput_rps": best["throughput_rps"],
+        "p95_ms": best["p95_ms"],
+    }
+
+
+def write_markdown(report, path):
+    lines = [
+        f"# Capacity report ({report['created']})",
+        "",
+        f"Target: `{report['target']}`, {len(report['videos'])} videos, {report['config']['duration']} s per stage",
+        "",
+        "| concurrency | requests | ok | throughput (req/s) | p50 ms | p95 ms | p99 ms | 429 rate | 503 rate | error rate | RSS max MB |",
+        "|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for s in report["stages"]:
+        lines.append(f"| {s['concurrency']} | {s['requests']} | {s['ok']} | {s['throughput_rps']} | {s['p50_ms']} | {s['p95_ms']} | {s['p99_ms']} "
+                     f"| {s['rate_429']:.1%} | {s['rate_503']:.1%} | {s['error_rate']:.1%} | {s.get('rss_max_mb')} |")
+    cap = report["capacity"]
+    lines.append("")
+    if cap["sustainable_concurrency"] is None:
+        lines.append(f"No stage met p95 <= {cap['slo_p95_ms']} ms with error rate <= {cap['max_error_rate']:.0%}.")
+    else:
+        lines.append(f"Best stage within p95 <= {cap['slo_p95_ms']} ms and error rate <= {cap['max_error_rate']:.0%}: "
+                     f"concurrency {cap['sustainable_concurrency']}, {cap['throughput_rps']} req/s per instance "
+                     f"(p95 {cap['p95_ms']} ms).")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+async def run(args):
+    video_paths = sorted(p for p in Path(args.video_dir).iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS)
+    if not video_paths:
+        raise SystemExit(f"No videos found in {args.video_dir}")
+    videos = [(p.name, p.read_bytes()) for p in video_paths]
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    if args.in_process:
+        app, api_key, startup = setup_in_process(args)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test")
+        target = "in-process (stub models)" if args.stub else "in-process"
+    else:
+        from contextlib import nullcontext
+        api_key, startup = args.api_key or os.getenv("API_KEY"), nullcontext()
+        client = httpx.AsyncClient(base_url=args.url)
+        target = args.url
+
+    rss_samples = []
+    stages = []
+    async with startup, client:
+        start = time.monotonic()
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_rss(client, args.in_process, rss_samples, start, args.sample_interval, stop))
+        for concurrency in levels:
+            print(f"[load_test] Stage: concurrency {concurrency}")
+            stage_t0 = time.monotonic() - start
+            stage = await run_stage(client, videos, api_key, concurrency, args, start)
+            stage_t1 = time.monotonic() - start
+            rss = [s["rss_mb"] for s in rss_samples if stage_t0 <= s["t"] <= stage_t1 and s["rss_mb"] is not None]
+            stage["rss_max_mb"] = max(rss) if rss else None
+            stages.append(stage)
+            print(f"[load_test]   {stage['ok']}/{stage['requests']} ok, {stage['throughput_rps']} req/s, "
+                  f"p50 {stage['p50_ms']} ms, p95 {stage['p95_ms']} ms, p99 {stage['p99_ms']} ms, errors {stage['error_rate']:.1%}")
+            if args.pause:
+                await asyncio.sleep(args.pause)
+        stop.set()
+        await sampler
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "target": target,
+        "videos": [name for name, _ in videos],
+        "config": {key: value for key, value in vars(args).items() if key != "api_key"},
+        "stages": stages,
+        "capacity": capacity_summary(stages, args.slo_p95_ms, args.max_error_rate),
+        "rss_samples": rss_samples,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out.with_suffix(".json"), "w") as f:
+        json.dump(report, f, indent=2)
+    write_markdown(report, out.with_suffix(".md"))
+    print(f"[load_test] Wrote {out.with_suffix('.json')} and {out.with_suffix('.md')}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay videos against /analyze at increasing concurrency")
+    parser.add_argument("video_dir")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default=None, help="default: API_KEY env var")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated concurrency levels, one stage each")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per stage")
+    parser.add_argument("--requests", type=int, default=None, help="stop a stage after this many requests")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout (s)")
+    parser.add_argument("--pause", type=float, default=0, help="idle seconds between stages")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="RSS sampling interval (s)")
+    parser.add_argument("--slo-p95-ms", type=float, default=10000)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--in-process", action="store_true", help="run the app in this process instead of hitting --url")
+    parser.add_argument("--stub", action="store_true", help="in-process only: random PoseMLP and synthetic pose instead of real models")
+    parser.add_argument("--stub-pose-ms", type=float, default=20, help="simulated pose inference time per frame")
+    parser.add_argument("--no-rate-limit", action="store_true", help="in-process only: disable slowapi limits")
+    parser.add_argument("--out", default="load_report", help="report path prefix (.json and .md are written)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,18 @@ import shutil
 import numpy as np
 import cv2
 import torch
-import torch.nn as nn
 import gc
+import asyncio
+import json
+import time
+from typing import List, Optional
 from pathlib import Path
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 import mediapipe as mp
 from datetime import datetime
 from slowapi import Limiter
@@ -27,16 +31,54 @@ load_dotenv()
 
 #Parent directory for model import
 sys.path.insert(0, str(Path(__file__).parent.parent))
+from classifier_pool import PoseClassifierPool
 from pose_classifier import PoseClassifier
-from video_processor import VideoProcessor
+from frame_pool import FrameBufferPool
+from pose_mlp import load_pose_mlp
+from video_processor import VideoProcessor, iter_sampled_frames, times_to_frame_indices, load_scoring_config
+from shot_segmenter import ShotSegmenter, DEFAULT_SEGMENT_CONFIG
+from live_tracker import LiveShotTracker
+from video_probe import probe_video, plan_analysis, estimate_cost_s, DEFAULT_ADMISSION_POLICY
+from upload_store import UploadStore, UploadError
+from micro_batcher import MicroBatcher
+from cpu_governor import available_cpus, plan_cpu_layout, apply_cpu_layout
+from exemplar_index import ExemplarIndex
+from cost_limiter import CostLimiter, FileBucketStore, MemoryBucketStore
+
+#Request limits are counted per process by slowapi's default memory storage, so under the prefork launcher
+#each worker enforces its share of a limit (rounded up) and the total stays close to it. Set
+#RATE_LIMIT_STORAGE_URI (e.g. redis://host:6379 or memcached://host:11211) to share exact counters instead
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+
+def worker_limit(limit: str):
+    #Limit provider evaluated per request, after the launcher exported WEB_CONCURRENCY to the worker
+    def provider() -> str:
+        if not RATE_LIMIT_STORAGE_URI.startswith("memory://"):
+            return limit
+        workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        count, period = limit.split("/", 1)
+        return f"{-(-int(count) // workers)}/{period}"
+    return provider
+
 
 #Global variables
 model = None
 device = None
-pose_classifier = None
+classifier_pool = None
+frame_pool = None
+upload_store = None
+mlp_batcher = None
+background_tasks = set()  # strong references to fire-and-forget tasks
+analysis_slots = None  # asyncio.Semaphore sized to the classifier pool, for work the server queues itself
+cpu_layout = None
+exemplar_index = None
+scoring_config = None
+cost_limiter = None
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["10/minute"]
+    default_limits=[worker_limit("10/minute")],
+    storage_uri=RATE_LIMIT_STORAGE_URI
 )
 
 
@@ -44,40 +86,98 @@ limiter = Limiter(
 MODEL_WEIGHTS_PATH = os.getenv("MODEL_WEIGHTS_PATH")
 API_KEY = os.getenv("API_KEY")
 MAX_VIDEO_MB = int(os.getenv("MAX_VIDEO_MB", "25"))
+POSE_POOL_SIZE = int(os.getenv("POSE_POOL_SIZE", "0"))  # concurrent analyses per worker, 0 lets the CPU governor choose
+POSE_POOL_TIMEOUT = float(os.getenv("POSE_POOL_TIMEOUT", "30"))
+#Classifier wait for work the server queued itself (batch clips, session shots), past which that item fails with 503
+QUEUED_POOL_TIMEOUT = float(os.getenv("QUEUED_POOL_TIMEOUT", str(4 * POSE_POOL_TIMEOUT)))
+MAX_BATCH_VIDEOS = int(os.getenv("MAX_BATCH_VIDEOS", "10"))
+SCORING_CONFIG_PATH = os.getenv("SCORING_CONFIG_PATH")  # JSON written by calibrate_scoring.py
+EXEMPLAR_INDEX_PATH = os.getenv("EXEMPLAR_INDEX_PATH")  # .npz written by exemplar_index.py
+EXEMPLAR_TOP_K = int(os.getenv("EXEMPLAR_TOP_K", "3"))
+TARGET_ANALYSIS_FPS = float(os.getenv("TARGET_ANALYSIS_FPS", "30"))  # 0 analyzes every frame
+LANDMARK_GAP_FILL_S = float(os.getenv("LANDMARK_GAP_FILL_S", "0.2"))  # 0 disables landmark interpolation
+LANDMARK_INTERP_METHOD = os.getenv("LANDMARK_INTERP_METHOD", "linear")  # linear or spline
+CANDIDATE_NMS_S = float(os.getenv("CANDIDATE_NMS_S", "0.15"))  # phase candidates closer than this to a better one are dropped
+MAX_SESSION_VIDEO_MB = int(os.getenv("MAX_SESSION_VIDEO_MB", "200"))  # /analyze/session uploads
+MAX_SESSION_SHOTS = int(os.getenv("MAX_SESSION_SHOTS", "50"))
+LIVE_MAX_PENDING_FRAMES = int(os.getenv("LIVE_MAX_PENDING_FRAMES", "2"))  # older frames are dropped beyond this
+LIVE_MAX_FRAME_KB = int(os.getenv("LIVE_MAX_FRAME_KB", "512"))
+LIVE_IDLE_TIMEOUT_S = float(os.getenv("LIVE_IDLE_TIMEOUT_S", "30"))  # no message for this long closes the stream, 0 disables
+LIVE_MAX_SESSION_S = float(os.getenv("LIVE_MAX_SESSION_S", "900"))  # streams are closed after this long, 0 disables
+FRAME_POOL_MAX_MB = float(os.getenv("FRAME_POOL_MAX_MB", "512"))  # idle decode buffers kept for reuse
+POSE_CASCADE = os.getenv("POSE_CASCADE", "0") == "1"  # lite pose scan, heavy model only on candidate windows
+POSE_CASCADE_TOP_K = int(os.getenv("POSE_CASCADE_TOP_K", "8"))
 
-class PoseMLP(nn.Module):
-    def __init__(self, input_dim=135, hidden_dim1=128, hidden_dim2=64, dropout=0.2, output_dim=1):
-        super().__init__()
-        self.net = nn.Sequential(
-            nn.Linear(input_dim, hidden_dim1),
-            nn.BatchNorm1d(hidden_dim1),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(hidden_dim1, hidden_dim2),
-            nn.BatchNorm1d(hidden_dim2),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(hidden_dim2, output_dim)
-        )
-    
-    def forward(self, x):
-        return self.net(x).squeeze(-1)
+PREVIEW_FRAMES = int(os.getenv("PREVIEW_FRAMES", "12"))  # frames sampled by /analyze/preview
 
+#CPU governor: splits the cores between workers, concurrent analyses and torch/OpenCV threads
+CPU_GOVERNOR = os.getenv("CPU_GOVERNOR", "1") == "1"
+CPU_BUDGET = int(os.getenv("CPU_BUDGET", "0"))  # cores for all workers together, 0 uses every available core
+CPU_AFFINITY = os.getenv("CPU_AFFINITY", "0") == "1"  # pin each worker to its own cores
 
-#Initialize FastAPI app with lifespan and model loading
-async def lifespan(app: FastAPI):
-    global model, device, pose_classifier
+#PoseMLP calls from concurrent requests are merged into one forward pass (0 wait disables batching)
+MLP_BATCH_MAX_ITEMS = int(os.getenv("MLP_BATCH_MAX_ITEMS", "64"))
+MLP_BATCH_MAX_WAIT_MS = float(os.getenv("MLP_BATCH_MAX_WAIT_MS", "2"))
+
+#Resumable uploads (/uploads), staged on local disk shared by all workers
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", os.path.join(tempfile.gettempdir(), "brokeshot_uploads"))
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "200"))
+UPLOAD_MAX_CHUNK_MB = int(os.getenv("UPLOAD_MAX_CHUNK_MB", "8"))
+UPLOAD_SESSION_TTL_S = float(os.getenv("UPLOAD_SESSION_TTL_S", "3600"))  # idle uploads are removed after this
+UPLOAD_GC_INTERVAL_S = float(os.getenv("UPLOAD_GC_INTERVAL_S", "300"))
+
+#Admission policy, applied from container metadata before any frame is decoded (see video_probe.py)
+ADMISSION_POLICY = {
+    "max_video_s": float(os.getenv("ADMISSION_MAX_VIDEO_S", "180")),  # longer uploads are rejected
+    "max_window_s": float(os.getenv("ADMISSION_MAX_WINDOW_S", "15")),  # analysis window cap
+    "max_frames": int(os.getenv("ADMISSION_MAX_FRAMES", "450")),  # pose inferences per video
+    "max_side": int(os.getenv("ADMISSION_MAX_SIDE", "1280")),  # downscale target, 0 disables
+    "max_cost_s": float(os.getenv("ADMISSION_MAX_COST_S", "30")),  # estimated work per video
+    "pose_ms_per_frame": float(os.getenv("POSE_MS_PER_FRAME", "60")),
+    "target_fps": TARGET_ANALYSIS_FPS,
+}
+
+#Compute budget per client (see cost_limiter.py): requests are charged the admission plan's estimated
+#seconds of work and refunded what they didn't use. The slowapi limits stay as a coarse flood guard
+COST_LIMIT_CAPACITY_S = float(os.getenv("COST_LIMIT_CAPACITY_S", "120"))  # burst budget per client, 0 disables
+COST_LIMIT_REFILL_S_PER_MIN = float(os.getenv("COST_LIMIT_REFILL_S_PER_MIN", "60"))  # sustained budget
+COST_LIMIT_STORE = os.getenv("COST_LIMIT_STORE", "file")  # file (shared by all workers) or memory (per worker)
+COST_LIMIT_PATH = os.getenv("COST_LIMIT_PATH", os.path.join(tempfile.gettempdir(), "brokeshot_cost_buckets.json"))
+
+PHASE_MAPPING = {
+    "shot pocket": "shot_pocket",
+    "set point": "set_point",
+    "follow through": "follow_through"
+}
+PHASE_INDEX = {"shot pocket": 0, "set point": 1, "follow through": 2}
+
+#Garbage collector pauses in this process, reported by /health
+gc_stats = {"collections": 0, "pause_ms": 0.0, "max_pause_ms": 0.0}
+_gc_start = None
+
+
+def _track_gc(phase, info):
+    global _gc_start
+    if phase == "start":
+        _gc_start = time.perf_counter()
+    elif _gc_start is not None:
+        pause_ms = (time.perf_counter() - _gc_start) * 1000
+        gc_stats["collections"] += 1
+        gc_stats["pause_ms"] += pause_ms
+        gc_stats["max_pause_ms"] = max(gc_stats["max_pause_ms"], pause_ms)
+        _gc_start = None
+
+
+gc.callbacks.append(_track_gc)
+
+
+#Loads PoseMLP weights into the module globals; the pre-fork launcher calls this once in the parent
+def load_model():
+    global model, device
     
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"Using device: {device}")
     
-    try:
-        pose_classifier = PoseClassifier()
-        print("Initialized PoseClassifier")
-    except Exception as e:
-        print(f"Error initializing PoseClassifier: {e}")
-        pose_classifier = None
-    
     default_weights_path = Path(__file__).parent.parent / "MLweights" / "broke_jump_shot_detector_weights_v5.pth"
 
     weights_path = Path(os.getenv("MODEL_WEIGHTS_PATH", default_weights_path))
@@ -87,20 +187,106 @@ async def lifespan(app: FastAPI):
         model = None
     else:
         try:
-            model = PoseMLP(input_dim=135, hidden_dim1=128, hidden_dim2=64, dropout=0.2, output_dim=1)
-            model = model.to(device)
-            
-            state_dict = torch.load(weights_path, map_location=device, weights_only=False)
-            model.load_state_dict(state_dict)
-            model.eval()
+            #Layer sizes come from the training run's JSON next to the weights, if there is one
+            model = load_pose_mlp(weights_path, device)
             print(f"Loaded model weights from {weights_path}")
         except Exception as e:
             print(f"Error loading model: {e}")
             model = None
     
+    return model
+
+
+#Pool entries: the heavy classifier, carrying a lite one for the cascade scan when POSE_CASCADE=1
+def build_pose_classifier():
+    classifier = PoseClassifier()
+    if POSE_CASCADE:
+        classifier.lite = PoseClassifier(model_complexity=0)
+    return classifier
+
+
+#Removes stale upload sessions in the background; every worker runs one, removal is idempotent
+async def collect_uploads_periodically():
+    while True:
+        try:
+            removed = await run_in_threadpool(upload_store.collect_garbage)
+            if removed:
+                print(f"[uploads] Removed {removed} stale upload sessions")
+        except Exception as e:
+            print(f"[uploads] Error collecting stale uploads: {e}")
+        await asyncio.sleep(UPLOAD_GC_INTERVAL_S)
+
+
+#Initialize FastAPI app with lifespan and model loading
+async def lifespan(app: FastAPI):
+    global classifier_pool, frame_pool, upload_store, mlp_batcher, cpu_layout, exemplar_index, scoring_config, cost_limiter
+    global analysis_slots
+    
+    #Weights may already be loaded by the launcher before forking
+    if model is None:
+        load_model()
+    
+    if SCORING_CONFIG_PATH:
+        try:
+            scoring_config = load_scoring_config(SCORING_CONFIG_PATH)
+            print(f"Loaded frame scoring config from {SCORING_CONFIG_PATH}")
+        except Exception as e:
+            print(f"Error loading scoring config, using defaults: {e}")
+            scoring_config = None
+    
+    #Memory-mapped, so workers share the exemplar pages through the page cache
+    if EXEMPLAR_INDEX_PATH:
+        try:
+            exemplar_index = ExemplarIndex(EXEMPLAR_INDEX_PATH)
+            print(f"Loaded exemplar index from {EXEMPLAR_INDEX_PATH}: {exemplar_index.counts}")
+        except Exception as e:
+            print(f"Error loading exemplar index: {e}")
+            exemplar_index = None
+    
+    #Thread counts are set before any graph is built; the launcher exports the worker count and index
+    pose_pool_size = POSE_POOL_SIZE or 2
+    if CPU_GOVERNOR:
+        cpus = available_cpus()
+        layout = plan_cpu_layout(cpus[:CPU_BUDGET] if CPU_BUDGET else cpus,
+                                 workers=int(os.getenv("WEB_CONCURRENCY", "1")), worker_index=int(os.getenv("WORKER_INDEX", "0")),
+                                 pose_pool_size=POSE_POOL_SIZE, pin=CPU_AFFINITY)
+        cpu_layout = apply_cpu_layout(layout)
+        if layout["workers"] > layout["cpus"]:
+            print(f"[cpu_governor] Warning: {layout['workers']} workers share {layout['cpus']} cores, lower WEB_CONCURRENCY")
+        pose_pool_size = layout["pose_pool_size"]
+        print(f"[cpu_governor] {cpu_layout['cpus_per_worker']} of {cpu_layout['cpus']} cores for this worker: "
+              f"{pose_pool_size} concurrent analyses x {cpu_layout['threads_per_analysis']} threads")
+    
+    #MediaPipe graphs are built per process, after any fork
+    try:
+        classifier_pool = PoseClassifierPool(size=pose_pool_size, factory=build_pose_classifier)
+        print("Initialized PoseClassifier pool")
+    except Exception as e:
+        print(f"Error initializing PoseClassifier pool: {e}")
+        classifier_pool = None
+    analysis_slots = asyncio.Semaphore(classifier_pool.size if classifier_pool is not None else 1)
+    
+    #Decode buffers are reused across requests instead of reallocated per frame
+    frame_pool = FrameBufferPool(max_mb=FRAME_POOL_MAX_MB)
+    
+    upload_store = UploadStore(UPLOAD_STAGING_DIR, max_bytes=UPLOAD_MAX_MB * 1024 * 1024,
+                               max_chunk_bytes=UPLOAD_MAX_CHUNK_MB * 1024 * 1024, ttl_s=UPLOAD_SESSION_TTL_S)
+    upload_gc = asyncio.create_task(collect_uploads_periodically())
+    
+    if MLP_BATCH_MAX_WAIT_MS > 0:
+        mlp_batcher = MicroBatcher(predict_shot_quality_batch, max_items=MLP_BATCH_MAX_ITEMS, max_wait_ms=MLP_BATCH_MAX_WAIT_MS)
+    
+    #Disabled together with the request limits (e.g. load_test.py --no-rate-limit)
+    if COST_LIMIT_CAPACITY_S > 0 and limiter.enabled:
+        store = FileBucketStore(COST_LIMIT_PATH) if COST_LIMIT_STORE == "file" else MemoryBucketStore()
+        cost_limiter = CostLimiter(COST_LIMIT_CAPACITY_S, COST_LIMIT_REFILL_S_PER_MIN / 60.0, store)
+    
     yield
     
     print("Shutting down...")
+    upload_gc.cancel()
+    if mlp_batcher is not None:
+        mlp_batcher.close()
 
 
 app = FastAPI(
@@ -114,7 +300,7 @@ app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
 
 #Helper Functions from pose_classifier.py
-def extract_frames_from_video(video_path: str, num_frames: int = 3) -> list:
+def extract_frames_from_video(video_path: str, num_frames: int = 3, target_times: list = None) -> list:
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise ValueError(f"Cannot open video: {video_path}")
@@ -125,16 +311,18 @@ def extract_frames_from_video(video_path: str, num_frames: int = 3) -> list:
     if total_frames == 0:
         raise ValueError("Video has no frames")
     
-    # Sample frames evenly across the video
-    frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+    if target_times is not None:
+        # Decode only the requested timestamps
+        frame_indices = [idx for idx in times_to_frame_indices(target_times, fps) if idx < total_frames]
+    else:
+        # Sample frames evenly across the video
+        frame_indices = sorted(set(np.linspace(0, total_frames - 1, num_frames, dtype=int).tolist()))
     frames = []
     
-    for idx in frame_indices:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if ret:
-            timestamp = idx / fps
-            frames.append((frame, timestamp, idx))
+    # Close frames are grabbed without decoding, distant ones are reached by seeking
+    for idx, frame in iter_sampled_frames(cap, frame_indices):
+        timestamp = idx / fps
+        frames.append((frame, timestamp, idx))
     
     cap.release()
     
@@ -165,7 +353,7 @@ def extract_keypoints(results) -> np.ndarray:
     return np.array(keypoints, dtype=np.float32).flatten()
 
 
-def get_shot_phase(results) -> tuple:
+def get_shot_phase(results, pose_classifier) -> tuple:
     if pose_classifier is None or not results:
         return "unknown", 0.0
     
@@ -177,24 +365,50 @@ def predict_shot_quality(keypoints: np.ndarray) -> tuple:
     if model is None:
         return None, 0.0
     
+    predictions, confidences = predict_shot_quality_batched(keypoints[np.newaxis])
+    return int(predictions[0]), float(confidences[0])
+
+
+#Scores a (N, 135) matrix of keypoint + phase vectors with a single forward pass
+def predict_shot_quality_batch(input_matrix: np.ndarray) -> tuple:
+    if model is None or len(input_matrix) == 0:
+        return None, None
+    
     with torch.no_grad():
-        input_tensor = torch.tensor(keypoints, dtype=torch.float32).to(device)
+        input_tensor = torch.from_numpy(np.ascontiguousarray(input_matrix, dtype=np.float32)).to(device)
         
-        logit = model(input_tensor.unsqueeze(0)).squeeze()
+        logits = model(input_tensor)
         
-        prob = torch.sigmoid(logit).cpu().item()
+        probs = torch.sigmoid(logits).cpu().numpy()
         
-        prediction = 1 if prob > 0.5 else 0
-        confidence = max(prob, 1 - prob)
+        predictions = (probs > 0.5).astype(int)
+        confidences = np.maximum(probs, 1 - probs)
     
-    return prediction, confidence
+    return predictions, confidences
+
+
+#Same as predict_shot_quality_batch, but rows from concurrent requests share one forward pass
+#through mlp_batcher (blocking for at most MLP_BATCH_MAX_WAIT_MS extra)
+def predict_shot_quality_batched(input_matrix: np.ndarray) -> tuple:
+    if mlp_batcher is None or model is None or len(input_matrix) == 0:
+        return predict_shot_quality_batch(input_matrix)
+    return mlp_batcher(input_matrix)
 
 #Helper function to select best frames based on VideoProcessor logic
-def select_best_frames_from_video(video_path: str, output_dir: Path = None) -> list:
+#frame_lease: optional FrameLease the frames are decoded into; only the selected frames stay leased on return
+def select_best_frames_from_video(video_path: str, output_dir: Path = None, pose_classifier=None,
+                                  start_s: float = None, end_s: float = None, frame_lease=None,
+                                  target_fps: float = None, max_side: int = None, work: dict = None) -> list:
     try:
-        # Use VideoProcessor to extract and analyze all frames
-        vp = VideoProcessor(video_path, str(output_dir or tempfile.gettempdir()))
-        frames_data = vp.extract_frames(sample_rate=1)
+        # Use VideoProcessor to extract and analyze all frames (only inside the trim window, if given)
+        vp = VideoProcessor(video_path, str(output_dir or tempfile.gettempdir()), classifier=pose_classifier,
+                            scoring_config=scoring_config, gap_fill_s=LANDMARK_GAP_FILL_S or None,
+                            interp_method=LANDMARK_INTERP_METHOD, frame_lease=frame_lease,
+                            lite_classifier=getattr(pose_classifier, "lite", None), cascade_top_k=POSE_CASCADE_TOP_K,
+                            max_side=max_side, nms_window_s=CANDIDATE_NMS_S)
+        frames_data = vp.extract_frames(sample_rate=1, start_s=start_s, end_s=end_s, target_fps=target_fps or TARGET_ANALYSIS_FPS or None)
+        if work is not None:
+            work["frames"] = len(vp.frames)  # frames actually analyzed, for the compute refund
         
         # Get the best sequence
         sequence = vp.find_best_sequence(max_candidates=8)
@@ -213,7 +427,7 @@ def select_best_frames_from_video(video_path: str, output_dir: Path = None) -> l
                 frame_idx = candidate["frame_idx"]
                 conf = candidate["conf"]
                 phase_name = "shot pocket" if phase_key == "pocket" else ("set point" if phase_key == "set" else "follow through")
-                best_frames.append((frame, phase_name, frame_idx, conf))
+                best_frames.append((frame, phase_name, frame_idx, conf, candidate["timestamp"]))
         
         elif kind == "pair":
             pair_type, payload = data  # Unpack the nested tuple
@@ -223,14 +437,18 @@ def select_best_frames_from_video(video_path: str, output_dir: Path = None) -> l
                     frame_idx = candidate["frame_idx"]
                     conf = candidate["conf"]
                     phase_name = label.replace("_", " ")
-                    best_frames.append((frame, phase_name, frame_idx, conf))
+                    best_frames.append((frame, phase_name, frame_idx, conf, candidate["timestamp"]))
         
         elif kind == "single":
             candidate = data["single"]
             frame = candidate["frame"]
             frame_idx = candidate["frame_idx"]
             conf = candidate["conf"]
-            best_frames.append((frame, "unknown", frame_idx, conf))
+            best_frames.append((frame, "unknown", frame_idx, conf, candidate["timestamp"]))
+        
+        #Every other decoded frame can go back to the pool now
+        if frame_lease is not None:
+            frame_lease.release_except([f[0] for f in best_frames])
         
         return best_frames
     
@@ -239,25 +457,313 @@ def select_best_frames_from_video(video_path: str, output_dir: Path = None) -> l
         return None
 
 
+#Resident memory of this worker in MB (Linux /proc; elsewhere the peak RSS is the best available)
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "model_loaded": model is not None,
-        "device": str(device)
+        "device": str(device),
+        "pid": os.getpid(),
+        "rss_mb": round(current_rss_mb(), 1),
+        "frame_pool": frame_pool.stats() if frame_pool is not None else None,
+        "gc": {key: round(value, 1) for key, value in gc_stats.items()},
+        "uploads": upload_store.stats() if upload_store is not None else None,
+        "mlp_batcher": mlp_batcher.stats() if mlp_batcher is not None else None,
+        "cpu": cpu_layout,
+        "exemplar_index": exemplar_index.counts if exemplar_index is not None else None,
+        "cost_limiter": cost_limiter.stats() if cost_limiter is not None else None,
+        "pose_pool": classifier_pool.stats() if classifier_pool is not None else None
+    }
+
+#MLP input: flattened (33, 4) keypoints followed by the phase one-hot
+def build_input_vector(keypoints: np.ndarray, phase_name: str) -> np.ndarray:
+    phase_vector = np.zeros(3, dtype=np.float32)
+    phase_vector[PHASE_INDEX.get(phase_name, 0)] = 1.0
+    return np.concatenate([keypoints, phase_vector])
+
+
+#Runs frame selection on one saved video and builds the MLP input vector for each selected frame
+#Returns None when no frames were selected (blocking, run in a threadpool)
+#pool_timeout: seconds to wait for a classifier before answering 503, None waits (see run_queued)
+def extract_phase_features(video_path: str, results_dir: Path, start_s: float = None, end_s: float = None,
+                           frame_lease=None, target_fps: float = None, max_side: int = None, work: dict = None,
+                           pool_timeout: float = POSE_POOL_TIMEOUT) -> list:
+    try:
+        pose_classifier = classifier_pool.checkout(timeout=pool_timeout)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
+    
+    try:
+        best_frames = select_best_frames_from_video(video_path, results_dir, pose_classifier, start_s, end_s, frame_lease,
+                                                    target_fps, max_side, work)
+        if not best_frames:
+            return None
+        
+        features = []
+        for i, (frame, phase_name, frame_idx, phase_confidence, timestamp) in enumerate(best_frames):
+            pose_results = detect_pose(frame, pose_classifier)
+            if pose_results is None:
+                print(f"Warning: No pose detected in selected frame {i} ({phase_name})")
+                continue
+            
+            keypoints = extract_keypoints(pose_results)
+            if keypoints is None:
+                continue
+            
+            features.append({
+                "frame": frame,
+                "phase_name": phase_name,
+                "frame_idx": frame_idx,
+                "timestamp": timestamp,
+                "phase_confidence": phase_confidence,
+                "input_vector": build_input_vector(keypoints, phase_name)
+            })
+        return features
+    finally:
+        classifier_pool.checkin(pose_classifier)
+
+
+#Scores the selected frames of several videos with one MLP forward pass (shared with concurrent requests via mlp_batcher)
+#videos: list of (features, results_dir) with features from extract_phase_features
+#Selected frames are saved as JPEGs in results_dir unless it is None
+def score_phase_features(videos: list) -> list:
+    vectors = [feat["input_vector"] for features, _ in videos if features for feat in features]
+    predictions, confidences = predict_shot_quality_batched(np.stack(vectors)) if vectors else (None, None)
+    
+    all_results = []
+    row = 0
+    for features, results_dir in videos:
+        results = {
+            "shot_pocket": {"prediction": None, "confidence": 0.0, "phase": "shot pocket"},
+            "set_point": {"prediction": None, "confidence": 0.0, "phase": "set point"},
+            "follow_through": {"prediction": None, "confidence": 0.0, "phase": "follow through"}
+        }
+        
+        # If best frames found, process them; otherwise all phases default to 0 (broke)
+        if features is not None:
+            for feat in features:
+                if predictions is not None:
+                    prediction, confidence = predictions[row], confidences[row]
+                    phase_name = feat["phase_name"]
+                    phase_key = PHASE_MAPPING.get(phase_name, "shot_pocket")
+                    results[phase_key]["prediction"] = int(prediction)
+                    results[phase_key]["confidence"] = float(confidence)
+                    results[phase_key]["phase_name"] = phase_name
+                    results[phase_key]["phase_confidence"] = float(feat["phase_confidence"])
+                    #Frame index and time always refer to the original (untrimmed) video
+                    results[phase_key]["frame_idx"] = int(feat["frame_idx"])
+                    results[phase_key]["frame_time_s"] = round(float(feat["timestamp"]), 3)
+                    #Closest labeled exemplars of this phase (the first 132 inputs are the keypoints)
+                    if exemplar_index is not None and phase_name in PHASE_INDEX:
+                        results[phase_key]["exemplars"] = exemplar_index.query(feat["input_vector"][:132], phase_name, k=EXEMPLAR_TOP_K)
+                    
+                    if results_dir is not None:
+                        frame_filename = f"{phase_key}_{feat['frame_idx']}_conf{confidence:.2f}.jpg"
+                        frame_path = results_dir / frame_filename
+                        cv2.imwrite(str(frame_path), feat["frame"])
+                        results[phase_key]["saved_frame"] = frame_filename
+                row += 1
+        else:
+            # No best frames found, default all phases to prediction 0 (broke)
+            print("Warning: No best frames selected from video, defaulting all phases to broke (0)")
+            for phase_key in results.keys():
+                results[phase_key]["prediction"] = 0
+                results[phase_key]["confidence"] = 0.0
+        
+        all_results.append(results)
+    return all_results
+
+
+#Turns per-phase predictions into the score, verdict and feedback message
+def build_shot_response(results: dict) -> dict:
+    score = 0
+    broke_phases = []
+    
+    if results["shot_pocket"]["prediction"] == 1:
+        score += 2
+    else:
+        broke_phases.append("shot pocket")
+    
+    if results["set_point"]["prediction"] == 1:
+        score += 3
+    else:
+        broke_phases.append("set point")
+    
+    if results["follow_through"]["prediction"] == 1:
+        score += 4
+    else:
+        broke_phases.append("follow through")
+    
+    is_broke = score < 9
+    
+    if is_broke:
+        feedback = f"Shot is BROKE. Score: {score}/9. "
+        if len(broke_phases) == 3:
+            feedback += "All phases need improvement."
+        else:
+            feedback += f"Improve: {', '.join(broke_phases)}."
+    else:
+        feedback = f"Shot is BUTTER! Score: {score}/9. Good form!"
+    
+    return {
+        "score": score,
+        "is_broke": is_broke,
+        "max_score": 9,
+        "phases": results,
+        "message": feedback,
+        "timestamp": datetime.now().isoformat()
     }
 
+
+#One lease per video so each can hand back its unselected frames independently
+def new_frame_lease():
+    return frame_pool.lease() if frame_pool is not None else None
+
+
+def release_frame_leases(leases: list):
+    for lease in leases:
+        if lease is not None:
+            lease.release()
+
+
+#Probes container metadata and applies ADMISSION_POLICY; raises HTTPException if the video is rejected
+def admit_video(video_path: str, start_s: float = None, end_s: float = None) -> dict:
+    plan = plan_analysis(probe_video(video_path), start_s, end_s, ADMISSION_POLICY)
+    if plan["action"] == "reject":
+        print(f"[admission] Rejected {Path(video_path).name}: {plan['reason']}")
+        raise HTTPException(status_code=plan["status"], detail=plan["reason"])
+    if plan["adjustments"]:
+        print(f"[admission] {Path(video_path).name}: {'; '.join(plan['adjustments'])} (estimated {plan['estimated_cost_s']}s)")
+    return plan
+
+
+#What admission changed, echoed in the response so clients know what was actually analyzed
+def admission_summary(plan: dict) -> dict:
+    return {key: plan[key] for key in ("start_s", "end_s", "target_fps", "max_side", "estimated_cost_s", "adjustments")}
+
+
+#Takes cost_s from the client's compute budget; raises 429 with Retry-After if it doesn't cover it.
+#Returns the amount actually charged (costs above the bucket capacity are charged as the capacity)
+def charge_compute(client: str, cost_s: float) -> float:
+    if cost_limiter is None or client is None:
+        return 0.0
+    cost_s = min(cost_s, cost_limiter.capacity)
+    allowed, retry_after, remaining = cost_limiter.charge(client, cost_s)
+    if not allowed:
+        retry_after = int(np.ceil(retry_after))
+        print(f"[cost_limiter] {client} over budget: needs {cost_s:.1f}s of work, has {remaining:.1f}s")
+        raise HTTPException(status_code=429, detail=f"Compute budget exceeded, retry in {retry_after}s",
+                            headers={"Retry-After": str(retry_after)})
+    return cost_s
+
+
+def refund_compute(client: str, amount_s: float):
+    if cost_limiter is not None and client is not None and amount_s > 0:
+        cost_limiter.refund(client, amount_s)
+
+
+#Admission, then frame selection within the admitted plan; returns (features, plan)
+#client: key of the compute budget charged with the plan's estimated cost (None skips the charge)
+def extract_admitted_features(video_path: str, results_dir: Path, start_s: float = None, end_s: float = None,
+                              frame_lease=None, client: str = None, pool_timeout: float = POSE_POOL_TIMEOUT) -> tuple:
+    plan = admit_video(video_path, start_s, end_s)
+    charged = charge_compute(client, plan["estimated_cost_s"])
+    work = {}
+    try:
+        features = extract_phase_features(video_path, results_dir, plan["start_s"], plan["end_s"], frame_lease,
+                                          plan["target_fps"], plan["max_side"], work, pool_timeout)
+    except HTTPException:
+        refund_compute(client, charged)  # e.g. server busy, nothing was decoded
+        raise
+    #The estimate assumes the whole window is analyzed; a video that ends early or a failed decode
+    #analyzes fewer frames, and the unused share goes back to the client
+    used = min(1.0, work.get("frames", 0) / max(1, plan["estimated_frames"]))
+    refund_compute(client, charged * (1.0 - used))
+    return features, plan
+
+
+#Runs frame selection and per-phase classification for one saved video (blocking, run in a threadpool)
+def run_analysis(video_path: str, results_dir: Path, start_s: float = None, end_s: float = None,
+                 client: str = None) -> dict:
+    frame_lease = new_frame_lease()
+    try:
+        features, plan = extract_admitted_features(video_path, results_dir, start_s, end_s, frame_lease, client)
+        results = score_phase_features([(features, results_dir)])[0]
+    finally:
+        #Frames are saved by now; their buffers go back to the pool for the next request
+        release_frame_leases([frame_lease])
+    response = build_shot_response(results)
+    if plan["adjustments"]:
+        response["admission"] = admission_summary(plan)
+    return response
+
+
+#Runs blocking work the server queued itself (clips of a batch, shots of a session) once one of the
+#analysis_slots is free: waiting happens here instead of in threadpool threads other requests need.
+#Classifiers taken by other endpoints aren't counted by the slots, so callers still bound the pool
+#wait with pool_timeout=QUEUED_POOL_TIMEOUT (longer than the client-facing POSE_POOL_TIMEOUT, since the
+#request was accepted); an item that times out becomes a per-item 503 error
+async def run_queued(fn, *args, **kwargs):
+    async with analysis_slots:
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+
+#Aggregates per-video responses from /analyze/batch (or per-shot responses from /analyze/session)
+def summarize_session(responses: list, item: str = "video", label_key: str = "filename") -> dict:
+    scored = [r for r in responses if "score" in r]
+    summary = {
+        f"{item}s": len(responses),
+        "analyzed": len(scored),
+        "failed": len(responses) - len(scored),
+        "broke_count": sum(1 for r in scored if r["is_broke"]),
+        "butter_count": sum(1 for r in scored if not r["is_broke"]),
+        "average_score": round(float(np.mean([r["score"] for r in scored])), 2) if scored else None,
+        "max_score": 9,
+        "phase_butter_rate": {}
+    }
+    for phase_key in PHASE_MAPPING.values():
+        preds = [r["phases"][phase_key]["prediction"] for r in scored]
+        summary["phase_butter_rate"][phase_key] = round(sum(1 for p in preds if p == 1) / len(preds), 2) if preds else None
+    if scored:
+        best = max(scored, key=lambda r: r["score"])
+        worst = min(scored, key=lambda r: r["score"])
+        summary[f"best_{item}"] = best[label_key]
+        summary[f"worst_{item}"] = worst[label_key]
+    return summary
+
+
 #Uses ML model to classify each phase
 @app.post("/analyze")
-@limiter.limit("5/minute")
-async def analyze_video(request: Request, file: UploadFile = File(...)):
+@limiter.limit(worker_limit("5/minute"))
+async def analyze_video(request: Request, file: UploadFile = File(...),
+                        start_s: Optional[float] = Form(None), end_s: Optional[float] = Form(None)):
     
     if request.headers.get("X-API-KEY") != API_KEY:
         raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    #Optional trim window (seconds into the original clip)
+    if start_s is not None and start_s < 0:
+        raise HTTPException(status_code=400, detail="start_s must be >= 0")
+    if end_s is not None and end_s <= (start_s or 0.0):
+        raise HTTPException(status_code=400, detail="end_s must be greater than start_s")
 
     if model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
+    if classifier_pool is None:
+        raise HTTPException(status_code=500, detail="Pose classifier not loaded")
+    
     if not file.filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
         raise HTTPException(status_code=400, detail="Invalid video format. Supported: mp4, mov, avi, mkv")
     
@@ -272,101 +778,403 @@ async def analyze_video(request: Request, file: UploadFile = File(...)):
 
         with open(temp_video_path, "wb") as f:
             f.write(contents)
+        contents = None
         
         results_dir = Path(temp_dir) / "results"
         results_dir.mkdir(exist_ok=True)
         
-        best_frames = select_best_frames_from_video(temp_video_path, results_dir)
+        #Pose work is blocking, keep it off the event loop
+        response = await run_in_threadpool(run_analysis, temp_video_path, results_dir, start_s, end_s,
+                                           get_remote_address(request))
+        if start_s is not None or end_s is not None:
+            response["window"] = {"start_s": start_s, "end_s": end_s}
         
-        results = {
-            "shot_pocket": {"prediction": None, "confidence": 0.0, "phase": "shot pocket"},
-            "set_point": {"prediction": None, "confidence": 0.0, "phase": "set point"},
-            "follow_through": {"prediction": None, "confidence": 0.0, "phase": "follow through"}
-        }
+        return JSONResponse(response)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing video: {str(e)}")
+    
+    finally:
+        #Remove temporary files and directories
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+
+        #Clear remaining references
+        contents = None
+        response = None
         
-        phase_mapping = {
-            "shot pocket": "shot_pocket",
-            "set point": "set_point",
-            "follow through": "follow_through"
-        }
+        #If using CUDA, clear cache
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+#Sparse preview: PREVIEW_FRAMES frames spread over the admitted window (reached by seeking), the most
+#confident frame per phase is scored. No smoothing or sequence search, so the verdict is provisional
+#(blocking, run in a threadpool)
+def run_preview(video_path: str, start_s: float = None, end_s: float = None, client: str = None) -> dict:
+    started = time.perf_counter()
+    plan = admit_video(video_path, start_s, end_s)
+    #Seeks instead of decoding the window, so only the sampled frames' pose work is charged
+    charged = charge_compute(client, PREVIEW_FRAMES * ADMISSION_POLICY["pose_ms_per_frame"] / 1000.0)
+    step = (plan["end_s"] - plan["start_s"]) / PREVIEW_FRAMES
+    target_times = [plan["start_s"] + step * (i + 0.5) for i in range(PREVIEW_FRAMES)]
+    try:
+        frames = extract_frames_from_video(video_path, target_times=target_times)
+        try:
+            pose_classifier = classifier_pool.checkout(timeout=POSE_POOL_TIMEOUT)
+        except TimeoutError:
+            raise HTTPException(status_code=503, detail="Server busy, try again shortly")
+    except (HTTPException, ValueError):
+        refund_compute(client, charged)  # unreadable video or server busy, no pose work was done
+        raise
+    #Timestamps past the end of the video are not sampled
+    refund_compute(client, charged * (1.0 - min(1.0, len(frames) / PREVIEW_FRAMES)))
+    
+    best = {}
+    try:
+        for frame, timestamp, frame_idx in frames:
+            pose_results = detect_pose(frame, pose_classifier)
+            if pose_results is None:
+                continue
+            phase, phase_confidence = get_shot_phase(pose_results, pose_classifier)
+            phase_name = phase.lower()
+            if phase_name not in PHASE_MAPPING or phase_confidence <= best.get(phase_name, {}).get("phase_confidence", 0.0):
+                continue
+            best[phase_name] = {
+                "frame": frame,
+                "phase_name": phase_name,
+                "frame_idx": frame_idx,
+                "timestamp": timestamp,
+                "phase_confidence": phase_confidence,
+                "input_vector": build_input_vector(extract_keypoints(pose_results), phase_name)
+            }
+    finally:
+        classifier_pool.checkin(pose_classifier)
+    
+    features = sorted(best.values(), key=lambda feat: PHASE_INDEX[feat["phase_name"]])
+    results = score_phase_features([(features or None, None)])[0]
+    response = build_shot_response(results)
+    response["provisional"] = True
+    response["preview"] = {
+        "frames_sampled": len(frames),
+        "phases_found": [feat["phase_name"] for feat in features],
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+    return response
+
+
+#Analyzes a fully received upload in the background (see /analyze/preview); errors reopen the upload,
+#so the client can call finalize itself to see them
+async def finalize_upload_in_background(upload_id: str, start_s: float = None, end_s: float = None,
+                                        client: str = None):
+    try:
+        await run_in_threadpool(finalize_upload, upload_id, start_s, end_s, client)
+    except Exception as e:
+        detail = e.detail if isinstance(e, (HTTPException, UploadError)) else str(e)
+        print(f"[preview] Full analysis of upload {upload_id} failed: {detail}")
+
+
+#Provisional verdict from a handful of sampled frames, typically well under a second.
+#With full=true the video is kept as an upload and fully analyzed in the background: poll
+#GET /uploads/{upload_id} until its state is "done" (the result is included), or call finalize.
+@app.post("/analyze/preview")
+@limiter.limit(worker_limit("10/minute"))
+async def analyze_video_preview(request: Request, file: UploadFile = File(...),
+                                start_s: Optional[float] = Form(None), end_s: Optional[float] = Form(None),
+                                full: bool = Form(False)):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if start_s is not None and start_s < 0:
+        raise HTTPException(status_code=400, detail="start_s must be >= 0")
+    if end_s is not None and end_s <= (start_s or 0.0):
+        raise HTTPException(status_code=400, detail="end_s must be greater than start_s")
+
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    if classifier_pool is None:
+        raise HTTPException(status_code=500, detail="Pose classifier not loaded")
+    
+    if not file.filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
+        raise HTTPException(status_code=400, detail="Invalid video format. Supported: mp4, mov, avi, mkv")
+    
+    temp_dir = tempfile.mkdtemp()
+    temp_video_path = os.path.join(temp_dir, Path(file.filename).name)
+    
+    try:
+        contents = await file.read()
+
+        if len(contents) > MAX_VIDEO_MB * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"Video file size exceeds the maximum limit of {MAX_VIDEO_MB} MB")
+
+        with open(temp_video_path, "wb") as f:
+            f.write(contents)
+        size = len(contents)
+        contents = None
         
-        # If best frames found, process them; otherwise all phases default to 0 (broke)
-        if best_frames:
-            # Process each selected frame
-            for i, (frame, phase_name, frame_idx, phase_confidence) in enumerate(best_frames):
-                pose_results = detect_pose(frame, pose_classifier)
-                if pose_results is None:
-                    print(f"Warning: No pose detected in selected frame {i} ({phase_name})")
-                    continue
-                
-                keypoints = extract_keypoints(pose_results)
-                if keypoints is None:
-                    continue
-                
-                phase_vector = np.zeros(3, dtype=np.float32)
-                phase_idx = {"shot pocket": 0, "set point": 1, "follow through": 2}.get(phase_name, 0)
-                phase_vector[phase_idx] = 1.0
-                
-                input_vector = np.concatenate([keypoints, phase_vector])
-                
-                prediction, confidence = predict_shot_quality(input_vector)
-                
-                if prediction is not None:
-                    phase_key = phase_mapping.get(phase_name, "shot_pocket")
-                    results[phase_key]["prediction"] = int(prediction)
-                    results[phase_key]["confidence"] = float(confidence)
-                    results[phase_key]["phase_name"] = phase_name
-                    results[phase_key]["phase_confidence"] = float(phase_confidence)
-                    
-                    frame_filename = f"{phase_key}_{frame_idx}_conf{confidence:.2f}.jpg"
-                    frame_path = results_dir / frame_filename
-                    cv2.imwrite(str(frame_path), frame)
-                    results[phase_key]["saved_frame"] = frame_filename
-        else:
-            # No best frames found, default all phases to prediction 0 (broke)
-            print("Warning: No best frames selected from video, defaulting all phases to broke (0)")
-            for phase_key in results.keys():
-                results[phase_key]["prediction"] = 0
-                results[phase_key]["confidence"] = 0.0
+        client = get_remote_address(request)
+        response = await run_in_threadpool(run_preview, temp_video_path, start_s, end_s, client)
         
-        score = 0
-        broke_phases = []
+        if full:
+            #The preview already passed admission; the file moves into the upload staging area
+            upload = await run_in_threadpool(upload_store.create, file.filename, size, None, temp_video_path)
+            task = asyncio.create_task(finalize_upload_in_background(upload["upload_id"], start_s, end_s, client))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+            response["full_analysis"] = {"upload_id": upload["upload_id"], "status_url": f"/uploads/{upload['upload_id']}"}
         
-        if results["shot_pocket"]["prediction"] == 1:
-            score += 2
-        else:
-            broke_phases.append("shot pocket")
+        return JSONResponse(response)
+    
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing video: {str(e)}")
+    
+    finally:
+        #Remove temporary files and directories
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+        contents = None
+
+
+#Analyzes a session of clips: frame selection runs in parallel, MLP scoring in one batch
+@app.post("/analyze/batch")
+@limiter.limit(worker_limit("2/minute"))
+async def analyze_video_batch(request: Request, files: List[UploadFile] = File(...)):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    if classifier_pool is None:
+        raise HTTPException(status_code=500, detail="Pose classifier not loaded")
+    
+    if len(files) > MAX_BATCH_VIDEOS:
+        raise HTTPException(status_code=400, detail=f"Too many videos. Maximum per batch: {MAX_BATCH_VIDEOS}")
+    
+    for file in files:
+        if not file.filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
+            raise HTTPException(status_code=400, detail=f"Invalid video format for {file.filename}. Supported: mp4, mov, avi, mkv")
+    
+    temp_dir = tempfile.mkdtemp()
+    frame_leases = []
+    
+    try:
+        video_jobs = []
+        for i, file in enumerate(files):
+            contents = await file.read()
+
+            if len(contents) > MAX_VIDEO_MB * 1024 * 1024:
+                raise HTTPException(status_code=413, detail=f"{file.filename} exceeds the maximum limit of {MAX_VIDEO_MB} MB")
+            
+            #Each clip gets its own folder in case filenames repeat
+            video_dir = Path(temp_dir) / str(i)
+            results_dir = video_dir / "results"
+            results_dir.mkdir(parents=True)
+            video_path = video_dir / Path(file.filename).name
+            with open(video_path, "wb") as f:
+                f.write(contents)
+            contents = None
+            video_jobs.append((file.filename, str(video_path), results_dir))
         
-        if results["set_point"]["prediction"] == 1:
-            score += 3
-        else:
-            broke_phases.append("set point")
+        #Frame selection in parallel, bounded by the classifier pool; each clip is charged on its own,
+        #so clips over the client's compute budget fail with 429 while the rest are analyzed
+        frame_leases = [new_frame_lease() for _ in video_jobs]
+        client = get_remote_address(request)
+        extracted = await asyncio.gather(
+            *[run_queued(extract_admitted_features, video_path, results_dir, None, None, lease, client,
+                         pool_timeout=QUEUED_POOL_TIMEOUT)
+              for (_, video_path, results_dir), lease in zip(video_jobs, frame_leases)],
+            return_exceptions=True
+        )
         
-        if results["follow_through"]["prediction"] == 1:
-            score += 4
-        else:
-            broke_phases.append("follow through")
+        scorable = [(result[0], job[2]) for job, result in zip(video_jobs, extracted) if not isinstance(result, BaseException)]
+        scored = iter(await run_in_threadpool(score_phase_features, scorable))
         
-        is_broke = score < 9
+        responses = []
+        for (filename, _, _), result in zip(video_jobs, extracted):
+            if isinstance(result, BaseException):
+                detail = result.detail if isinstance(result, HTTPException) else str(result)
+                responses.append({"filename": filename, "error": f"Error processing video: {detail}"})
+                continue
+            response = build_shot_response(next(scored))
+            response["filename"] = filename
+            if result[1]["adjustments"]:
+                response["admission"] = admission_summary(result[1])
+            responses.append(response)
         
-        if is_broke:
-            feedback = f"Shot is BROKE. Score: {score}/9. "
-            if len(broke_phases) == 3:
-                feedback += "All phases need improvement."
-            else:
-                feedback += f"Improve: {', '.join(broke_phases)}."
-        else:
-            feedback = f"Shot is BUTTER! Score: {score}/9. Good form!"
+        return JSONResponse({
+            "results": responses,
+            "session": summarize_session(responses),
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing videos: {str(e)}")
+    
+    finally:
+        #Remove temporary files and directories
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+
+        #Clear remaining references and hand the decoded frames back to the pool
+        contents = None
+        extracted = None
+        release_frame_leases(frame_leases)
+        
+        #If using CUDA, clear cache
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+#Finds every shot attempt in a practice-session video (blocking, run in a threadpool)
+#on_segment: called with each segment as soon as the scan has found it
+def segment_session(video_path: str, on_segment=None) -> list:
+    try:
+        pose_classifier = classifier_pool.checkout(timeout=POSE_POOL_TIMEOUT)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
+    
+    try:
+        segments = []
+        for segment in ShotSegmenter(classifier=pose_classifier).iter_segments(video_path):
+            segments.append(segment)
+            if on_segment is not None:
+                on_segment(segment)
+            if len(segments) >= MAX_SESSION_SHOTS:
+                print(f"Warning: session capped at {MAX_SESSION_SHOTS} shots")
+                break
+        return segments
+    finally:
+        classifier_pool.checkin(pose_classifier)
+
+
+#Estimated seconds of work for a session: the segmentation scan over duration_s plus a full analysis
+#of each (start_s, end_s) shot window. Unknown metadata is charged as unbounded
+def session_cost_s(meta: dict, duration_s: float, windows: list) -> float:
+    if not meta or not meta["fps"] or not duration_s:
+        return float("inf")
+    policy = dict(DEFAULT_ADMISSION_POLICY, **ADMISSION_POLICY)
+    fps, width, height = meta["fps"], meta["width"], meta["height"]
+    analysis_fps = min(fps, TARGET_ANALYSIS_FPS) if TARGET_ANALYSIS_FPS else fps
+    cost = estimate_cost_s(duration_s, fps, min(fps, DEFAULT_SEGMENT_CONFIG["scan_fps"]), width, height, policy)
+    return cost + sum(estimate_cost_s(end - start, fps, analysis_fps, width, height, policy) for start, end in windows)
+
+
+#Analyzes a long session video: shots are segmented in one streaming pass, each shot window is
+#analyzed on its own as soon as it is found (in parallel, bounded by the classifier pool) and all
+#are scored in one batch
+@app.post("/analyze/session")
+@limiter.limit(worker_limit("2/minute"))
+async def analyze_session_video(request: Request, file: UploadFile = File(...)):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    if classifier_pool is None:
+        raise HTTPException(status_code=500, detail="Pose classifier not loaded")
+    
+    if not file.filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
+        raise HTTPException(status_code=400, detail="Invalid video format. Supported: mp4, mov, avi, mkv")
+    
+    temp_dir = tempfile.mkdtemp()
+    temp_video_path = os.path.join(temp_dir, Path(file.filename).name)
+    frame_leases = []
+    
+    try:
+        #Session videos are large, stream the upload to disk instead of reading it into memory
+        size = 0
+        with open(temp_video_path, "wb") as f:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > MAX_SESSION_VIDEO_MB * 1024 * 1024:
+                    raise HTTPException(status_code=413, detail=f"Video file size exceeds the maximum limit of {MAX_SESSION_VIDEO_MB} MB")
+                f.write(chunk)
+        
+        #Charged up front as if the whole video were one shot, settled once the shot windows are known
+        client = get_remote_address(request)
+        meta = await run_in_threadpool(probe_video, temp_video_path)
+        duration_s = meta["duration_s"] if meta else 0.0
+        charged = charge_compute(client, session_cost_s(meta, duration_s, [(0.0, duration_s)]))
+        #Each shot is queued for analysis as soon as the scan finds it, so extraction overlaps segmentation
+        loop = asyncio.get_running_loop()
+        shot_jobs = {}  # shot -> (segment, results_dir, task)
+        
+        def start_shot(segment):
+            if segment["shot"] in shot_jobs:
+                return
+            results_dir = Path(temp_dir) / f"shot_{segment['shot']}"
+            results_dir.mkdir()
+            lease = new_frame_lease()
+            frame_leases.append(lease)
+            task = asyncio.ensure_future(run_queued(extract_phase_features, temp_video_path, results_dir,
+                                                    segment["start_s"], segment["end_s"], lease,
+                                                    pool_timeout=QUEUED_POOL_TIMEOUT))
+            shot_jobs[segment["shot"]] = (segment, results_dir, task)
+        
+        #The scan holds a classifier throughout; with no spare one, shots queued now would only sit out their pool wait
+        on_segment = None
+        if classifier_pool is not None and classifier_pool.size > 1:
+            on_segment = lambda segment: loop.call_soon_threadsafe(start_shot, segment)
+        try:
+            segments = await run_in_threadpool(segment_session, temp_video_path, on_segment)
+        except BaseException as e:
+            #Shots already started keep their threads busy; let them finish before the files go away
+            await asyncio.gather(*[task for _, _, task in shot_jobs.values()], return_exceptions=True)
+            if isinstance(e, HTTPException):
+                refund_compute(client, charged)
+            raise
+        used = session_cost_s(meta, duration_s, [(segment["start_s"], segment["end_s"]) for segment in segments])
+        refund_compute(client, charged - min(charged, used))
+        
+        #Segments whose callback hadn't run yet when the scan returned
+        for segment in segments:
+            start_shot(segment)
+        jobs = [shot_jobs[segment["shot"]] for segment in segments]
+        extracted = await asyncio.gather(*[task for _, _, task in jobs], return_exceptions=True)
+        
+        scorable = [(features, job[1]) for job, features in zip(jobs, extracted) if not isinstance(features, BaseException)]
+        scored = iter(await run_in_threadpool(score_phase_features, scorable))
+        
+        responses = []
+        for (segment, _, _), features in zip(jobs, extracted):
+            window = {"start_s": segment["start_s"], "end_s": segment["end_s"]}
+            if isinstance(features, BaseException):
+                detail = features.detail if isinstance(features, HTTPException) else str(features)
+                responses.append({"shot": segment["shot"], "window": window, "error": f"Error processing shot: {detail}"})
+                continue
+            response = build_shot_response(next(scored))
+            response["shot"] = segment["shot"]
+            response["window"] = window
+            responses.append(response)
         
         return JSONResponse({
-            "score": score,
-            "is_broke": is_broke,
-            "max_score": 9,
-            "phases": results,
-            "message": feedback,
+            "filename": file.filename,
+            "shots": responses,
+            "session": summarize_session(responses, item="shot", label_key="shot"),
             "timestamp": datetime.now().isoformat()
         })
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing video: {str(e)}")
     
@@ -375,18 +1183,304 @@ async def analyze_video(request: Request, file: UploadFile = File(...)):
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
 
-        #Clear remaining references
-        best_frames = None
-        results = None
-        
-        #Force garbage collection
-        gc.collect()
+        #Clear remaining references and hand the decoded frames back to the pool
+        extracted = None
+        release_frame_leases(frame_leases)
         
         #If using CUDA, clear cache
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
 
 
+#Analyzes a fully received upload once and caches the response on the upload, so a finalize retried
+#after a dropped connection returns the same result without re-running analysis (blocking, run in a threadpool)
+def finalize_upload(upload_id: str, start_s: float = None, end_s: float = None, client: str = None) -> dict:
+    with upload_store.finalizing(upload_id) as (video_path, cached):
+        if cached is not None:
+            return cached
+        results_dir = Path(tempfile.mkdtemp())
+        try:
+            response = run_analysis(video_path, results_dir, start_s, end_s, client)
+        finally:
+            shutil.rmtree(results_dir, ignore_errors=True)
+        if start_s is not None or end_s is not None:
+            response["window"] = {"start_s": start_s, "end_s": end_s}
+        response["upload_id"] = upload_id
+        upload_store.set_result(upload_id, response)
+        return response
+
+
+#Resumable upload, step 1: declare the file; returns an upload_id that stays valid while chunks keep arriving
+@app.post("/uploads")
+@limiter.limit(worker_limit("10/minute"))
+async def create_upload(request: Request, filename: str = Form(...), size: int = Form(...),
+                        sha256: Optional[str] = Form(None)):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if not filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
+        raise HTTPException(status_code=400, detail="Invalid video format. Supported: mp4, mov, avi, mkv")
+    
+    try:
+        status = await run_in_threadpool(upload_store.create, filename, size, sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    status["max_chunk_bytes"] = upload_store.max_chunk_bytes
+    return JSONResponse(status, status_code=201)
+
+
+#Step 2: PUT raw bytes at ?offset=N, in any order; resending a chunk is harmless
+#Chunks are exempt from the request rate limit, the upload itself was already counted
+@app.put("/uploads/{upload_id}")
+@limiter.exempt
+async def upload_chunk(request: Request, upload_id: str, offset: int):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    #Refuse oversized chunks before reading them
+    if int(request.headers.get("content-length") or 0) > upload_store.max_chunk_bytes:
+        raise HTTPException(status_code=413, detail=f"Chunk exceeds the maximum of {UPLOAD_MAX_CHUNK_MB} MB")
+    
+    data = await request.body()
+    try:
+        return await run_in_threadpool(upload_store.write_chunk, upload_id, offset, data)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+
+
+#Received bytes and the ranges still missing, so a client that lost its connection knows where to resume
+@app.get("/uploads/{upload_id}")
+@limiter.exempt
+async def get_upload(request: Request, upload_id: str):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    try:
+        return await run_in_threadpool(upload_store.get, upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+
+
+#Step 3: analyze the assembled video, same response as /analyze
+@app.post("/uploads/{upload_id}/finalize")
+@limiter.limit(worker_limit("5/minute"))
+async def finalize(request: Request, upload_id: str,
+                   start_s: Optional[float] = Form(None), end_s: Optional[float] = Form(None)):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if start_s is not None and start_s < 0:
+        raise HTTPException(status_code=400, detail="start_s must be >= 0")
+    if end_s is not None and end_s <= (start_s or 0.0):
+        raise HTTPException(status_code=400, detail="end_s must be greater than start_s")
+    
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    if classifier_pool is None:
+        raise HTTPException(status_code=500, detail="Pose classifier not loaded")
+    
+    try:
+        response = await run_in_threadpool(finalize_upload, upload_id, start_s, end_s, get_remote_address(request))
+        return JSONResponse(response)
+    
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing video: {str(e)}")
+    
+    finally:
+        #If using CUDA, clear cache
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+@app.delete("/uploads/{upload_id}")
+@limiter.exempt
+async def delete_upload(request: Request, upload_id: str):
+    
+    if request.headers.get("X-API-KEY") != API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    try:
+        await run_in_threadpool(upload_store.delete, upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    return {"upload_id": upload_id, "deleted": True}
+
+
+#Decodes one streamed frame and advances the live tracker (blocking, run in a threadpool)
+def process_live_frame(tracker: LiveShotTracker, data: bytes, timestamp: float) -> list:
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return [{"type": "error", "detail": "Could not decode frame"}]
+    
+    events = tracker.process(frame, timestamp)
+    for i, event in enumerate(events):
+        if event["type"] != "shot":
+            continue
+        features = event["features"]
+        for feat in features:
+            feat["input_vector"] = build_input_vector(feat["keypoints"], feat["phase_name"])
+        results = score_phase_features([(features, None)])[0]
+        response = build_shot_response(results)
+        response.update({"type": "score", "shot": event["shot"], "t": event["t"]})
+        events[i] = response
+    return events
+
+
+#Live analysis: the client streams encoded frames (JPEG/PNG, one per binary message) while recording
+#and gets phase, candidate and score events back as they happen. Text messages {"type": "reset"}
+#start a new attempt and {"type": "stats"} asks for frame counters.
+#When pose inference falls behind, the oldest pending frames are dropped so latency stays bounded.
+@app.websocket("/analyze/live")
+async def analyze_live(websocket: WebSocket):
+    
+    api_key = websocket.headers.get("X-API-KEY") or websocket.query_params.get("api_key")
+    if api_key != API_KEY:
+        await websocket.close(code=1008, reason="Unauthorized")
+        return
+    
+    if model is None or classifier_pool is None:
+        await websocket.close(code=1011, reason="Model not loaded")
+        return
+    
+    await websocket.accept()
+    
+    #A stream holds its classifier as long as queued work would, so it takes an analysis slot too
+    try:
+        await asyncio.wait_for(analysis_slots.acquire(), POSE_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        await websocket.send_json({"type": "error", "detail": "Server busy, try again shortly"})
+        await websocket.close(code=1013)
+        return
+    
+    #One classifier for the whole stream; frames are processed strictly in order
+    try:
+        pose_classifier = await run_in_threadpool(classifier_pool.checkout, POSE_POOL_TIMEOUT)
+    except TimeoutError:
+        analysis_slots.release()
+        await websocket.send_json({"type": "error", "detail": "Server busy, try again shortly"})
+        await websocket.close(code=1013)
+        return
+    
+    tracker = LiveShotTracker(pose_classifier)
+    client = get_remote_address(websocket)
+    pending = asyncio.Queue(maxsize=max(1, LIVE_MAX_PENDING_FRAMES))
+    stats = {"received": 0, "processed": 0, "dropped": 0}
+    start = time.monotonic()
+    deadline = start + LIVE_MAX_SESSION_S if LIVE_MAX_SESSION_S > 0 else None
+    inflight = None  # current threadpool call; must finish before the classifier goes back to the pool
+    
+    async def send_stats():
+        await websocket.send_json({"type": "stats", **stats, "pending": pending.qsize()})
+    
+    async def process_frames():
+        nonlocal inflight
+        while True:
+            data, timestamp, received_at = await pending.get()
+            #Each processed frame is charged like a frame of an uploaded video; dropped frames are free
+            charge_compute(client, ADMISSION_POLICY["pose_ms_per_frame"] / 1000)
+            inflight = asyncio.ensure_future(run_in_threadpool(process_live_frame, tracker, data, timestamp))
+            events = await asyncio.shield(inflight)
+            stats["processed"] += 1
+            for event in events:
+                event["latency_ms"] = round((time.monotonic() - received_at) * 1000, 1)
+                await websocket.send_json(event)
+                if event["type"] == "score":
+                    await send_stats()
+    
+    worker = asyncio.create_task(process_frames())
+    try:
+        await websocket.send_json({"type": "ready", "max_pending_frames": pending.maxsize})
+        while True:
+            receive = asyncio.ensure_future(websocket.receive())
+            timeout = LIVE_IDLE_TIMEOUT_S if LIVE_IDLE_TIMEOUT_S > 0 else None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            done, _ = await asyncio.wait({receive, worker}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                #Idle client or stream over its maximum length: hand the classifier back
+                receive.cancel()
+                expired = deadline is not None and time.monotonic() >= deadline
+                await websocket.close(code=1000, reason="Maximum session length reached" if expired else "Idle timeout")
+                break
+            if worker in done:
+                receive.cancel()
+                worker.result()  # re-raises the processing error
+                break
+            message = receive.result()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                data = message["bytes"]
+                stats["received"] += 1
+                if len(data) > LIVE_MAX_FRAME_KB * 1024:
+                    stats["dropped"] += 1
+                    await websocket.send_json({"type": "error", "detail": f"Frame exceeds {LIVE_MAX_FRAME_KB} KB"})
+                    continue
+                #Backpressure: keep the newest frames, drop the oldest unprocessed one
+                if pending.full():
+                    pending.get_nowait()
+                    stats["dropped"] += 1
+                now = time.monotonic()
+                pending.put_nowait((data, now - start, now))
+            
+            elif message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {}
+                if control.get("type") == "reset":
+                    tracker.request_reset()
+                elif control.get("type") == "stats":
+                    await send_stats()
+                else:
+                    await websocket.send_json({"type": "error", "detail": "Unknown message"})
+    
+    except WebSocketDisconnect:
+        pass
+    
+    except HTTPException as e:
+        #Compute budget exhausted; the client may reconnect once it has refilled
+        retry_after = (e.headers or {}).get("Retry-After", "1")
+        try:
+            await websocket.send_json({"type": "error", "detail": e.detail, "retry_after": int(retry_after)})
+            await websocket.close(code=1013, reason=f"Compute budget exceeded, Retry-After: {retry_after}s")
+        except Exception:
+            pass
+    
+    except Exception as e:
+        print(f"Error in live analysis: {e}")
+        try:
+            await websocket.send_json({"type": "error", "detail": f"Error processing stream: {str(e)}"})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    
+    finally:
+        worker.cancel()
+        for task in (worker, inflight):
+            if task is None:
+                continue
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        classifier_pool.checkin(pose_classifier)
+        analysis_slots.release()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,338 @@
+#Calibrates the frame-selection weights in VideoProcessor against a labeled video corpus
+#
+#Step 1, cache per-frame metrics once (slow, runs pose on every frame):
+#   python calibrate_scoring.py cache <video_dir> <cache_dir>
+#Step 2, search weight configurations against ground-truth frames (fast, no video decoding):
+#   python calibrate_scoring.py search <cache_dir> <labels.json> --mode random --samples 5000
+#   python calibrate_scoring.py search <cache_dir> <labels.json> --mode grid --grid grid.json
+#
+#labels.json maps video file stems to ground-truth frame indices, any subset of phases:
+#   {"clip_01": {"pocket": 41, "set": 55, "ft": 63}, ...}
+#grid.json maps parameter names to values to try ({"set_weight": [30, 50, 70], ...}); in random
+#mode it may instead give [low, high] ranges to sample from.
+#The best configuration is written as JSON for VideoProcessor(scoring_config=...) or SCORING_CONFIG_PATH.
+import os
+import json
+import time
+import argparse
+import itertools
+import tempfile
+import numpy as np
+from pathlib import Path
+from video_processor import VideoProcessor, DEFAULT_SCORING_CONFIG, REFERENCE_FPS, CANDIDATE_NMS_S, load_scoring_config
+
+PHASES = ("pocket", "set", "ft")
+FIELDS = ("frame_idx", "timestamp", "conf", "wrist_y_norm", "vel_y", "pose_delta", "wrist_x_offset")
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+INT_PARAMS = {"close_frames"}
+CHUNK_SIZE = 1024  # configurations scored per vectorized pass
+
+
+# Stage 1: cache phase candidates (per-frame metrics bucketed by phase)
+def cache_video(video_path, cache_dir, classifier=None, sample_rate=1, target_fps=None, nms_window_s=CANDIDATE_NMS_S):
+    with tempfile.TemporaryDirectory() as tmp:
+        vp = VideoProcessor(str(video_path), tmp, classifier=classifier, nms_window_s=nms_window_s)
+        vp.extract_frames(sample_rate=sample_rate, target_fps=target_fps)
+        pockets, sets, fts = vp._collect_phase_candidates()
+        classifier = vp.classifier
+
+    arrays = {"fps": np.float64(vp.fps)}
+    for phase, cands in zip(PHASES, (pockets, sets, fts)):
+        # candidates are already sorted best-first by smoothed confidence, near-duplicates suppressed
+        for field in FIELDS:
+            arrays[f"{phase}_{field}"] = np.array(
+                [np.nan if c[field] is None else c[field] for c in cands], dtype=np.float64
+            )
+    out_path = Path(cache_dir) / f"{Path(video_path).stem}.npz"
+    np.savez_compressed(out_path, **arrays)
+    print(f"[cache] {Path(video_path).name}: {len(pockets)}/{len(sets)}/{len(fts)} candidates -> {out_path}")
+    return classifier
+
+
+def cache_corpus(video_dir, cache_dir, sample_rate=1, target_fps=None, nms_window_s=CANDIDATE_NMS_S):
+    os.makedirs(cache_dir, exist_ok=True)
+    video_files = sorted(f for f in os.listdir(video_dir) if f.lower().endswith(VIDEO_EXTENSIONS))
+    print(f"Found {len(video_files)} videos to cache")
+    classifier = None
+    for i, video_file in enumerate(video_files, 1):
+        print(f"\nCaching video {i}/{len(video_files)}: {video_file}")
+        try:
+            classifier = cache_video(Path(video_dir) / video_file, cache_dir, classifier, sample_rate, target_fps, nms_window_s)
+        except Exception as e:
+            print(f"Error caching {video_file}: {str(e)}")
+
+
+def load_corpus(cache_dir, labels, max_candidates=8):
+    corpus = []
+    for stem, truth in labels.items():
+        path = Path(cache_dir) / f"{stem}.npz"
+        if not path.exists():
+            print(f"[search] No cache for labeled video {stem}, skipping")
+            continue
+        data = np.load(path)
+        video = {"name": stem, "fps": float(data["fps"]), "truth": truth}
+        for phase in PHASES:
+            video[phase] = {field: data[f"{phase}_{field}"][:max_candidates] for field in FIELDS}
+        corpus.append(video)
+    return corpus
+
+
+# Stage 2: vectorized sequence selection
+# Every parameter is a (C, 1) column so candidate arrays (K,) broadcast to (C, K).
+def _candidate_scores(P, cand, phase):
+    conf, wy, vel = cand["conf"], cand["wrist_y_norm"], cand["vel_y"]
+    pd, xoff = cand["pose_delta"], cand["wrist_x_offset"]
+    score = P["conf_weight"] * conf
+    if phase == "pocket":
+        score = score + np.maximum(0, P["pocket_tol"] - np.abs(wy - P["pocket_ideal"])) * P["pocket_weight"]
+        score = score + np.maximum(0, -vel) * P["pocket_upward_weight"]
+    elif phase == "set":
+        score = score + np.maximum(0, P["set_tol"] - np.abs(wy - P["set_ideal"])) * P["set_weight"]
+        score = score + np.maximum(0, P["set_pause_vel"] - np.abs(vel)) * P["set_pause_weight"]
+        score = score + np.maximum(0, P["set_stable_delta"] - pd) * P["set_stable_weight"]
+        score = score + np.maximum(0, P["set_center_xoff"] - xoff) * P["set_center_weight"]
+    else:
+        score = score + np.maximum(0, P["ft_tol"] - np.abs(wy - P["ft_ideal"])) * P["ft_weight"]
+        score = score + np.maximum(0, P["ft_hold_vel"] - np.abs(vel)) * P["ft_hold_weight"]
+        score = score + xoff * P["ft_xoff_weight"]
+        score = score + np.maximum(0, P["ft_stable_delta"] - pd) * P["ft_stable_weight"]
+    score = score - np.minimum(pd * P["noise_penalty_weight"], P["noise_penalty_cap"])
+    return score
+
+
+def _pair_scores(a_scores, b_scores, a, b):
+    # (C, Ka, Kb) base scores and the chronological validity mask
+    total = a_scores[:, :, None] + b_scores[:, None, :]
+    valid = b["frame_idx"][None, :] > a["frame_idx"][:, None]
+    return total, valid
+
+
+def select_frames(P, video):
+    """
+    Mirror of VideoProcessor.find_best_sequence for C configurations at once.
+    Returns {phase: (C,) selected frame_idx, -1 where that phase was not selected}.
+    """
+    C = P["conf_weight"].shape[0]
+    p, s, f = video["pocket"], video["set"], video["ft"]
+    kp, ks, kf = len(p["conf"]), len(s["conf"]), len(f["conf"])
+    selected = {phase: np.full(C, -1, dtype=np.int64) for phase in PHASES}
+    rows = np.arange(C)
+
+    sp = _candidate_scores(P, p, "pocket")
+    ss = _candidate_scores(P, s, "set")
+    sf = _candidate_scores(P, f, "ft")
+
+    # Full triplets. Chronological validity doesn't depend on the weights, so only valid
+    # (pocket, set, ft) index triples are scored, shape (C, N); np.nonzero keeps the nested-loop order
+    use_triplet = np.zeros(C, dtype=bool)
+    if kp and ks and kf:
+        ip, is_, if_ = np.nonzero(
+            (s["frame_idx"][None, :, None] > p["frame_idx"][:, None, None])
+            & (f["frame_idx"][None, None, :] > s["frame_idx"][None, :, None])
+        )
+    if kp and ks and kf and len(ip):
+        total = sp[:, ip] + ss[:, is_] + sf[:, if_]
+
+        gap_ps = s["timestamp"][is_] - p["timestamp"][ip]
+        gap_sf = f["timestamp"][if_] - s["timestamp"][is_]
+        total += ((P["min_gap_s"] < gap_ps) & (gap_ps < P["max_gap_s"])) * P["chrono_bonus_ps"]
+        total += ((P["min_gap_s"] < gap_sf) & (gap_sf < P["max_gap_s"])) * P["chrono_bonus_sf"]
+
+        # NaN heights compare False, like the None checks in find_best_sequence
+        total += (s["wrist_y_norm"][is_] < p["wrist_y_norm"][ip]) * P["height_bonus_ps"]
+        total += (f["wrist_y_norm"][if_] < s["wrist_y_norm"][is_]) * P["height_bonus_sf"]
+
+        set_pause = (np.abs(s["vel_y"]) < P["set_pause_bonus_vel"]) & (s["pose_delta"] < P["set_pause_bonus_delta"])
+        ft_hold = np.abs(f["vel_y"]) < P["ft_hold_bonus_vel"]
+        total += set_pause[:, is_] * P["set_pause_bonus"]
+        total += ft_hold[:, if_] * P["ft_hold_bonus"]
+
+        ref_frames_per_frame = REFERENCE_FPS / video["fps"]
+        total -= ((s["frame_idx"][is_] - p["frame_idx"][ip]) * ref_frames_per_frame < P["close_frames"]) * P["close_frames_penalty"]
+        total -= ((f["frame_idx"][if_] - s["frame_idx"][is_]) * ref_frames_per_frame < P["close_frames"]) * P["close_frames_penalty"]
+
+        # argmax keeps the first maximum, same tie-break as the nested loops
+        best = total.argmax(axis=1)
+        best_score = total[rows, best]
+        use_triplet = best_score > P["triplet_min_score"][:, 0]
+        selected["pocket"] = np.where(use_triplet, p["frame_idx"][ip[best]], -1).astype(np.int64)
+        selected["set"] = np.where(use_triplet, s["frame_idx"][is_[best]], -1).astype(np.int64)
+        selected["ft"] = np.where(use_triplet, f["frame_idx"][if_[best]], -1).astype(np.int64)
+
+    if use_triplet.all():
+        return selected
+
+    # Pair fallbacks, in find_best_sequence's order: pocket+set, set+ft, pocket+ft
+    blocks = []
+    if kp and ks:
+        total, valid = _pair_scores(sp, ss, p, s)
+        total = total + (s["wrist_y_norm"][None, :] < p["wrist_y_norm"][:, None])[None] * P["pair_ps_height_bonus"][:, :, None]
+        total = total + (np.abs(s["vel_y"]) < P["pair_ps_pause_vel"])[:, None, :] * P["pair_ps_pause_bonus"][:, :, None]
+        blocks.append(("pocket", "set", p, s, np.where(valid[None], total, -np.inf)))
+    if ks and kf:
+        total, valid = _pair_scores(ss, sf, s, f)
+        total = total + (f["wrist_y_norm"][None, :] < s["wrist_y_norm"][:, None])[None] * P["pair_sf_height_bonus"][:, :, None]
+        total = total + (np.abs(f["vel_y"]) < P["pair_sf_hold_vel"])[:, None, :] * P["pair_sf_hold_bonus"][:, :, None]
+        blocks.append(("set", "ft", s, f, np.where(valid[None], total, -np.inf)))
+    if kp and kf:
+        total, valid = _pair_scores(sp, sf, p, f)
+        total = total + (f["wrist_y_norm"][None, :] < p["wrist_y_norm"][:, None])[None] * P["pair_pf_height_bonus"][:, :, None]
+        blocks.append(("pocket", "ft", p, f, np.where(valid[None], total, -np.inf)))
+
+    if blocks:
+        flat = np.concatenate([b[4].reshape(C, -1) for b in blocks], axis=1)
+        best = flat.argmax(axis=1)
+        best_score = flat[rows, best]
+        use_pair = ~use_triplet & (best_score > P["pair_min_score"][:, 0])
+        offset = 0
+        for first, second, a, b, block in blocks:
+            ka, kb = block.shape[1:]
+            in_block = use_pair & (best >= offset) & (best < offset + ka * kb)
+            ia, ib = np.unravel_index(np.clip(best - offset, 0, ka * kb - 1), (ka, kb))
+            selected[first] = np.where(in_block, a["frame_idx"][ia], selected[first]).astype(np.int64)
+            selected[second] = np.where(in_block, b["frame_idx"][ib], selected[second]).astype(np.int64)
+            offset += ka * kb
+
+    # The single-frame fallback carries no phase label, so it never matches ground truth
+    return selected
+
+
+def evaluate(configs, corpus, tolerance_s=0.1):
+    """
+    configs: dict of param -> (C,) array. Returns (C,) overall accuracy and {phase: (C,) accuracy}.
+    A phase counts as correct when the selected frame is within tolerance_s of the labeled frame.
+    """
+    C = len(next(iter(configs.values())))
+    hits = {phase: np.zeros(C) for phase in PHASES}
+    totals = {phase: 0 for phase in PHASES}
+    for start in range(0, C, CHUNK_SIZE):
+        P = {k: np.asarray(v[start:start + CHUNK_SIZE], dtype=np.float64)[:, None] for k, v in configs.items()}
+        for video in corpus:
+            selected = select_frames(P, video)
+            tol_frames = tolerance_s * video["fps"]
+            for phase in PHASES:
+                if phase not in video["truth"]:
+                    continue
+                pred = selected[phase]
+                hits[phase][start:start + CHUNK_SIZE] += (pred >= 0) & (np.abs(pred - video["truth"][phase]) <= tol_frames)
+    for video in corpus:
+        for phase in PHASES:
+            totals[phase] += phase in video["truth"]
+    labeled = sum(totals.values())
+    overall = sum(hits.values()) / max(1, labeled)
+    per_phase = {phase: hits[phase] / totals[phase] for phase in PHASES if totals[phase]}
+    return overall, per_phase
+
+
+# Configuration generation (row 0 is always the current default)
+def grid_configs(grid):
+    keys = list(grid)
+    combos = list(itertools.product(*(grid[k] for k in keys)))
+    configs = {k: np.full(len(combos) + 1, float(v)) for k, v in DEFAULT_SCORING_CONFIG.items()}
+    for i, combo in enumerate(combos, 1):
+        for k, v in zip(keys, combo):
+            configs[k][i] = v
+    return configs
+
+
+def random_configs(samples, ranges=None, spread=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    configs = {}
+    for k, default in DEFAULT_SCORING_CONFIG.items():
+        if ranges is not None:
+            low, high = ranges.get(k, (default, default))
+        else:
+            low, high = sorted((default * (1 - spread), default * (1 + spread)))
+        values = rng.uniform(low, high, samples)
+        if k in INT_PARAMS:
+            values = np.round(values)
+        configs[k] = np.concatenate([[float(default)], values])
+    return configs
+
+
+def config_row(configs, i):
+    row = {k: float(v[i]) for k, v in configs.items()}
+    for k in INT_PARAMS:
+        row[k] = int(round(row[k]))
+    return load_scoring_config(row)
+
+
+def search(cache_dir, labels_path, mode="random", samples=2000, grid_path=None, spread=0.5,
+           tolerance_s=0.1, max_candidates=8, out_path="best_scoring.json", seed=0):
+    with open(labels_path) as f:
+        labels = json.load(f)
+    corpus = load_corpus(cache_dir, labels, max_candidates)
+    if not corpus:
+        print("[search] No labeled videos with cached metrics")
+        return None
+
+    grid = None
+    if grid_path:
+        with open(grid_path) as f:
+            grid = json.load(f)
+        unknown = [k for k in grid if k not in DEFAULT_SCORING_CONFIG]
+        if unknown:
+            raise ValueError(f"Unknown scoring parameters: {unknown}")
+    if mode == "grid":
+        if grid is None:
+            raise ValueError("Grid mode needs --grid")
+        configs = grid_configs(grid)
+    else:
+        configs = random_configs(samples, grid, spread, seed)
+
+    num_configs = len(configs["conf_weight"])
+    print(f"[search] Scoring {num_configs} configurations over {len(corpus)} videos...")
+    start = time.perf_counter()
+    overall, per_phase = evaluate(configs, corpus, tolerance_s)
+    elapsed = time.perf_counter() - start
+    print(f"[search] Done in {elapsed:.2f}s ({num_configs / max(elapsed, 1e-9):.0f} configs/s)")
+
+    # stable sort keeps the default (row 0) ahead of ties
+    order = np.argsort(-overall, kind="stable")
+    print(f"\nDefault config accuracy: {overall[0] * 100:.1f}%")
+    print("Top configurations:")
+    for rank, i in enumerate(order[:5], 1):
+        phases = ", ".join(f"{ph}: {acc[i] * 100:.1f}%" for ph, acc in per_phase.items())
+        print(f"  {rank}. #{i} accuracy {overall[i] * 100:.1f}% ({phases})")
+
+    best = config_row(configs, order[0])
+    with open(out_path, "w") as f:
+        json.dump(best, f, indent=2)
+    print(f"\nWrote best configuration to {out_path}")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate VideoProcessor frame-selection weights")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cache_parser = sub.add_parser("cache", help="Run pose once per video and cache phase candidates")
+    cache_parser.add_argument("video_dir")
+    cache_parser.add_argument("cache_dir")
+    cache_parser.add_argument("--sample-rate", type=int, default=1)
+    cache_parser.add_argument("--target-fps", type=float, default=None, help="stride high-fps videos down to this rate")
+    cache_parser.add_argument("--nms-window-s", type=float, default=CANDIDATE_NMS_S,
+                              help="temporal NMS window for candidates (match the backend's CANDIDATE_NMS_S, 0 disables)")
+
+    search_parser = sub.add_parser("search", help="Score weight configurations against labeled frames")
+    search_parser.add_argument("cache_dir")
+    search_parser.add_argument("labels")
+    search_parser.add_argument("--mode", choices=["random", "grid"], default="random")
+    search_parser.add_argument("--samples", type=int, default=2000, help="random mode: configurations to sample")
+    search_parser.add_argument("--grid", help="JSON of param -> values (grid) or param -> [low, high] (random)")
+    search_parser.add_argument("--spread", type=float, default=0.5, help="random mode without --grid: +/- fraction around defaults")
+    search_parser.add_argument("--tolerance-s", type=float, default=0.1, help="max distance from the labeled frame, in seconds")
+    search_parser.add_argument("--max-candidates", type=int, default=8)
+    search_parser.add_argument("--seed", type=int, default=0)
+    search_parser.add_argument("--out", default="best_scoring.json")
+
+    args = parser.parse_args()
+    if args.command == "cache":
+        cache_corpus(args.video_dir, args.cache_dir, args.sample_rate, args.target_fps, args.nms_window_s)
+    else:
+        search(args.cache_dir, args.labels, args.mode, args.samples, args.grid, args.spread,
+               args.tolerance_s, args.max_candidates, args.out, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#Compares cascade mode (lite pose scan + heavy re-runs on candidate windows) against heavy-only mode
+#on a folder of clips: heavy inferences avoided, wall time, and whether both pick the same frames.
+#
+#Usage: python cascade_check.py <video_dir> [--top-k 8] [--radius 1] [--tolerance-s 0.1] [--out cascade_check.json]
+import os
+import json
+import time
+import argparse
+import tempfile
+from pose_classifier import PoseClassifier
+from shot_segmenter import sequence_summary
+from video_processor import VideoProcessor, REFERENCE_FPS
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+
+
+def run_mode(video_path, output_dir, heavy, lite=None, target_fps=REFERENCE_FPS, **cascade_kwargs):
+    start = time.perf_counter()
+    vp = VideoProcessor(video_path, output_dir, classifier=heavy, lite_classifier=lite, **cascade_kwargs)
+    vp.extract_frames(target_fps=target_fps)
+    summary = sequence_summary(vp.find_best_sequence())
+    seconds = time.perf_counter() - start
+    stats = vp.cascade_stats or {"frames": len(vp.frames), "heavy_inferences": len(vp.frames), "heavy_avoided": 0}
+    vp.frames = []
+    return summary, dict(stats, seconds=round(seconds, 3))
+
+
+def compare_sequences(heavy_seq, cascade_seq, tolerance_s):
+    #Per selected label: same frame, or within tolerance_s of it
+    if heavy_seq is None or cascade_seq is None:
+        return {"same_kind": heavy_seq is None and cascade_seq is None, "labels": {}}
+    labels = {}
+    for label, ref in heavy_seq["frames"].items():
+        cand = cascade_seq["frames"].get(label)
+        labels[label] = {
+            "heavy_frame": ref["frame_idx"],
+            "cascade_frame": cand["frame_idx"] if cand else None,
+            "exact": bool(cand) and cand["frame_idx"] == ref["frame_idx"],
+            "within_tolerance": bool(cand) and abs(cand["timestamp"] - ref["timestamp"]) <= tolerance_s,
+        }
+    return {"same_kind": heavy_seq["kind"] == cascade_seq["kind"], "labels": labels}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cascade pose mode against heavy-only mode")
+    parser.add_argument("video_dir")
+    parser.add_argument("--top-k", type=int, default=8, help="lite candidates per phase re-run with the heavy model")
+    parser.add_argument("--radius", type=int, default=1, help="neighbouring frames re-run around each candidate")
+    parser.add_argument("--tolerance-s", type=float, default=0.1)
+    parser.add_argument("--target-fps", type=float, default=REFERENCE_FPS, help="analysis rate (0 = every frame)")
+    parser.add_argument("--out", default="cascade_check.json")
+    args = parser.parse_args()
+
+    heavy = PoseClassifier(model_complexity=2)
+    lite = PoseClassifier(model_complexity=0)
+    videos = sorted(f for f in os.listdir(args.video_dir) if f.lower().endswith(VIDEO_EXTENSIONS))
+    rows = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name in videos:
+            path = os.path.join(args.video_dir, name)
+            heavy_seq, heavy_stats = run_mode(path, output_dir, heavy, target_fps=args.target_fps or None)
+            cascade_seq, cascade_stats = run_mode(path, output_dir, heavy, lite, target_fps=args.target_fps or None,
+                                                  cascade_top_k=args.top_k, cascade_radius=args.radius)
+            row = {
+                "video": name,
+                "heavy_only": heavy_stats,
+                "cascade": cascade_stats,
+                "agreement": compare_sequences(heavy_seq, cascade_seq, args.tolerance_s),
+            }
+            rows.append(row)
+            labels = row["agreement"]["labels"].values()
+            print(f"[cascade_check] {name}: {cascade_stats['heavy_avoided']}/{cascade_stats['frames']} heavy inferences avoided, "
+                  f"{heavy_stats['seconds']:.2f}s -> {cascade_stats['seconds']:.2f}s, "
+                  f"{sum(l['exact'] for l in labels)}/{len(labels)} frames identical")
+
+    labels = [l for r in rows for l in r["agreement"]["labels"].values()]
+    summary = {
+        "videos": len(rows),
+        "frames": sum(r["cascade"]["frames"] for r in rows),
+        "heavy_avoided": sum(r["cascade"]["heavy_avoided"] for r in rows),
+        "heavy_seconds": round(sum(r["heavy_only"]["seconds"] for r in rows), 2),
+        "cascade_seconds": round(sum(r["cascade"]["seconds"] for r in rows), 2),
+        "same_kind_rate": round(sum(r["agreement"]["same_kind"] for r in rows) / max(1, len(rows)), 3),
+        "exact_frame_rate": round(sum(l["exact"] for l in labels) / max(1, len(labels)), 3),
+        "within_tolerance_rate": round(sum(l["within_tolerance"] for l in labels) / max(1, len(labels)), 3),
+    }
+    summary["heavy_avoided_rate"] = round(summary["heavy_avoided"] / max(1, summary["frames"]), 3)
+    with open(args.out, "w") as f:
+        json.dump({"config": vars(args), "summary": summary, "videos": rows}, f, indent=2)
+    print(f"[cascade_check] {json.dumps(summary)}")
+    print(f"[cascade_check] Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
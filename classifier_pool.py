@@ -0,0 +1,73 @@
+# classifier_pool.py
+#Pool of pre-built PoseClassifier instances. A MediaPipe Pose graph is not safe to share between
+#concurrent calls, so each request checks one out for its whole run and checks it back in.
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pose_classifier import PoseClassifier
+
+
+class PoseClassifierPool:
+    def __init__(self, size=1, factory=PoseClassifier):
+        self.size = max(1, size)
+        self._available = queue.Queue()
+        self._lock = threading.Lock()
+        # wait metrics
+        self.checkouts = 0
+        self.waited_checkouts = 0  # checkouts that found the pool empty
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.timeouts = 0
+
+        # build every graph up front so requests never pay for construction
+        for _ in range(self.size):
+            self._available.put(factory())
+        print(f"[PoseClassifierPool] Built {self.size} classifiers")
+
+    def checkout(self, timeout=None):
+        """
+        Take a classifier from the pool, blocking until one is free.
+        Raises TimeoutError if none becomes free within `timeout` seconds.
+        """
+        start = time.perf_counter()
+        try:
+            classifier = self._available.get_nowait()
+        except queue.Empty:
+            try:
+                classifier = self._available.get(timeout=timeout)
+            except queue.Empty:
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"No PoseClassifier available after {timeout}s")
+            waited = time.perf_counter() - start
+            with self._lock:
+                self.waited_checkouts += 1
+                self.total_wait_s += waited
+                self.max_wait_s = max(self.max_wait_s, waited)
+        with self._lock:
+            self.checkouts += 1
+        return classifier
+
+    def checkin(self, classifier):
+        self._available.put(classifier)
+
+    @contextmanager
+    def classifier(self, timeout=None):
+        classifier = self.checkout(timeout=timeout)
+        try:
+            yield classifier
+        finally:
+            self.checkin(classifier)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "available": self._available.qsize(),
+                "checkouts": self.checkouts,
+                "waited_checkouts": self.waited_checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": 1000.0 * self.total_wait_s / max(1, self.checkouts),
+                "max_wait_ms": 1000.0 * self.max_wait_s,
+            }
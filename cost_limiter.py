@@ -0,0 +1,110 @@
+# cost_limiter.py
+#Token-bucket rate limiting by compute cost instead of request count. Each client has a bucket of
+#`capacity` compute-seconds refilled at `refill_per_s`; a request is charged its estimated cost
+#(from video_probe's admission plan) before any frame is decoded and refunded whatever it didn't use.
+#Buckets live in process memory or in one local JSON file shared by all workers (flock), no Redis.
+import os
+import json
+import time
+import fcntl
+import threading
+from contextlib import contextmanager
+
+
+class MemoryBucketStore:
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def buckets(self):
+        with self._lock:
+            yield self._buckets
+
+
+class FileBucketStore:
+    #Every worker process reads and rewrites the same small JSON file under an exclusive flock
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()  # flock is per open file, threads of one worker queue here first
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @contextmanager
+    def buckets(self):
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                buckets = json.loads(f.read() or "{}")
+            except ValueError:
+                buckets = {}  # torn or corrupt file: start everyone with a full bucket
+            yield buckets
+            f.seek(0)
+            f.truncate()
+            json.dump(buckets, f)
+
+
+class CostLimiter:
+    def __init__(self, capacity, refill_per_s, store=None):
+        self.capacity = float(capacity)
+        self.refill_per_s = float(refill_per_s)
+        self.store = store or MemoryBucketStore()
+        self._lock = threading.Lock()
+        # metrics (this process only)
+        self.charged = 0
+        self.rejected = 0
+        self.charged_s = 0.0
+        self.refunded_s = 0.0
+
+    def _refill(self, buckets, key, now):
+        tokens, updated = buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_s)
+
+    def charge(self, key, cost):
+        """
+        Takes `cost` compute-seconds from key's bucket. Returns (allowed, retry_after_s, remaining).
+        Costs above capacity are charged as capacity, so the largest admissible request can still
+        run once the bucket is full.
+        """
+        cost = min(float(cost), self.capacity)
+        now = time.time()
+        with self.store.buckets() as buckets:
+            tokens = self._refill(buckets, key, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            buckets[key] = (tokens, now)
+            # full buckets carry no information, dropping them keeps the store small
+            for other in [k for k in buckets if k != key]:
+                if self._refill(buckets, other, now) >= self.capacity:
+                    del buckets[other]
+        with self._lock:
+            if allowed:
+                self.charged += 1
+                self.charged_s += cost
+            else:
+                self.rejected += 1
+        retry_after = 0.0 if allowed else (cost - tokens) / max(self.refill_per_s, 1e-9)
+        return allowed, retry_after, tokens
+
+    def refund(self, key, amount):
+        #Gives back compute-seconds a charged request did not use
+        if amount <= 0:
+            return
+        now = time.time()
+        with self.store.buckets() as buckets:
+            buckets[key] = (min(self.capacity, self._refill(buckets, key, now) + amount), now)
+        with self._lock:
+            self.refunded_s += amount
+
+    def stats(self):
+        with self._lock:
+            return {
+                "capacity_s": self.capacity,
+                "refill_per_s": self.refill_per_s,
+                "store": type(self.store).__name__,
+                "charged": self.charged,
+                "rejected": self.rejected,
+                "charged_s": round(self.charged_s, 1),
+                "refunded_s": round(self.refunded_s, 1),
+            }
@@ -0,0 +1,85 @@
+# cpu_governor.py
+#Splits one CPU budget between worker processes, concurrent analyses per worker and the thread pools
+#of the libraries inside each analysis. Left alone, torch and OpenCV each size their pools to every
+#core of the machine in every worker, so concurrent requests oversubscribe the CPU and tail latency
+#grows. MediaPipe's graph threads can't be sized from Python; capping concurrent analyses (the pose
+#pool) and, optionally, pinning each worker to its own cores bounds them instead.
+import os
+import cv2
+import torch
+
+
+def available_cpus():
+    #CPUs this process may run on: the affinity mask, further limited by a cgroup (container) quota
+    try:
+        cpus = sorted(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        cpus = list(range(os.cpu_count() or 1))
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            limit = max(1, int(int(quota) / int(period)))
+            cpus = cpus[:limit]
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def plan_cpu_layout(cpus, workers=1, worker_index=0, pose_pool_size=0, pin=False):
+    """
+    cpus: CPU ids available to all workers (available_cpus() before forking)
+    pose_pool_size: concurrent analyses per worker; 0 picks one per two cores of the worker's share (1-4)
+    pin: restrict this worker to its own slice of cpus (only when the slices don't overlap)
+    """
+    workers = max(1, workers)
+    per_worker = max(1, len(cpus) // workers)
+    if pose_pool_size <= 0:
+        pose_pool_size = min(4, max(1, per_worker // 2))
+    threads = max(1, per_worker // pose_pool_size)
+
+    affinity = None
+    if pin and len(cpus) >= workers:
+        start = (worker_index % workers) * per_worker
+        affinity = cpus[start:start + per_worker]
+    return {
+        "cpus": len(cpus),
+        "workers": workers,
+        "worker_index": worker_index,
+        "cpus_per_worker": per_worker,
+        "pose_pool_size": pose_pool_size,
+        "threads_per_analysis": threads,
+        "affinity": affinity,
+    }
+
+
+def apply_cpu_layout(layout):
+    #Applies a plan_cpu_layout() result to this process and returns the effective settings
+    if layout["affinity"]:
+        try:
+            os.sched_setaffinity(0, layout["affinity"])
+        except (AttributeError, OSError) as e:
+            print(f"[cpu_governor] Could not set CPU affinity: {e}")
+    threads = layout["threads_per_analysis"]
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # only allowed before the first inter-op parallel call, keep torch's value
+    cv2.setNumThreads(threads)
+    return effective_cpu_layout(layout)
+
+
+def effective_cpu_layout(layout):
+    #What the libraries actually report, next to the plan
+    try:
+        affinity = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        affinity = None
+    return dict(
+        layout,
+        torch_threads=torch.get_num_threads(),
+        torch_interop_threads=torch.get_num_interop_threads(),
+        cv2_threads=cv2.getNumThreads(),
+        affinity=affinity,
+    )
@@ -0,0 +1,168 @@
+# exemplar_index.py
+#Nearest labeled training poses per phase, for "closest butter form" comparisons. Built offline from
+#the pose_features.py cache into one uncompressed .npz holding a KD-tree per phase (points stored in
+#tree order, leaf buckets, per-node bounding boxes), so the backend memory-maps it at startup and a
+#query reads only the nodes and leaves it visits.
+#
+#Usage: python exemplar_index.py pose_features.npz exemplar_index.npz [--label butter] [--leaf-size 32]
+#Poses are compared on bounding-box normalized x, y of the 33 landmarks (66 dims, Euclidean).
+import json
+import heapq
+import argparse
+import numpy as np
+from pose_features import load_feature_cache, phaseToIdx, labelToIdx, NUM_LANDMARKS
+from pose_timeline import memmap_npz
+
+FORMAT_VERSION = 1
+DIMS = NUM_LANDMARKS * 2
+PHASE_NAMES = {"shot pocket": phaseToIdx["shotpocket"], "set point": phaseToIdx["setpoint"],
+               "follow through": phaseToIdx["followthrough"]}
+
+
+def pose_vector(keypoints):
+    #(33, 4) or flat (132,) keypoints -> (66,) float32 x, y scaled to the pose's bounding box
+    #(same normalization as pose_features.normalize, so cached training keypoints are unchanged)
+    xy = np.asarray(keypoints, dtype=np.float32).reshape(NUM_LANDMARKS, -1)[:, :2]
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    return ((xy - lo) / np.maximum(hi - lo, 1e-6)).reshape(-1)
+
+
+def build_kdtree(points, leaf_size=32):
+    """
+    Median-split KD-tree over (N, D) points, splitting the widest dimension of each node.
+    Returns the point order and flat node arrays (left/right child, -1 for leaves; start/end into
+    the reordered points; bounding box lo/hi per node).
+    """
+    order = np.arange(len(points))
+    left, right, start, end, lo, hi = [], [], [], [], [], []
+
+    def add(s, e):
+        node = len(left)
+        block = points[order[s:e]]
+        left.append(-1)
+        right.append(-1)
+        start.append(s)
+        end.append(e)
+        lo.append(block.min(axis=0))
+        hi.append(block.max(axis=0))
+        if e - s > leaf_size:
+            dim = int(np.argmax(hi[node] - lo[node]))
+            mid = (s + e) // 2
+            order[s:e] = order[s:e][np.argsort(points[order[s:e], dim], kind="stable")]
+            left[node] = add(s, mid)
+            right[node] = add(mid, e)
+        return node
+
+    if len(points):
+        add(0, len(points))
+    return {
+        "order": order,
+        "left": np.array(left, dtype=np.int32),
+        "right": np.array(right, dtype=np.int32),
+        "start": np.array(start, dtype=np.int32),
+        "end": np.array(end, dtype=np.int32),
+        "lo": np.array(lo, dtype=np.float32).reshape(-1, points.shape[1]),
+        "hi": np.array(hi, dtype=np.float32).reshape(-1, points.shape[1]),
+    }
+
+
+def write_exemplar_index(cache_path, out_path, label="butter", leaf_size=32):
+    cache = load_feature_cache(cache_path)
+    arrays, counts = {}, {}
+    for phase_name, phase in PHASE_NAMES.items():
+        rows = np.nonzero((cache["phase"] == phase) & (cache["label"] == labelToIdx[label]))[0]
+        points = np.stack([pose_vector(kp) for kp in cache["keypoints"][rows]]) if len(rows) else np.zeros((0, DIMS), np.float32)
+        tree = build_kdtree(points, leaf_size)
+        order = tree.pop("order")
+        key = f"p{phase}_"
+        arrays[key + "points"] = points[order]
+        arrays[key + "ids"] = cache["hashes"][rows][order]
+        arrays[key + "names"] = np.array([p.replace("\\", "/").rsplit("/", 1)[-1] for p in cache["paths"][rows][order]], dtype=str)
+        for name, values in tree.items():
+            arrays[key + name] = values
+        counts[phase_name] = int(len(rows))
+    header = {"format_version": FORMAT_VERSION, "label": label, "leaf_size": leaf_size, "dims": DIMS,
+              "phases": PHASE_NAMES, "counts": counts}
+    # stored (not compressed) members, so ExemplarIndex can memory-map them
+    np.savez(out_path, header=np.array(json.dumps(header)), **arrays)
+    return header
+
+
+class ExemplarIndex:
+    """
+    Memory-mapped reader for files written by write_exemplar_index.
+        index = ExemplarIndex("exemplar_index.npz")
+        index.query(keypoints, "set point", k=3)  # [{"id", "name", "distance"}, ...] nearest first
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.arrays = memmap_npz(self.path)
+        self.header = json.loads(str(self.arrays.pop("header")))
+        self.label = self.header["label"]
+        self.counts = self.header["counts"]
+        # node arrays are small and visited on every query, keep them in memory; points stay mapped
+        self.trees = {}
+        for phase_name, phase in self.header["phases"].items():
+            key = f"p{phase}_"
+            if not self.counts.get(phase_name):
+                continue
+            tree = {name: np.asarray(self.arrays[key + name]) for name in ("left", "right", "start", "end", "lo", "hi")}
+            tree.update(points=self.arrays[key + "points"], ids=self.arrays[key + "ids"], names=self.arrays[key + "names"])
+            self.trees[phase_name] = tree
+
+    def query(self, keypoints, phase_name, k=3):
+        #Exact k nearest exemplars of the phase; best-first over nodes by bounding-box distance
+        tree = self.trees.get(phase_name)
+        if tree is None or k <= 0:
+            return []
+        q = pose_vector(keypoints)
+        lo, hi = tree["lo"], tree["hi"]
+
+        def bound(node):
+            gap = np.maximum(lo[node] - q, 0) + np.maximum(q - hi[node], 0)
+            return float(gap @ gap)
+
+        best = []  # max-heap of (-squared distance, row)
+        nodes = [(0.0, 0)]
+        while nodes:
+            node_bound, node = heapq.heappop(nodes)
+            if len(best) == k and node_bound >= -best[0][0]:
+                break
+            if tree["left"][node] < 0:
+                s, e = int(tree["start"][node]), int(tree["end"][node])
+                diff = np.asarray(tree["points"][s:e]) - q
+                dists = np.einsum("ij,ij->i", diff, diff)
+                for row in np.argsort(dists)[:k]:
+                    item = (-float(dists[row]), s + int(row))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item[0] > best[0][0]:
+                        heapq.heapreplace(best, item)
+                    else:
+                        break
+                continue
+            for child in (int(tree["left"][node]), int(tree["right"][node])):
+                child_bound = bound(child)
+                if len(best) < k or child_bound < -best[0][0]:
+                    heapq.heappush(nodes, (child_bound, child))
+
+        return [
+            {"id": str(tree["ids"][row]), "name": str(tree["names"][row]), "distance": round(float(np.sqrt(-neg)), 4)}
+            for neg, row in sorted(best, reverse=True)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the per-phase exemplar nearest-neighbour index")
+    parser.add_argument("features", help=".npz written by pose_features.py")
+    parser.add_argument("out", nargs="?", default="exemplar_index.npz")
+    parser.add_argument("--label", choices=sorted(labelToIdx), default="butter", help="which exemplars to index")
+    parser.add_argument("--leaf-size", type=int, default=32)
+    args = parser.parse_args()
+    header = write_exemplar_index(args.features, args.out, args.label, args.leaf_size)
+    print(f"[exemplar_index] Indexed {header['counts']} {args.label} exemplars into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
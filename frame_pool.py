@@ -0,0 +1,122 @@
+# frame_pool.py
+#Reusable decode buffers. VideoProcessor keeps every analyzed frame until the best sequence is picked,
+#so each request used to allocate (and the GC later reclaim) hundreds of full-size arrays. Frames are
+#now decoded in place into pooled buffers (cap.read(image=...)) and handed back when the request ends.
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class FrameBufferPool:
+    def __init__(self, max_mb=512):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._free = OrderedDict()  # (shape, dtype) -> [arrays], least recently used first
+        self._free_bytes = 0
+        self._lock = threading.Lock()
+        # allocation metrics
+        self.allocated = 0
+        self.allocated_bytes = 0
+        self.reused = 0
+        self.released = 0
+        self.evicted = 0  # buffers dropped to stay under max_bytes
+        self.in_use = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            self.in_use += 1
+            buffers = self._free.get(key)
+            if buffers:
+                self._free.move_to_end(key)
+                buffer = buffers.pop()
+                self._free_bytes -= buffer.nbytes
+                self.reused += 1
+                return buffer
+            self.allocated += 1
+        buffer = np.empty(shape, dtype=dtype)
+        with self._lock:
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def release(self, buffers):
+        with self._lock:
+            for buffer in buffers:
+                key = (buffer.shape, buffer.dtype.str)
+                self._free.setdefault(key, []).append(buffer)
+                self._free.move_to_end(key)
+                self._free_bytes += buffer.nbytes
+                self.released += 1
+                self.in_use -= 1
+            # evict from the least recently used sizes first
+            while self._free_bytes > self.max_bytes and self._free:
+                key, stale = next(iter(self._free.items()))
+                buffer = stale.pop()
+                self._free_bytes -= buffer.nbytes
+                self.evicted += 1
+                if not stale:
+                    del self._free[key]
+
+    def lease(self):
+        return FrameLease(self)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_use": self.in_use,
+                "free": sum(len(b) for b in self._free.values()),
+                "free_mb": round(self._free_bytes / (1024 * 1024), 1),
+                "allocated": self.allocated,
+                "allocated_mb": round(self.allocated_bytes / (1024 * 1024), 1),
+                "reused": self.reused,
+                "evicted": self.evicted,
+                "reuse_rate": round(self.reused / max(1, self.reused + self.allocated), 3),
+            }
+
+
+class FrameLease:
+    """
+    Buffers taken for one request. Pass it as `frame_pool` to VideoProcessor / iter_sampled_frames and
+    call release() once nothing references the frames anymore (after scoring and saving).
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._buffers = []
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        buffer = self.pool.acquire(shape, dtype)
+        with self._lock:
+            self._buffers.append(buffer)
+        return buffer
+
+    def give_back(self, buffer):
+        #Return one buffer early (e.g. a frame that turned out unreadable)
+        with self._lock:
+            for i, held in enumerate(self._buffers):
+                if held is buffer:
+                    del self._buffers[i]
+                    break
+            else:
+                return
+        self.pool.release([buffer])
+
+    def release_except(self, keep):
+        #Return every buffer except those in `keep` (e.g. once the best frames have been picked)
+        keep_ids = {id(frame) for frame in keep}
+        with self._lock:
+            kept = [b for b in self._buffers if id(b) in keep_ids]
+            released = [b for b in self._buffers if id(b) not in keep_ids]
+            self._buffers = kept
+        self.pool.release(released)
+
+    def release(self):
+        with self._lock:
+            buffers, self._buffers = self._buffers, []
+        self.pool.release(buffers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,97 @@
+# live_tracker.py
+#Incremental shot tracking for live camera streams. Frames are fed one at a time; the tracker keeps
+#only the best candidate frame per phase for the current attempt and reports events as they happen:
+#phase changes, improved candidates, and a finished shot once the follow through has been held.
+import numpy as np
+
+LIVE_PHASES = ("Shot pocket", "Set point", "Follow through")
+
+DEFAULT_LIVE_CONFIG = {
+    "min_conf": 0.5,        # phase confidence needed to count a frame as that phase
+    "ft_hold_s": 0.3,       # keep looking for a better follow through this long before finishing
+    "max_attempt_s": 6.0,   # an attempt with no follow through by then is dropped
+    "idle_reset_s": 2.0,    # no pose for this long drops the attempt
+}
+
+
+class LiveShotTracker:
+    def __init__(self, classifier, config=None):
+        self.classifier = classifier
+        self.config = dict(DEFAULT_LIVE_CONFIG, **(config or {}))
+        self.frame_count = 0
+        self.shots = 0
+        self.reset_pending = False  # set from another thread; applied before the next frame
+        self._reset()
+
+    def _reset(self):
+        self.candidates = {}      # phase -> best candidate of the current attempt
+        self.phase = None         # last confident phase
+        self.attempt_start = None
+        self.ft_start = None      # first follow-through frame of the current attempt
+        self.last_pose_t = None
+
+    def request_reset(self):
+        self.reset_pending = True
+
+    def process(self, frame, timestamp):
+        """
+        frame: BGR image, timestamp: seconds (monotonic within the stream).
+        Returns a list of event dicts; a finished shot is {"type": "shot", "features": [...]} with
+        one feature per phase holding the frame, raw (132,) keypoints and phase confidence.
+        """
+        c = self.config
+        events = []
+        if self.reset_pending:
+            self.reset_pending = False
+            self._reset()
+
+        frame_idx = self.frame_count
+        self.frame_count += 1
+        results = self.classifier.detect_pose(frame)
+        phase, conf = self.classifier.classify_shot_phase(results)
+        has_pose = bool(results and results.pose_landmarks)
+
+        if has_pose:
+            self.last_pose_t = timestamp
+        elif self.attempt_start is not None and timestamp - (self.last_pose_t or timestamp) > c["idle_reset_s"]:
+            events.append({"type": "reset", "reason": "pose lost", "t": round(timestamp, 3)})
+            self._reset()
+            return events
+
+        if has_pose and phase in LIVE_PHASES and conf >= c["min_conf"]:
+            if phase != self.phase:
+                self.phase = phase
+                events.append({"type": "phase", "phase": phase.lower(), "confidence": round(float(conf), 3),
+                               "frame_idx": frame_idx, "t": round(timestamp, 3)})
+            if self.attempt_start is None:
+                self.attempt_start = timestamp
+            if phase == "Follow through" and self.ft_start is None:
+                self.ft_start = timestamp
+
+            best = self.candidates.get(phase)
+            if best is None or conf > best["phase_confidence"]:
+                keypoints = np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in results.pose_landmarks.landmark],
+                                     dtype=np.float32).flatten()
+                self.candidates[phase] = {
+                    "frame": frame,
+                    "phase_name": phase.lower(),
+                    "frame_idx": frame_idx,
+                    "timestamp": timestamp,
+                    "phase_confidence": float(conf),
+                    "keypoints": keypoints,
+                }
+                events.append({"type": "candidate", "phase": phase.lower(), "confidence": round(float(conf), 3),
+                               "frame_idx": frame_idx, "t": round(timestamp, 3)})
+
+        if self.ft_start is not None and (timestamp - self.ft_start >= c["ft_hold_s"] or self.phase != "Follow through"):
+            self.shots += 1
+            # pocket/set candidates seen after the follow through belong to the next attempt
+            ft_t = self.candidates["Follow through"]["timestamp"]
+            features = [cand for p, cand in self.candidates.items() if p == "Follow through" or cand["timestamp"] <= ft_t]
+            features.sort(key=lambda cand: LIVE_PHASES.index(cand["phase_name"].capitalize()))
+            events.append({"type": "shot", "shot": self.shots, "features": features, "t": round(timestamp, 3)})
+            self._reset()
+        elif self.attempt_start is not None and timestamp - self.attempt_start > c["max_attempt_s"]:
+            events.append({"type": "reset", "reason": "no follow through", "t": round(timestamp, 3)})
+            self._reset()
+        return events
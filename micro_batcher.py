@@ -0,0 +1,114 @@
+# micro_batcher.py
+#Cross-request micro-batching for small models. Callers (threadpool threads of concurrent requests)
+#submit row matrices; one worker thread waits up to max_wait_ms after the first pending submission, or
+#until max_items rows are pending, runs a single batched call and hands each caller its slice back.
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, fn, max_items=64, max_wait_ms=2.0):
+        """
+        fn: takes an (N, D) array and returns a tuple of length-N arrays (or Nones), e.g.
+            predict_shot_quality_batch -> (predictions, confidences)
+        """
+        self.fn = fn
+        self.max_items = max(1, max_items)
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        # batching metrics
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_requests = 0
+        self.max_batch_rows = 0
+        self.total_queue_s = 0.0
+        self.max_queue_s = 0.0
+        self.total_forward_s = 0.0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        future = Future()
+        self._queue.put((np.asarray(rows), future, time.perf_counter()))
+        return future
+
+    def __call__(self, rows):
+        #Blocking: returns this caller's slice of fn's output
+        return self.submit(rows).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            pending_rows = len(item[0])
+            deadline = item[2] + self.max_wait_s
+            stop = False
+            while pending_rows < self.max_items:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                pending_rows += len(item[0])
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        start = time.perf_counter()
+        try:
+            outputs = self.fn(np.concatenate([rows for rows, _, _ in batch]))
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        forward_s = time.perf_counter() - start
+
+        offset = 0
+        for rows, future, _ in batch:
+            n = len(rows)
+            future.set_result(tuple(None if out is None else out[offset:offset + n] for out in outputs))
+            offset += n
+
+        with self._lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.rows += offset
+            self.max_batch_requests = max(self.max_batch_requests, len(batch))
+            self.max_batch_rows = max(self.max_batch_rows, offset)
+            for _, _, enqueued in batch:
+                self.total_queue_s += start - enqueued
+                self.max_queue_s = max(self.max_queue_s, start - enqueued)
+            self.total_forward_s += forward_s
+
+    def stats(self):
+        with self._lock:
+            batches = max(1, self.batches)
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "avg_batch_requests": round(self.requests / batches, 2),
+                "avg_batch_rows": round(self.rows / batches, 2),
+                "max_batch_requests": self.max_batch_requests,
+                "max_batch_rows": self.max_batch_rows,
+                "avg_queue_ms": round(self.total_queue_s / max(1, self.requests) * 1000, 2),
+                "max_queue_ms": round(self.max_queue_s * 1000, 2),
+                "avg_forward_ms": round(self.total_forward_s / batches * 1000, 2),
+            }
@@ -7,17 +7,22 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
 class PoseClassifier:
-    def __init__(self):
+    def __init__(self, model_complexity=2):
+        # 2 = heavy (default, used for scoring); 0 = lite, used by the cascade scan in VideoProcessor
+        self.model_complexity = model_complexity
         self.mp_pose = mp.solutions.pose
         self.pose = self.mp_pose.Pose(
             static_image_mode=True,
-            model_complexity=2,
+            model_complexity=model_complexity,
             min_detection_confidence=0.5
         )
+        self._rgb = None  # reused color-conversion output
 
     def detect_pose(self, image):
-        # Convert the BGR image to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Convert the BGR image to RGB, reusing the previous output buffer when the size matches
+        if self._rgb is None or self._rgb.shape != image.shape or self._rgb.dtype != image.dtype:
+            self._rgb = np.empty_like(image)
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb)
         results = self.pose.process(image_rgb)
         return results
 
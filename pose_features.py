@@ -0,0 +1,205 @@
+#Extracts normalized MediaPipe keypoints for the training dataset in a process pool
+#and keeps them in a single .npz keyed by image content hash.
+#Re-running only processes images that are new since the last run.
+#
+#Usage: python pose_features.py <dataset_dir> <features.npz> [--workers N]
+#Dataset layout (same as the training notebook): <dataset_dir>/<phase>/<label>/*.jpg|png|jpeg
+import os
+import hashlib
+import argparse
+import numpy as np
+from glob import glob
+from concurrent.futures import ProcessPoolExecutor
+
+PHASES = ["followthrough", "setpoint", "shotpocket"]
+LABELS = ["broke", "butter"]
+labelToIdx = {"broke": 0, "butter": 1}
+phaseToIdx = {"shotpocket": 0, "setpoint": 1, "followthrough": 2}
+NUM_LANDMARKS = 33
+
+_pose = None  # per-process MediaPipe graph, built by _init_worker
+
+
+#Normalize keypoints function (same as the training notebook)
+def normalize(keypoints):
+
+    xs = [kp[0] for kp in keypoints]
+    ys = [kp[1] for kp in keypoints]
+
+    min_x, max_x = min(xs), max(xs)
+    min_y, max_y = min(ys), max(ys)
+
+    width = max_x - min_x
+    height = max_y - min_y
+
+    return [((x-min_x)/width, (y-min_y)/height, z, v)
+            for x,y,z,v in keypoints]
+
+
+def scan_dataset(dataset_path):
+    #(image path, phase, label) for every image, like Step 3 of the notebook
+    imageData = []
+    for phase in PHASES:
+        for label in LABELS:
+            path = os.path.join(dataset_path, phase, label)
+            images = glob(os.path.join(path, "*.jpg")) + glob(os.path.join(path, "*.png")) + glob(os.path.join(path, "*.jpeg"))
+            for imgFile in images:
+                imageData.append((imgFile, phase, label))
+    return imageData
+
+
+def image_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# Worker side
+def _init_worker(model_complexity):
+    global _pose
+    import mediapipe as mp
+    _pose = mp.solutions.pose.Pose(static_image_mode=True, model_complexity=model_complexity, min_detection_confidence=0.5)
+
+
+def _extract_keypoints(imgFile):
+    #Returns normalized (33, 4) keypoints, or None if the image can't be read or has no pose
+    import cv2
+    img = cv2.imread(imgFile)
+    if img is None:
+        return None
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    results = _pose.process(img_rgb)
+    if not results.pose_landmarks:
+        return None
+    keypoints = [(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark]
+    return np.asarray(normalize(keypoints), dtype=np.float32)
+
+
+# Cache file
+def load_feature_cache(cache_path):
+    """
+    Returns dict with arrays:
+      hashes (N,), paths (N,), keypoints (N, 33, 4) float32, phase (N,) int8, label (N,) int8,
+      no_pose_hashes (M,) for images where no pose was detected (not retried)
+    """
+    if not os.path.exists(cache_path):
+        return {
+            "hashes": np.array([], dtype=str),
+            "paths": np.array([], dtype=str),
+            "keypoints": np.zeros((0, NUM_LANDMARKS, 4), dtype=np.float32),
+            "phase": np.zeros(0, dtype=np.int8),
+            "label": np.zeros(0, dtype=np.int8),
+            "no_pose_hashes": np.array([], dtype=str),
+        }
+    with np.load(cache_path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def save_feature_cache(cache_path, cache):
+    #Write to a temp file first so an interrupted run never leaves a broken cache
+    tmp_path = f"{cache_path}.tmp.npz"
+    np.savez_compressed(tmp_path, **cache)
+    os.replace(tmp_path, cache_path)
+
+
+def update_feature_cache(dataset_path, cache_path, workers=None, model_complexity=2):
+    """
+    Bring the cache in line with the dataset: extract keypoints for new images only,
+    refresh phase/label/path for images that moved, and drop images that were removed.
+    """
+    imageData = scan_dataset(dataset_path)
+    cache = load_feature_cache(cache_path)
+    known = {h: i for i, h in enumerate(cache["hashes"])}
+    no_pose = set(cache["no_pose_hashes"].tolist())
+
+    hashes = [image_hash(imgFile) for imgFile, _, _ in imageData]
+    todo = [(h, item) for h, item in zip(hashes, imageData) if h not in known and h not in no_pose]
+    # identical images in two folders are only extracted once
+    todo = list({h: item for h, item in todo}.items())
+    print(f"[pose_features] {len(imageData)} images, {len(todo)} new to extract")
+
+    extracted = {}
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_complexity,)) as pool:
+            paths = [item[0] for _, item in todo]
+            for i, ((h, item), keypoints) in enumerate(zip(todo, pool.map(_extract_keypoints, paths, chunksize=8)), 1):
+                if keypoints is None:
+                    print(f"[pose_features] No pose detected: {item[0]}")
+                    no_pose.add(h)
+                else:
+                    extracted[h] = keypoints
+                if i % 100 == 0:
+                    print(f"[pose_features] extracted {i}/{len(todo)}")
+
+    # rebuild in dataset order; keypoints come from the old cache or this run
+    out_hashes, out_paths, out_keypoints, out_phase, out_label = [], [], [], [], []
+    seen = set()
+    for h, (imgFile, phase, label) in zip(hashes, imageData):
+        if h in seen:
+            continue
+        if h in known:
+            keypoints = cache["keypoints"][known[h]]
+        elif h in extracted:
+            keypoints = extracted[h]
+        else:
+            continue
+        seen.add(h)
+        out_hashes.append(h)
+        out_paths.append(imgFile)
+        out_keypoints.append(keypoints)
+        out_phase.append(phaseToIdx[phase])
+        out_label.append(labelToIdx[label])
+
+    current = set(hashes)
+    cache = {
+        "hashes": np.array(out_hashes, dtype=str),
+        "paths": np.array(out_paths, dtype=str),
+        "keypoints": np.stack(out_keypoints).astype(np.float32) if out_keypoints else np.zeros((0, NUM_LANDMARKS, 4), dtype=np.float32),
+        "phase": np.array(out_phase, dtype=np.int8),
+        "label": np.array(out_label, dtype=np.int8),
+        "no_pose_hashes": np.array(sorted(no_pose & current), dtype=str),
+    }
+    save_feature_cache(cache_path, cache)
+    print(f"[pose_features] Saved {len(out_hashes)} feature rows to {cache_path}")
+    return cache
+
+
+def load_features(cache_path):
+    """
+    Model inputs ready for PoseMLP: X (N, 135) float32 = flattened keypoints + phase one-hot,
+    y (N,) int64 labels (0 broke, 1 butter), and the phase index of each row.
+    """
+    cache = load_feature_cache(cache_path)
+    n = len(cache["hashes"])
+    X = np.zeros((n, NUM_LANDMARKS * 4 + len(phaseToIdx)), dtype=np.float32)
+    X[:, :NUM_LANDMARKS * 4] = cache["keypoints"].reshape(n, -1)
+    X[np.arange(n), NUM_LANDMARKS * 4 + cache["phase"].astype(np.int64)] = 1.0
+    return X, cache["label"].astype(np.int64), cache["phase"].astype(np.int64)
+
+
+def to_pose_data(cache):
+    #The notebook's poseData list format, for cells that still expect it
+    idxToPhase = {v: k for k, v in phaseToIdx.items()}
+    idxToLabel = {v: k for k, v in labelToIdx.items()}
+    return [
+        {
+            "keypoints": [tuple(kp) for kp in cache["keypoints"][i].tolist()],
+            "phase": idxToPhase[int(cache["phase"][i])],
+            "label": idxToLabel[int(cache["label"][i])],
+            "path": str(cache["paths"][i]),
+        }
+        for i in range(len(cache["hashes"]))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract and cache normalized pose keypoints for the training dataset")
+    parser.add_argument("dataset_dir")
+    parser.add_argument("cache_path", nargs="?", default="pose_features.npz")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--complexity", type=int, default=2, help="MediaPipe model complexity")
+    args = parser.parse_args()
+    update_feature_cache(args.dataset_dir, args.cache_path, args.workers, args.complexity)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# pose_mlp.py
+#MLP that classifies a pose (33 keypoints x 4 + phase one-hot) as broke (0) or butter (1)
+import json
+from pathlib import Path
+import torch
+import torch.nn as nn
+
+
+class PoseMLP(nn.Module):
+    def __init__(self, input_dim=135, hidden_dim1=128, hidden_dim2=64, dropout=0.2, output_dim=1):
+        super().__init__()
+        self.net = nn.Sequential(
+            nn.Linear(input_dim, hidden_dim1),
+            nn.BatchNorm1d(hidden_dim1),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_dim1, hidden_dim2),
+            nn.BatchNorm1d(hidden_dim2),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_dim2, output_dim)
+        )
+    
+    def forward(self, x):
+        return self.net(x).squeeze(-1)
+
+
+def load_pose_mlp(weights_path, device="cpu"):
+    #Builds the PoseMLP for a weights file and loads it in eval mode. Layer sizes come from the
+    #params in the JSON written next to the weights by train_pose_mlp.py; without one, the defaults
+    weights_path = Path(weights_path)
+    params = {}
+    sidecar = weights_path.with_suffix(".json")
+    if sidecar.exists():
+        with open(sidecar) as f:
+            params = json.load(f).get("params", {})
+    model = PoseMLP(input_dim=135, hidden_dim1=params.get("hidden_dim1", 128), hidden_dim2=params.get("hidden_dim2", 64),
+                    dropout=params.get("dropout", 0.2), output_dim=1).to(device)
+    model.load_state_dict(torch.load(weights_path, map_location=device, weights_only=False))
+    model.eval()
+    return model
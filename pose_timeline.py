@@ -0,0 +1,150 @@
+# pose_timeline.py
+#Compact binary export of a VideoProcessor per-frame timeline (landmarks, phase, confidences,
+#derived metrics) so analytics and re-scoring don't need to decode the video again.
+#
+#Files are uncompressed .npz, so TimelineReader can memory-map every array in place and
+#stream it in chunks; np.load(path) also works for a plain full read.
+import json
+import zipfile
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# phase names get small integer codes; unseen names are appended to the file's own table
+PHASE_NAMES = ["Shot pocket", "Set point", "Follow through", "Undefined shooting position", "No pose detected"]
+
+# per-frame scalar metrics written by VideoProcessor._compute_normalized_metrics
+METRIC_NAMES = [
+    "torso_length", "shoulder_width", "shoulder_center_x",
+    "right_wrist_y_norm", "left_wrist_y_norm",
+    "right_elbow_y_norm", "left_elbow_y_norm",
+    "right_wrist_x_offset", "left_wrist_x_offset",
+    "nose_y_norm",
+    "vel_wrist_y", "vel_wrist_x", "pose_delta",
+]
+
+
+def write_timeline(frames, path, keypoint_names, fps, meta=None, dtype=np.float16):
+    """
+    frames: VideoProcessor.frames (after extract_frames).
+    Landmarks are (N, K, 3) [x, y, visibility] and metrics (N, M) in `dtype` (float16 halves the
+    size again vs float32; normalized coordinates keep ~3 significant digits). Missing values are NaN.
+    """
+    n = len(frames)
+    phase_names = list(PHASE_NAMES)
+    phase_codes = np.zeros(n, dtype=np.int8)
+    landmarks = np.full((n, len(keypoint_names), 3), np.nan, dtype=np.float32)
+    metrics = np.full((n, len(METRIC_NAMES)), np.nan, dtype=np.float32)
+
+    for i, rec in enumerate(frames):
+        phase = rec.get("phase_raw", "")
+        if phase not in phase_names:
+            phase_names.append(phase)
+        phase_codes[i] = phase_names.index(phase)
+        lm = rec.get("landmarks")
+        if lm is not None:
+            landmarks[i] = [[lm[name]["x"], lm[name]["y"], lm[name]["visibility"]] for name in keypoint_names]
+        for j, name in enumerate(METRIC_NAMES):
+            value = rec.get(name)
+            if value is not None:
+                metrics[i, j] = value
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "fps": float(fps),
+        "frames": n,
+        "keypoints": list(keypoint_names),
+        "metrics": METRIC_NAMES,
+        "phases": phase_names,
+        **(meta or {}),
+    }
+    # np.savez (not savez_compressed) keeps members stored, which is what makes mmap possible
+    np.savez(
+        path,
+        header=np.array(json.dumps(header)),
+        frame_idx=np.array([rec["frame_idx"] for rec in frames], dtype=np.int32),
+        timestamp=np.array([rec["timestamp"] for rec in frames], dtype=np.float32),
+        phase=phase_codes,
+        phase_conf=np.array([rec.get("phase_conf", 0.0) for rec in frames], dtype=dtype),
+        phase_conf_smooth=np.array([rec.get("phase_conf_smooth", rec.get("phase_conf", 0.0)) for rec in frames], dtype=dtype),
+        interpolated=np.array([rec.get("interpolated", False) for rec in frames], dtype=bool),
+        heavy=np.array([rec.get("heavy", True) for rec in frames], dtype=bool),
+        landmarks=landmarks.astype(dtype),
+        metrics=metrics.astype(dtype),
+    )
+    return path
+
+
+def memmap_npz(path):
+    """
+    Arrays of an uncompressed .npz as read-only memmaps (nothing is read until sliced). Compressed,
+    empty or object members fall back to a normal read.
+    """
+    path = str(path)
+    arrays, fallback = {}, []
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                fallback.append(name)  # compressed member: normal read below
+                continue
+            # skip the zip local header (30 bytes + name + extra field) to reach the .npy bytes
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject or not shape or 0 in shape:
+                fallback.append(name)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(),
+                                     shape=shape, order="F" if fortran else "C")
+    if fallback:
+        # one archive handle for every fallback member, closed when done
+        with np.load(path) as npz:
+            for name in fallback:
+                arrays[name] = npz[name]
+    return arrays
+
+
+class TimelineReader:
+    """
+    Memory-mapped reader for files written by write_timeline.
+        reader = TimelineReader("clip.timeline.npz")
+        reader["landmarks"]            # (N, K, 3) memmap, nothing read until sliced
+        for chunk in reader.iter_chunks(256): ...
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.arrays = memmap_npz(self.path)
+        self.header = json.loads(str(self.arrays.pop("header")))
+        self.fps = self.header["fps"]
+        self.keypoints = self.header["keypoints"]
+        self.metric_names = self.header["metrics"]
+        self.phase_names = self.header["phases"]
+
+    def __len__(self):
+        return self.header["frames"]
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def metric(self, name):
+        return self.arrays["metrics"][:, self.metric_names.index(name)]
+
+    def keypoint(self, name):
+        return self.arrays["landmarks"][:, self.keypoints.index(name)]
+
+    def phases(self, start=0, stop=None):
+        codes = np.asarray(self.arrays["phase"][start:stop])
+        return [self.phase_names[c] for c in codes]
+
+    def iter_chunks(self, chunk_size=256):
+        #Yields dicts of in-memory arrays covering chunk_size frames at a time
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            yield {name: np.asarray(arr[start:stop]) for name, arr in self.arrays.items()}
@@ -1,8 +1,10 @@
 #runs the video processor on all videos in the "video" folder and saves output to "poseoutput" folder
+#pass --timeline to also write a timeline.npz per video, or --timeline-only to skip the JPEGs
 import os
+import sys
 import subprocess
 
-def process_videos(video_dir, output_dir):
+def process_videos(video_dir, output_dir, timeline=None):
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
@@ -19,12 +21,15 @@ def process_videos(video_dir, output_dir):
         
         try:
             # Run the video processor script
-            subprocess.run([
+            cmd = [
                 'python3.12',
                 'video_processor.py',
                 video_path,
                 output_dir
-            ], check=True)
+            ]
+            if timeline:
+                cmd.append(timeline)
+            subprocess.run(cmd, check=True)
             print(f"Successfully processed {video_file}")
         except subprocess.CalledProcessError as e:
             print(f"Error processing {video_file}: {str(e)}")
@@ -35,6 +40,8 @@ if __name__ == "__main__":
     video_dir = os.path.join(os.getcwd(), "video")
     output_dir = os.path.join(os.getcwd(), "poseoutput")
     
+    timeline = next((arg for arg in sys.argv[1:] if arg in ("--timeline", "--timeline-only")), None)
+
     # Process all videos
-    process_videos(video_dir, output_dir)
+    process_videos(video_dir, output_dir, timeline)
     print("\nAll videos processed!")
\ No newline at end of file
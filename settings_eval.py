@@ -0,0 +1,294 @@
+#Speed vs accuracy harness for pipeline settings. Runs VideoProcessor frame selection plus PoseMLP scoring
+#over a folder of clips once per setting (sampling rate, pose model complexity, downscaled input, cascade),
+#records wall time, CPU time, peak RSS and pose calls, and compares the selected frames, per-phase
+#predictions and the broke/butter verdict against a reference setting. Settings that no other setting
+#beats on both time and agreement are marked as the Pareto front.
+#
+#Usage: python settings_eval.py <video_dir> --weights MLweights/broke_jump_shot_detector_weights_v5.pth
+#           [--matrix settings.json] [--reference reference] [--tolerance-s 0.1] [--out settings_eval.json]
+#
+#settings.json is a list of settings; every key but "name" is optional:
+#   [{"name": "reference", "model_complexity": 2, "target_fps": 30},
+#    {"name": "fps15_side640", "model_complexity": 2, "target_fps": 15, "max_side": 640},
+#    {"name": "cascade", "model_complexity": 2, "lite_complexity": 0, "cascade_top_k": 8}]
+#Each setting runs in its own process, so peak RSS includes that setting's models and nothing else.
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+from datetime import datetime
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from cascade_check import compare_sequences
+from shot_segmenter import sequence_summary
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+
+DEFAULT_MATRIX = [
+    {"name": "reference", "model_complexity": 2, "target_fps": 30},
+    {"name": "fps15", "model_complexity": 2, "target_fps": 15},
+    {"name": "fps10", "model_complexity": 2, "target_fps": 10},
+    {"name": "complexity1", "model_complexity": 1, "target_fps": 30},
+    {"name": "side640", "model_complexity": 2, "target_fps": 30, "max_side": 640},
+    {"name": "cascade", "model_complexity": 2, "lite_complexity": 0, "target_fps": 30},
+    {"name": "complexity1_fps15_side640", "model_complexity": 1, "target_fps": 15, "max_side": 640},
+]
+
+# mirrors backend/main.py (PHASE_MAPPING, PHASE_INDEX, build_shot_response)
+PHASE_KEYS = {"shot pocket": "shot_pocket", "set point": "set_point", "follow through": "follow_through"}
+PHASE_INDEX = {"shot pocket": 0, "set point": 1, "follow through": 2}
+PHASE_POINTS = {"shot_pocket": 2, "set_point": 3, "follow_through": 4}
+SEQUENCE_PHASES = {"pocket": "shot pocket", "set": "set point", "ft": "follow through"}
+
+
+class CountingClassifier:
+    #Counts detect_pose calls and otherwise behaves like the wrapped PoseClassifier
+    def __init__(self, classifier):
+        self._classifier = classifier
+        self.calls = 0
+
+    def detect_pose(self, frame):
+        self.calls += 1
+        return self._classifier.detect_pose(frame)
+
+    def __getattr__(self, name):
+        return getattr(self._classifier, name)
+
+
+def selected_frames(sequence):
+    #(frame, phase_name) per selected frame, named the way the backend feeds them to the MLP
+    if sequence is None:
+        return []
+    kind, data = sequence
+    if kind == "triplet":
+        return [(data[key]["frame"], SEQUENCE_PHASES[key]) for key in ("pocket", "set", "ft")]
+    if kind == "pair":
+        _, data = data
+        return [(cand["frame"], label.replace("_", " ")) for label, cand in data.items() if label != "score"]
+    return [(data["single"]["frame"], "unknown")]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Worker side: one process per setting
+def _load_mlp(weights_path):
+    from pose_mlp import load_pose_mlp
+    if not weights_path:
+        return None
+    return load_pose_mlp(weights_path)
+
+
+def _score(model, vectors):
+    import torch
+    if model is None or not vectors:
+        return [None] * len(vectors)
+    with torch.no_grad():
+        probs = torch.sigmoid(model(torch.from_numpy(np.stack(vectors).astype(np.float32)))).numpy()
+    return [int(p > 0.5) for p in probs]
+
+
+def _run_setting(setting, video_paths, weights_path):
+    from pose_classifier import PoseClassifier
+    from video_processor import VideoProcessor
+
+    model = _load_mlp(weights_path)
+    heavy = CountingClassifier(PoseClassifier(model_complexity=setting.get("model_complexity", 2)))
+    lite = None
+    if setting.get("lite_complexity") is not None:
+        lite = CountingClassifier(PoseClassifier(model_complexity=setting["lite_complexity"]))
+
+    rows = []
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with tempfile.TemporaryDirectory() as output_dir:
+        for path in video_paths:
+            calls_before = heavy.calls + (lite.calls if lite else 0)
+            start = time.perf_counter()
+            vp = VideoProcessor(path, output_dir, classifier=heavy, lite_classifier=lite,
+                                cascade_top_k=setting.get("cascade_top_k", 8), max_side=setting.get("max_side"))
+            vp.extract_frames(target_fps=setting.get("target_fps") or None)
+            sequence = vp.find_best_sequence(max_candidates=8)
+
+            # the backend re-detects each selected frame (same colour handling as backend/main.py detect_pose)
+            # and scores its keypoints + phase one-hot
+            vectors, phase_keys = [], []
+            for frame, phase_name in selected_frames(sequence):
+                results = heavy.detect_pose(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                if not results or not results.pose_landmarks:
+                    continue
+                keypoints = np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in results.pose_landmarks.landmark],
+                                     dtype=np.float32).flatten()
+                one_hot = np.zeros(3, dtype=np.float32)
+                one_hot[PHASE_INDEX.get(phase_name, 0)] = 1.0
+                vectors.append(np.concatenate([keypoints, one_hot]))
+                phase_keys.append(PHASE_KEYS.get(phase_name, "shot_pocket"))
+            predictions = dict(zip(phase_keys, _score(model, vectors)))
+            score = sum(points for key, points in PHASE_POINTS.items() if predictions.get(key) == 1)
+
+            rows.append({
+                "video": os.path.basename(path),
+                "seconds": round(time.perf_counter() - start, 3),
+                "frames": len(vp.frames),
+                "pose_calls": heavy.calls + (lite.calls if lite else 0) - calls_before,
+                "sequence": sequence_summary(sequence),
+                "predictions": predictions,
+                "score": score if model is not None else None,
+                "is_broke": score < 9 if model is not None else None,
+            })
+            vp.frames = []
+            print(f"[settings_eval] {setting['name']} {rows[-1]['video']}: {rows[-1]['seconds']:.2f}s, "
+                  f"{rows[-1]['pose_calls']} pose calls")
+    return {
+        "wall_s": round(time.perf_counter() - wall_start, 3),
+        "cpu_s": round(time.process_time() - cpu_start, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "videos": rows,
+    }
+
+
+def compare_to_reference(run, reference, tolerance_s):
+    """
+    Per video: selected frames (same kind, exact / within tolerance_s per label), per-phase
+    predictions and the verdict, against the reference run. Returns (per-video rows, rates).
+    """
+    ref_rows = {row["video"]: row for row in reference["videos"]}
+    rows, labels, phases, verdicts = [], [], [], []
+    for row in run["videos"]:
+        ref = ref_rows[row["video"]]
+        agreement = compare_sequences(ref["sequence"], row["sequence"], tolerance_s)
+        labels.extend(agreement["labels"].values())
+        for key, prediction in ref["predictions"].items():
+            if prediction is not None:
+                phases.append(row["predictions"].get(key) == prediction)
+        if ref["is_broke"] is not None:
+            verdicts.append(row["is_broke"] == ref["is_broke"])
+        rows.append(dict(agreement, video=row["video"], same_verdict=row["is_broke"] == ref["is_broke"]))
+
+    def rate(values):
+        return round(sum(values) / len(values), 3) if values else None
+
+    return rows, {
+        "same_kind_rate": rate([r["same_kind"] for r in rows]),
+        "exact_frame_rate": rate([l["exact"] for l in labels]),
+        "within_tolerance_rate": rate([l["within_tolerance"] for l in labels]),
+        "phase_agreement": rate(phases),
+        "verdict_agreement": rate(verdicts),
+    }
+
+
+def pareto_front(summaries):
+    """
+    Names of the settings no other setting dominates: at most the same wall time and at least the same
+    verdict and frame agreement, strictly better on one. Missing agreement (no weights) counts as 0.
+    """
+    def key(s):
+        return (s["wall_s"], -(s["verdict_agreement"] or 0.0), -(s["within_tolerance_rate"] or 0.0))
+
+    front = []
+    for s in summaries:
+        dominated = any(
+            all(a <= b for a, b in zip(key(o), key(s))) and key(o) != key(s)
+            for o in summaries if o is not s
+        )
+        if not dominated:
+            front.append(s["name"])
+    return front
+
+
+def write_markdown(report, path):
+    ref = report["config"]["reference"]
+    lines = [
+        f"# Settings evaluation ({report['created']})",
+        "",
+        f"{report['config']['videos']} videos, agreement measured against `{ref}` "
+        f"(frames within {report['config']['tolerance_s']} s). * marks the Pareto front (wall time vs verdict and frame agreement).",
+        "",
+        "| setting | wall s | speedup | CPU s | peak RSS MB | pose calls | verdict agree | phase agree | frames exact | frames within tol |",
+        "|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for s in sorted(report["summary"], key=lambda s: s["wall_s"]):
+        mark = " *" if s["name"] in report["pareto_front"] else ""
+
+        def pct(value):
+            return "n/a" if value is None else f"{value:.1%}"
+
+        lines.append(f"| {s['name']}{mark} | {s['wall_s']} | {s['speedup']}x | {s['cpu_s']} | {s['peak_rss_mb']} | {s['pose_calls']} "
+                     f"| {pct(s['verdict_agreement'])} | {pct(s['phase_agreement'])} | {pct(s['exact_frame_rate'])} "
+                     f"| {pct(s['within_tolerance_rate'])} |")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure speed and accuracy of pipeline settings against a reference")
+    parser.add_argument("video_dir")
+    parser.add_argument("--weights", default=os.getenv("MODEL_WEIGHTS_PATH"),
+                        help="PoseMLP weights; without them only frame selection is compared")
+    parser.add_argument("--matrix", help="JSON list of settings (default: a built-in matrix)")
+    parser.add_argument("--reference", help="setting the others are compared against (default: the first)")
+    parser.add_argument("--tolerance-s", type=float, default=0.1)
+    parser.add_argument("--out", default="settings_eval.json", help="JSON report; a .md table is written next to it")
+    args = parser.parse_args()
+
+    matrix = DEFAULT_MATRIX
+    if args.matrix:
+        with open(args.matrix) as f:
+            matrix = json.load(f)
+    reference_name = args.reference or matrix[0]["name"]
+    if reference_name not in {s["name"] for s in matrix}:
+        raise SystemExit(f"Reference setting {reference_name!r} is not in the matrix")
+    videos = sorted(os.path.join(args.video_dir, f) for f in os.listdir(args.video_dir) if f.lower().endswith(VIDEO_EXTENSIONS))
+    if not videos:
+        raise SystemExit(f"No videos found in {args.video_dir}")
+
+    runs = {}
+    for setting in matrix:
+        # a fresh spawned process per setting keeps peak RSS and model caches separate
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            runs[setting["name"]] = pool.submit(_run_setting, setting, videos, args.weights).result()
+
+    reference = runs[reference_name]
+    summary, details = [], {}
+    for setting in matrix:
+        run = runs[setting["name"]]
+        rows, rates = compare_to_reference(run, reference, args.tolerance_s)
+        summary.append(dict(
+            rates,
+            name=setting["name"],
+            setting=setting,
+            wall_s=run["wall_s"],
+            cpu_s=run["cpu_s"],
+            peak_rss_mb=run["peak_rss_mb"],
+            pose_calls=sum(row["pose_calls"] for row in run["videos"]),
+            speedup=round(reference["wall_s"] / max(run["wall_s"], 1e-6), 2),
+        ))
+        details[setting["name"]] = {"videos": run["videos"], "agreement": rows}
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "config": {"reference": reference_name, "tolerance_s": args.tolerance_s, "videos": len(videos),
+                   "weights": args.weights},
+        "summary": summary,
+        "pareto_front": pareto_front(summary),
+        "runs": details,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    md_path = os.path.splitext(args.out)[0] + ".md"
+    write_markdown(report, md_path)
+    for s in summary:
+        print(f"[settings_eval] {s['name']}: {s['wall_s']}s ({s['speedup']}x), verdict agreement {s['verdict_agreement']}, "
+              f"frames within tolerance {s['within_tolerance_rate']}")
+    print(f"[settings_eval] Pareto front: {', '.join(report['pareto_front'])}")
+    print(f"[settings_eval] Wrote {args.out} and {md_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# shot_segmenter.py
+#Splits a long practice-session video into individual shot attempts.
+#One streaming pass at a low scan rate looks at cheap signals (motion energy between scanned frames,
+#wrist height above the shoulders, classifier phase) and yields each attempt's time window as soon as
+#it closes, so memory stays constant in session length. Each window is then analyzed on its own with
+#VideoProcessor(start_s, end_s) and released, in parallel worker processes.
+#
+#Usage: python shot_segmenter.py <session_video> <output_dir> [--workers N] [--save-frames]
+import os
+import cv2
+import json
+import argparse
+import itertools
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pose_classifier import PoseClassifier
+from video_processor import VideoProcessor, iter_sampled_frames, REFERENCE_FPS
+
+DEFAULT_SEGMENT_CONFIG = {
+    "scan_fps": 10.0,          # pose scan rate for segmentation (full analysis runs per segment)
+    "motion_threshold": 2.0,   # mean abs grey-level change between scans below which pose is skipped while idle
+    "motion_size": (64, 36),   # thumbnail used for motion energy
+    "raise_threshold": 0.25,   # wrist above shoulder line, in torso lengths, that counts as a release motion
+    "release_phases": ("Set point", "Follow through"),
+    "min_phase_conf": 0.5,
+    "min_active_s": 0.2,       # shorter bursts are ignored (fidgeting, ball checks)
+    "end_gap_s": 1.0,          # inactive time that closes an attempt
+    "max_active_s": 4.0,       # force-close attempts that never settle (continuous dribbling etc.)
+    "pad_before_s": 1.2,       # covers the shot pocket before the arm rises
+    "pad_after_s": 0.8,        # covers the end of the follow through
+}
+
+
+class ShotSegmenter:
+    def __init__(self, classifier=None, config=None):
+        self.classifier = classifier if classifier is not None else PoseClassifier()
+        self.config = dict(DEFAULT_SEGMENT_CONFIG, **(config or {}))
+        landmark = self.classifier.mp_pose.PoseLandmark
+        self._idx = {name: getattr(landmark, name).value for name in
+                     ("RIGHT_WRIST", "LEFT_WRIST", "RIGHT_SHOULDER", "LEFT_SHOULDER", "RIGHT_HIP", "LEFT_HIP")}
+
+    def _arm_lift(self, results):
+        #Highest wrist above the shoulder line, in torso lengths (positive = above), or None without a pose
+        if not results or not results.pose_landmarks:
+            return None
+        lm = results.pose_landmarks.landmark
+        shoulder_y = (lm[self._idx["RIGHT_SHOULDER"]].y + lm[self._idx["LEFT_SHOULDER"]].y) / 2
+        hip_y = (lm[self._idx["RIGHT_HIP"]].y + lm[self._idx["LEFT_HIP"]].y) / 2
+        torso = abs(hip_y - shoulder_y)
+        if torso < 1e-3:
+            return None
+        wrist_y = min(lm[self._idx["RIGHT_WRIST"]].y, lm[self._idx["LEFT_WRIST"]].y)
+        return (shoulder_y - wrist_y) / torso
+
+    def iter_segments(self, video_path):
+        """
+        Yield {"shot", "start_s", "end_s", "peak_lift"} for each shot attempt, in order, as the scan
+        passes it. Only the previous thumbnail and the open attempt are kept between scans.
+        """
+        c = self.config
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or REFERENCE_FPS
+        duration = (cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) / fps
+        stride = max(1, int(round(fps / c["scan_fps"])))
+        print(f"[ShotSegmenter] Scanning {video_path} ({fps:.1f} fps, every {stride} frames)")
+
+        prev_thumb = None
+        attempt = None  # {"start": t, "last": t, "peak": lift} while an attempt is open
+        last_end = 0.0
+        shot = 0
+        last_t = 0.0
+
+        def close(attempt):
+            nonlocal last_end, shot
+            if attempt["last"] - attempt["start"] < c["min_active_s"]:
+                return None
+            start_s = max(last_end, attempt["start"] - c["pad_before_s"], 0.0)
+            end_s = attempt["last"] + c["pad_after_s"]
+            if duration:
+                end_s = min(end_s, duration)
+            last_end = end_s
+            shot += 1
+            return {"shot": shot, "start_s": round(start_s, 3), "end_s": round(end_s, 3),
+                    "peak_lift": round(float(attempt["peak"]), 3)}
+
+        try:
+            for frame_idx, frame in iter_sampled_frames(cap, itertools.count(0, stride)):
+                t = frame_idx / fps
+                last_t = t
+                thumb = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), c["motion_size"], interpolation=cv2.INTER_AREA)
+                motion = float(cv2.absdiff(thumb, prev_thumb).mean()) if prev_thumb is not None else 0.0
+                prev_thumb = thumb
+
+                # a still scene can't start an attempt, so skip pose there
+                if attempt is None and frame_idx > 0 and motion < c["motion_threshold"]:
+                    continue
+
+                results = self.classifier.detect_pose(frame)
+                lift = self._arm_lift(results)
+                phase, conf = self.classifier.classify_shot_phase(results)
+                active = lift is not None and (
+                    lift >= c["raise_threshold"] or (phase in c["release_phases"] and conf >= c["min_phase_conf"]))
+
+                if active:
+                    if attempt is None:
+                        attempt = {"start": t, "last": t, "peak": lift}
+                    else:
+                        attempt["last"] = t
+                        attempt["peak"] = max(attempt["peak"], lift)
+                if attempt is not None and (t - attempt["last"] > c["end_gap_s"] or t - attempt["start"] > c["max_active_s"]):
+                    segment = close(attempt)
+                    attempt = None
+                    if segment:
+                        yield segment
+            if attempt is not None:
+                attempt["last"] = min(attempt["last"], last_t)
+                segment = close(attempt)
+                if segment:
+                    yield segment
+        finally:
+            cap.release()
+
+
+def sequence_summary(sequence):
+    #JSON-friendly view of find_best_sequence output (frames dropped)
+    if sequence is None:
+        return None
+    kind, data = sequence
+    if kind == "pair":
+        pair_type, data = data
+        kind = f"pair:{pair_type}"
+    frames = {
+        label: {"frame_idx": int(cand["frame_idx"]), "timestamp": round(float(cand["timestamp"]), 3), "conf": round(float(cand["conf"]), 3)}
+        for label, cand in data.items() if label != "score"
+    }
+    return {"kind": kind, "score": round(float(data["score"]), 3), "frames": frames}
+
+
+# Worker side: one PoseClassifier per process
+_classifier = None
+
+
+def _init_worker():
+    global _classifier
+    _classifier = PoseClassifier()
+
+
+def _analyze_segment(args):
+    video_path, output_dir, segment, analysis_kwargs, save_frames = args
+    vp = VideoProcessor(video_path, output_dir, classifier=_classifier, **analysis_kwargs.get("processor", {}))
+    vp.extract_frames(start_s=segment["start_s"], end_s=segment["end_s"], **analysis_kwargs.get("extract", {}))
+    sequence = vp.find_best_sequence()
+    if save_frames:
+        vp.save_sequence_frames(sequence)
+    result = dict(segment, sequence=sequence_summary(sequence), session_dir=str(vp.session_dir))
+    # the segment's decoded frames go away with vp when this returns
+    vp.frames = []
+    return result
+
+
+def analyze_session(video_path, output_dir, workers=None, segment_config=None, analysis_kwargs=None, save_frames=False):
+    """
+    Segment a session video and analyze every shot window in a process pool. Windows are submitted
+    while the scan is still running; at most 2 x workers are in flight so memory stays bounded.
+    Returns the per-shot results in shot order.
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    analysis_kwargs = analysis_kwargs or {}
+    segmenter = ShotSegmenter(config=segment_config)
+    results = []
+    # spawn: the scan's MediaPipe graph in this process must not be forked into the workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, mp_context=get_context("spawn")) as pool:
+        pending = []
+        for segment in segmenter.iter_segments(video_path):
+            print(f"[analyze_session] Shot {segment['shot']}: {segment['start_s']:.2f}s - {segment['end_s']:.2f}s")
+            pending.append(pool.submit(_analyze_segment, (str(video_path), str(output_dir), segment, analysis_kwargs, save_frames)))
+            if len(pending) >= 2 * workers:
+                results.append(pending.pop(0).result())
+        results.extend(f.result() for f in pending)
+    print(f"[analyze_session] {len(results)} shots found")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and analyze every shot in a practice-session video")
+    parser.add_argument("video_path")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None, help="segment analysis processes")
+    parser.add_argument("--scan-fps", type=float, default=DEFAULT_SEGMENT_CONFIG["scan_fps"])
+    parser.add_argument("--target-fps", type=float, default=REFERENCE_FPS, help="analysis rate inside each shot (0 = every frame)")
+    parser.add_argument("--save-frames", action="store_true", help="write the selected JPEGs for every shot")
+    args = parser.parse_args()
+
+    results = analyze_session(args.video_path, args.output_dir, args.workers,
+                              segment_config={"scan_fps": args.scan_fps},
+                              analysis_kwargs={"extract": {"target_fps": args.target_fps or None}},
+                              save_frames=args.save_frames)
+    out_path = Path(args.output_dir) / f"{Path(args.video_path).stem}_shots.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump({"video": str(args.video_path), "shots": results}, f, indent=2)
+    print(f"[analyze_session] Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#Shared fixtures: tests import the root modules directly and drive VideoProcessor with a scripted
+#classifier on a small synthetic clip, so no MediaPipe model download is needed
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pose_classifier import mp  # noqa: E402
+
+FRAME_STEP = 20  # gray level per frame index, so the classifier can tell which frame it was given
+
+
+def standing_pose(wrist_y=0.5):
+    #33 MediaPipe-ordered landmarks of a player facing the camera, right wrist at wrist_y
+    points = [SimpleNamespace(x=0.5, y=0.5, visibility=1.0) for _ in range(33)]
+    named = {
+        "NOSE": (0.5, 0.2), "RIGHT_SHOULDER": (0.4, 0.3), "LEFT_SHOULDER": (0.6, 0.3),
+        "RIGHT_ELBOW": (0.35, 0.45), "LEFT_ELBOW": (0.65, 0.45),
+        "RIGHT_WRIST": (0.35, wrist_y), "LEFT_WRIST": (0.65, 0.6),
+        "RIGHT_HIP": (0.42, 0.6), "LEFT_HIP": (0.58, 0.6),
+    }
+    for name, (x, y) in named.items():
+        points[mp.solutions.pose.PoseLandmark[name].value] = SimpleNamespace(x=x, y=y, visibility=1.0)
+    return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=points))
+
+
+class ScriptedClassifier:
+    """
+    Stands in for PoseClassifier. script maps frame index -> (phase, confidence, results); a frame is
+    recognized from its gray level (see write_clip). results None means no pose was detected.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.mp_pose = mp.solutions.pose
+        self.calls = []
+
+    def detect_pose(self, image):
+        frame_idx = int(round(float(image.mean()) / FRAME_STEP))
+        self.calls.append(frame_idx)
+        self._current = self.script.get(frame_idx, ("No pose detected", 0.0, None))
+        return self._current[2]
+
+    def classify_shot_phase(self, results):
+        return self._current[0], self._current[1]
+
+
+@pytest.fixture
+def write_clip(tmp_path):
+    #write_clip(frames, fps) -> path of an MJPG clip whose frame i is uniformly gray level i * FRAME_STEP
+    def write(frames=10, fps=30.0, size=(64, 48)):
+        path = str(tmp_path / f"clip_{frames}_{int(fps)}.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+        for i in range(frames):
+            writer.write(np.full((size[1], size[0], 3), i * FRAME_STEP % 256, dtype=np.uint8))
+        writer.release()
+        return path
+    return write
@@ -0,0 +1,62 @@
+import pytest
+
+import cost_limiter
+from cost_limiter import CostLimiter, FileBucketStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cost_limiter.time, "time", lambda: now[0])
+    return now
+
+
+def test_charge_until_empty_then_retry_after(clock):
+    limiter = CostLimiter(capacity=10, refill_per_s=2)
+    assert limiter.charge("a", 6) == (True, 0.0, 4.0)
+    allowed, retry_after, remaining = limiter.charge("a", 6)
+    assert not allowed and remaining == 4.0
+    assert retry_after == pytest.approx(1.0)  # 2 more seconds of work at 2/s
+    clock[0] += 1.0
+    assert limiter.charge("a", 6)[0]
+
+
+def test_clients_have_separate_buckets(clock):
+    limiter = CostLimiter(capacity=10, refill_per_s=1)
+    assert limiter.charge("a", 10)[0]
+    assert not limiter.charge("a", 1)[0]
+    assert limiter.charge("b", 10)[0]
+
+
+def test_cost_above_capacity_is_charged_as_capacity(clock):
+    limiter = CostLimiter(capacity=10, refill_per_s=1)
+    assert limiter.charge("a", 50) == (True, 0.0, 0.0)
+
+
+def test_refund_returns_unused_work_up_to_capacity(clock):
+    limiter = CostLimiter(capacity=10, refill_per_s=1)
+    limiter.charge("a", 8)
+    limiter.refund("a", 5)
+    assert limiter.charge("a", 7)[2] == pytest.approx(0.0)
+    limiter.refund("a", 100)
+    assert limiter.charge("a", 0)[2] == 10.0
+    stats = limiter.stats()
+    assert stats["charged"] == 3 and stats["refunded_s"] == 105.0
+
+
+def test_file_store_is_shared_between_limiters(clock, tmp_path):
+    path = str(tmp_path / "buckets.json")
+    first = CostLimiter(10, 1, FileBucketStore(path))
+    second = CostLimiter(10, 1, FileBucketStore(path))
+    assert first.charge("a", 8)[0]
+    assert not second.charge("a", 8)[0]
+
+
+def test_full_buckets_are_pruned(clock, tmp_path):
+    store = FileBucketStore(str(tmp_path / "buckets.json"))
+    limiter = CostLimiter(10, 1, store)
+    limiter.charge("a", 5)
+    clock[0] += 60
+    limiter.charge("b", 1)
+    with store.buckets() as buckets:
+        assert set(buckets) == {"b"}
@@ -0,0 +1,26 @@
+from cpu_governor import plan_cpu_layout
+
+
+def test_cores_split_between_workers_and_analyses():
+    layout = plan_cpu_layout(list(range(8)), workers=2, worker_index=1)
+    assert layout["cpus_per_worker"] == 4
+    assert layout["pose_pool_size"] == 2
+    assert layout["threads_per_analysis"] == 2
+    assert layout["affinity"] is None
+
+
+def test_pinning_gives_each_worker_its_own_slice():
+    cpus = list(range(8))
+    slices = [plan_cpu_layout(cpus, workers=2, worker_index=i, pin=True)["affinity"] for i in range(2)]
+    assert slices == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+
+def test_explicit_pool_size_and_small_machines():
+    assert plan_cpu_layout(list(range(8)), workers=1, pose_pool_size=8)["threads_per_analysis"] == 1
+    layout = plan_cpu_layout([0], workers=4, pin=True)
+    assert layout["cpus_per_worker"] == 1 and layout["pose_pool_size"] == 1
+    assert layout["affinity"] is None  # more workers than cores: slices would overlap
+
+
+def test_pool_size_is_capped_at_four():
+    assert plan_cpu_layout(list(range(64)), workers=1)["pose_pool_size"] == 4
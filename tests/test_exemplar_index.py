@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from exemplar_index import PHASE_NAMES, ExemplarIndex, pose_vector, write_exemplar_index
+from pose_features import NUM_LANDMARKS, labelToIdx, save_feature_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    #Random poses spread over every phase and label, enough rows for a multi-level tree
+    rng = np.random.default_rng(0)
+    n = 400
+    cache = {
+        "hashes": np.array([f"h{i}" for i in range(n)]),
+        "paths": np.array([f"dataset\\butter\\img_{i}.jpg" for i in range(n)]),
+        "keypoints": rng.random((n, NUM_LANDMARKS, 4), dtype=np.float32),
+        "phase": rng.integers(0, 3, n).astype(np.int8),
+        "label": rng.integers(0, 2, n).astype(np.int8),
+        "no_pose_hashes": np.array([], dtype=str),
+    }
+    path = tmp_path / "pose_features.npz"
+    save_feature_cache(str(path), cache)
+    return path, cache
+
+
+def brute_force(cache, query, phase, k, label="butter"):
+    rows = np.nonzero((cache["phase"] == phase) & (cache["label"] == labelToIdx[label]))[0]
+    points = np.stack([pose_vector(kp) for kp in cache["keypoints"][rows]])
+    dists = np.sqrt(((points - pose_vector(query)) ** 2).sum(axis=1))
+    nearest = np.argsort(dists)[:k]
+    return [str(cache["hashes"][rows[i]]) for i in nearest], dists[nearest]
+
+
+def test_query_matches_brute_force_knn(tmp_path, cache):
+    cache_path, data = cache
+    out = tmp_path / "exemplar_index.npz"
+    write_exemplar_index(str(cache_path), str(out), leaf_size=8)
+    index = ExemplarIndex(out)
+
+    rng = np.random.default_rng(1)
+    for phase_name, phase in PHASE_NAMES.items():
+        for _ in range(10):
+            query = rng.random((NUM_LANDMARKS, 4), dtype=np.float32)
+            for k in (1, 5):
+                found = index.query(query, phase_name, k=k)
+                ids, dists = brute_force(data, query, phase, k)
+                assert [hit["id"] for hit in found] == ids
+                np.testing.assert_allclose([hit["distance"] for hit in found], dists, atol=1e-4)
+    assert found[0]["name"].startswith("img_")
+
+
+def test_query_of_indexed_pose_finds_itself_and_respects_label(tmp_path, cache):
+    cache_path, data = cache
+    out = tmp_path / "broke_index.npz"
+    write_exemplar_index(str(cache_path), str(out), label="broke", leaf_size=8)
+    index = ExemplarIndex(out)
+
+    row = int(np.nonzero((data["phase"] == PHASE_NAMES["set point"]) & (data["label"] == labelToIdx["broke"]))[0][0])
+    hit = index.query(data["keypoints"][row], "set point", k=1)[0]
+    assert hit["id"] == data["hashes"][row] and hit["distance"] == 0.0
+
+    # k larger than the phase returns every exemplar of the label
+    count = index.counts["set point"]
+    assert len(index.query(data["keypoints"][row], "set point", k=count + 10)) == count
+    assert index.query(data["keypoints"][row], "unknown phase") == []
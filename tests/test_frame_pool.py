@@ -0,0 +1,43 @@
+import numpy as np
+
+from frame_pool import FrameBufferPool
+
+
+def test_released_buffers_are_reused():
+    pool = FrameBufferPool(max_mb=1)
+    with pool.lease() as lease:
+        first = lease.acquire((4, 4, 3))
+    with pool.lease() as lease:
+        assert lease.acquire((4, 4, 3)) is first
+    stats = pool.stats()
+    assert stats["allocated"] == 1 and stats["reused"] == 1 and stats["in_use"] == 0
+
+
+def test_release_except_keeps_selected_frames():
+    pool = FrameBufferPool(max_mb=1)
+    lease = pool.lease()
+    frames = [lease.acquire((2, 2)) for _ in range(3)]
+    lease.release_except([frames[1]])
+    assert pool.stats()["in_use"] == 1
+    assert lease.acquire((2, 2)) is not frames[1]
+    lease.release()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_give_back_ignores_foreign_buffers():
+    pool = FrameBufferPool(max_mb=1)
+    lease = pool.lease()
+    buffer = lease.acquire((2, 2))
+    lease.give_back(np.empty((2, 2), np.uint8))
+    assert pool.stats()["in_use"] == 1
+    lease.give_back(buffer)
+    assert pool.stats()["in_use"] == 0
+
+
+def test_idle_buffers_are_evicted_over_budget():
+    pool = FrameBufferPool(max_mb=1)
+    with pool.lease() as lease:
+        for _ in range(3):
+            lease.acquire((512, 1024))  # 0.5 MB each
+    stats = pool.stats()
+    assert stats["evicted"] == 1 and stats["free_mb"] == 1.0
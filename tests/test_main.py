@@ -0,0 +1,51 @@
+import time
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from backend import main
+from classifier_pool import PoseClassifierPool
+
+
+@pytest.mark.parametrize("workers, expected", [("1", "5/minute"), ("2", "3/minute"), ("4", "2/minute"), ("8", "1/minute")])
+def test_worker_limit_splits_memory_limits_between_workers(monkeypatch, workers, expected):
+    monkeypatch.setenv("WEB_CONCURRENCY", workers)
+    assert main.worker_limit("5/minute")() == expected
+
+
+def test_worker_limit_keeps_shared_storage_limits(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setattr(main, "RATE_LIMIT_STORAGE_URI", "redis://localhost:6379")
+    assert main.worker_limit("5/minute")() == "5/minute"
+
+
+def test_run_queued_bounds_concurrency_to_the_slots(monkeypatch):
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def work(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return i
+
+    async def run():
+        monkeypatch.setattr(main, "analysis_slots", asyncio.Semaphore(2))
+        return await asyncio.gather(*[main.run_queued(work, i) for i in range(6)])
+
+    assert asyncio.run(run()) == list(range(6))
+    assert peak[0] == 2
+
+
+def test_pool_wait_is_bounded_by_pool_timeout(monkeypatch, tmp_path):
+    pool = PoseClassifierPool(size=1, factory=object)
+    monkeypatch.setattr(main, "classifier_pool", pool)
+    held = pool.checkout()  # e.g. taken by a live socket or a single /analyze
+    with pytest.raises(HTTPException) as err:
+        main.extract_phase_features("missing.mp4", tmp_path, pool_timeout=0.05)
+    assert err.value.status_code == 503
+    pool.checkin(held)
@@ -0,0 +1,60 @@
+import threading
+
+import numpy as np
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+class RecordingModel:
+    #Row sums plus a None output, like predict_shot_quality_batch without confidences
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, rows):
+        self.calls.append(len(rows))
+        if self.fail:
+            raise RuntimeError("forward failed")
+        return rows.sum(axis=1), None
+
+
+def test_concurrent_callers_get_their_own_slices():
+    model = RecordingModel()
+    # the batch is full once all 6 rows are pending, long before max_wait_ms
+    batcher = MicroBatcher(model, max_items=6, max_wait_ms=5000)
+    inputs = [np.full((n, 2), i, dtype=np.float32) for i, n in enumerate((1, 2, 3))]
+    results = [None] * len(inputs)
+
+    def call(i):
+        results[i] = batcher(inputs[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(inputs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    batcher.close()
+
+    assert model.calls == [6]
+    for rows, (sums, confs) in zip(inputs, results):
+        np.testing.assert_array_equal(sums, rows.sum(axis=1))
+        assert confs is None
+    stats = batcher.stats()
+    assert stats["batches"] == 1 and stats["requests"] == 3 and stats["max_batch_rows"] == 6
+
+
+def test_forward_error_reaches_every_caller_in_the_batch():
+    model = RecordingModel(fail=True)
+    batcher = MicroBatcher(model, max_items=3, max_wait_ms=5000)
+    futures = [batcher.submit(np.zeros((1, 2))) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="forward failed"):
+            future.result(timeout=5)
+    assert model.calls == [3]
+
+    #the worker survives the failure and serves the next batch
+    model.fail = False
+    sums, _ = batcher(np.ones((3, 2)))
+    batcher.close()
+    np.testing.assert_array_equal(sums, [2.0, 2.0, 2.0])
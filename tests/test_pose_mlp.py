@@ -0,0 +1,23 @@
+import json
+
+import torch
+
+from pose_mlp import PoseMLP, load_pose_mlp
+
+
+def test_layer_sizes_come_from_the_training_sidecar(tmp_path):
+    weights = tmp_path / "broke_jump_shot_detector_weights_v9.pth"
+    torch.save(PoseMLP(hidden_dim1=32, hidden_dim2=16).state_dict(), weights)
+    with open(weights.with_suffix(".json"), "w") as f:
+        json.dump({"params": {"hidden_dim1": 32, "hidden_dim2": 16, "dropout": 0.1}}, f)
+
+    model = load_pose_mlp(weights)
+    assert not model.training
+    assert model.net[0].out_features == 32 and model.net[4].out_features == 16
+    assert model(torch.zeros(3, 135)).shape == (3,)
+
+
+def test_weights_without_sidecar_use_default_sizes(tmp_path):
+    weights = tmp_path / "legacy.pth"
+    torch.save(PoseMLP().state_dict(), weights)
+    assert load_pose_mlp(weights).net[0].out_features == 128
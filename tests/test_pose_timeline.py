@@ -0,0 +1,29 @@
+import io
+import zipfile
+
+import numpy as np
+
+import pose_timeline
+from pose_timeline import memmap_npz
+
+
+def test_memmap_npz_maps_stored_members_and_reads_the_rest(tmp_path, monkeypatch):
+    path = tmp_path / "mixed.npz"
+    np.savez(path, stored=np.arange(6, dtype=np.float32).reshape(2, 3), header=np.array("{}"), empty=np.zeros(0))
+    # add a compressed member next to the stored ones
+    buffer = io.BytesIO()
+    np.save(buffer, np.array([7, 8, 9], dtype=np.int16))
+    with zipfile.ZipFile(path, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("packed.npy", buffer.getvalue())
+
+    loads = []
+    real_load = np.load
+    monkeypatch.setattr(pose_timeline.np, "load", lambda *a, **k: loads.append(a) or real_load(*a, **k))
+    arrays = memmap_npz(path)
+
+    assert isinstance(arrays["stored"], np.memmap)
+    assert arrays["stored"].tolist() == [[0, 1, 2], [3, 4, 5]]
+    assert str(arrays["header"]) == "{}"
+    assert arrays["empty"].shape == (0,)
+    assert arrays["packed"].tolist() == [7, 8, 9]
+    assert len(loads) == 1  # every fallback member comes from one archive handle
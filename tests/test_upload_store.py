@@ -0,0 +1,88 @@
+import time
+import hashlib
+
+import pytest
+
+from upload_store import UploadStore, UploadError, merge_ranges, missing_ranges
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / "uploads"), max_bytes=1 << 20, max_chunk_bytes=4096, ttl_s=60)
+
+
+def test_range_helpers():
+    assert merge_ranges([[0, 10], [20, 30]], 10, 20) == [[0, 30]]
+    assert merge_ranges([[0, 10]], 5, 8) == [[0, 10]]
+    assert missing_ranges([[0, 10], [20, 30]], 40) == [[10, 20], [30, 40]]
+
+
+def test_resume_after_lost_chunks(store):
+    upload_id = store.create("shot.MP4", len(DATA), hashlib.sha256(DATA).hexdigest())["upload_id"]
+    store.write_chunk(upload_id, 0, DATA[:4096])
+    store.write_chunk(upload_id, 8192, DATA[8192:])
+    status = store.get(upload_id)
+    assert status["received"] == len(DATA) - 4096
+    assert status["missing"] == [[4096, 8192]]
+    with pytest.raises(UploadError) as err:
+        with store.finalizing(upload_id):
+            pass
+    assert err.value.status == 409
+
+    # a retried chunk is harmless
+    store.write_chunk(upload_id, 0, DATA[:4096])
+    store.write_chunk(upload_id, 4096, DATA[4096:8192])
+    with store.finalizing(upload_id) as (video_path, cached):
+        assert cached is None and video_path.endswith("video.mp4")
+        with open(video_path, "rb") as f:
+            assert f.read() == DATA
+        store.set_result(upload_id, {"score": 7})
+
+    with store.finalizing(upload_id) as (video_path, cached):
+        assert video_path is None and cached == {"score": 7}
+    with pytest.raises(UploadError) as err:
+        store.write_chunk(upload_id, 0, DATA[:10])
+    assert err.value.status == 409
+
+
+def test_checksum_mismatch_resets_ranges(store):
+    upload_id = store.create("shot.mp4", len(DATA), "0" * 64)["upload_id"]
+    for offset in range(0, len(DATA), 4096):
+        store.write_chunk(upload_id, offset, DATA[offset:offset + 4096])
+    with pytest.raises(UploadError) as err:
+        with store.finalizing(upload_id):
+            pass
+    assert err.value.status == 422
+    assert store.get(upload_id)["missing"] == [[0, len(DATA)]]
+
+
+def test_failed_analysis_reopens_upload(store):
+    upload_id = store.create("shot.mp4", 10, None)["upload_id"]
+    store.write_chunk(upload_id, 0, DATA[:10])
+    with pytest.raises(RuntimeError):
+        with store.finalizing(upload_id):
+            raise RuntimeError("analysis failed")
+    assert store.get(upload_id)["state"] == "uploading"
+    with store.finalizing(upload_id) as (video_path, cached):
+        assert video_path is not None
+
+
+def test_chunk_validation(store):
+    upload_id = store.create("shot.mp4", 100, None)["upload_id"]
+    for offset, data, status in [(-1, b"x", 400), (0, b"", 400), (0, b"x" * 5000, 413), (90, b"x" * 20, 416)]:
+        with pytest.raises(UploadError) as err:
+            store.write_chunk(upload_id, offset, data)
+        assert err.value.status == status
+    with pytest.raises(UploadError) as err:
+        store.get("../etc")
+    assert err.value.status == 404
+
+
+def test_idle_uploads_are_collected(store):
+    upload_id = store.create("shot.mp4", 100, None)["upload_id"]
+    assert store.collect_garbage() == 0
+    assert store.collect_garbage(now=time.time() + 120) == 1
+    with pytest.raises(UploadError):
+        store.get(upload_id)
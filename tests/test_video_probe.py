@@ -0,0 +1,49 @@
+from video_probe import plan_analysis, estimate_cost_s, DEFAULT_ADMISSION_POLICY
+
+
+def meta(duration_s=5.0, fps=30.0, width=1280, height=720):
+    return {"fps": fps, "frame_count": int(duration_s * fps), "duration_s": duration_s,
+            "width": width, "height": height, "codec": "avc1"}
+
+
+def test_short_clip_is_accepted_unchanged():
+    plan = plan_analysis(meta())
+    assert plan["action"] == "accept"
+    assert (plan["start_s"], plan["end_s"], plan["target_fps"]) == (0.0, 5.0, 30.0)
+    assert plan["estimated_frames"] == 150
+    assert plan["adjustments"] == []
+
+
+def test_unreadable_and_too_long_videos_are_rejected():
+    assert plan_analysis(None)["status"] == 400
+    plan = plan_analysis(meta(duration_s=600))
+    assert plan["action"] == "reject" and plan["status"] == 413
+
+
+def test_start_past_the_end_is_rejected():
+    assert plan_analysis(meta(), start_s=6.0)["status"] == 400
+
+
+def test_long_window_is_capped():
+    plan = plan_analysis(meta(duration_s=60))
+    assert plan["end_s"] - plan["start_s"] == 15.0
+    assert plan["adjustments"]
+
+
+def test_high_fps_lowers_rate_to_fit_frame_budget():
+    plan = plan_analysis(meta(duration_s=10, fps=240), policy={"target_fps": 0, "max_cost_s": 1000})
+    assert plan["estimated_frames"] <= DEFAULT_ADMISSION_POLICY["max_frames"]
+    assert plan["target_fps"] == 45.0
+
+
+def test_cost_budget_shortens_window():
+    plan = plan_analysis(meta(duration_s=15), policy={"max_cost_s": 5})
+    assert plan["action"] == "accept"
+    assert plan["estimated_cost_s"] <= 5.0 + 1e-6
+    assert plan["end_s"] < 15.0
+
+
+def test_estimate_cost_counts_decode_and_pose():
+    policy = dict(DEFAULT_ADMISSION_POLICY, pose_ms_per_frame=50.0, decode_ms_per_mpixel=1.0)
+    # 2 s at 30 fps source, 10 fps analyzed, 1 Mpixel: 60 ms decode + 1000 ms pose
+    assert abs(estimate_cost_s(2.0, 30.0, 10.0, 1000, 1000, policy) - 1.06) < 1e-9
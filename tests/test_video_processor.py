@@ -0,0 +1,80 @@
+from conftest import ScriptedClassifier, standing_pose
+from video_processor import VideoProcessor, temporal_nms
+
+
+def test_temporal_nms_keeps_local_peaks_best_first():
+    timestamps = [0.00, 0.05, 0.10, 0.50, 0.55, 1.00]
+    confs = [0.6, 0.9, 0.7, 0.8, 0.85, 0.5]
+    assert temporal_nms(timestamps, confs, 0.15) == [1, 4, 5]
+
+
+def test_temporal_nms_window_is_exclusive():
+    assert temporal_nms([0.0, 0.15], [0.9, 0.8], 0.15) == [0, 1]
+    assert temporal_nms([0.0, 0.149], [0.9, 0.8], 0.15) == [0]
+
+
+def test_temporal_nms_disabled_returns_every_index_sorted():
+    assert temporal_nms([0.0, 0.01, 0.02], [0.1, 0.3, 0.2], None) == [1, 2, 0]
+    assert temporal_nms([], [], 0.15) == []
+
+
+def _processor(tmp_path, clip, script, **kwargs):
+    return VideoProcessor(clip, str(tmp_path / "out"), classifier=ScriptedClassifier(script), **kwargs)
+
+
+def test_interpolation_fills_short_gap(tmp_path, write_clip):
+    clip = write_clip(10)
+    script = {i: ("Set point", 0.95, standing_pose(0.3 + 0.01 * i)) for i in range(10) if i != 6}
+    vp = _processor(tmp_path, clip, script, gap_fill_s=0.2)
+    frames = vp.extract_frames()
+
+    gap = frames[6]
+    assert gap["interpolated"] is True
+    assert gap["phase_raw"] == "No pose detected"
+    # linear between frames 5 and 7
+    assert abs(gap["landmarks"]["RIGHT_WRIST"]["y"] - 0.36) < 1e-6
+    assert not any(rec["interpolated"] for i, rec in enumerate(frames) if i != 6)
+
+
+def test_interpolation_leaves_long_gap(tmp_path, write_clip):
+    clip = write_clip(10)
+    script = {i: ("Set point", 0.95, standing_pose()) for i in (0, 1, 2, 8, 9)}
+    vp = _processor(tmp_path, clip, script, gap_fill_s=0.1)
+    frames = vp.extract_frames()
+    assert all(frames[i]["landmarks"] is None for i in range(3, 8))
+    assert not any(rec["interpolated"] for rec in frames)
+
+
+def test_interpolated_frames_never_become_candidates(tmp_path, write_clip):
+    # the gap frame's smoothed confidence (~0.76) comes from its 0.95 neighbours alone
+    clip = write_clip(10)
+    script = {i: ("Set point", 0.95, standing_pose(0.3)) for i in range(10) if i != 6}
+    vp = _processor(tmp_path, clip, script, gap_fill_s=0.2, nms_window_s=None)
+    frames = vp.extract_frames()
+    assert frames[6]["interpolated"] and frames[6]["phase_conf_smooth"] > 0.7
+
+    candidates = [c["frame_idx"] for phase in vp._collect_phase_candidates() for c in phase]
+    assert 6 not in candidates
+    assert sorted(candidates) == [0, 1, 2, 3, 4, 5, 7, 8, 9]
+
+
+def test_target_fps_stride_never_exceeds_target(tmp_path, write_clip):
+    # (source fps, analyzed frames of a 12-frame clip at target 30 fps)
+    for fps, analyzed in [(30.0, 12), (42.0, 6), (60.0, 6), (100.0, 3)]:
+        vp = _processor(tmp_path, write_clip(12, fps), {})
+        assert len(vp.extract_frames(target_fps=30)) == analyzed
+
+
+def test_motion_features_match_across_frame_rates(tmp_path, write_clip):
+    # the wrist rises at the same speed per second in every clip
+    def motion(fps, target_fps=None):
+        script = {i: ("Set point", 0.9, standing_pose(0.3 + 0.3 * i / fps)) for i in range(12)}
+        frames = _processor(tmp_path, write_clip(12, fps), script).extract_frames(target_fps=target_fps)
+        return frames[2]["vel_wrist_y"], frames[2]["pose_delta"]
+
+    reference = motion(30.0)
+    assert reference[0] != 0.0 and reference[1] != 0.0
+    for fps, target_fps in [(60.0, None), (60.0, 30.0), (120.0, None)]:
+        vel, delta = motion(fps, target_fps)
+        assert abs(vel - reference[0]) < 1e-6 * abs(reference[0]) + 1e-9
+        assert abs(delta - reference[1]) < 1e-6 * abs(reference[1]) + 1e-9
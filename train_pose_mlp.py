@@ -0,0 +1,206 @@
+#Headless trainer for PoseMLP (script version of broke_detector_train.ipynb, Steps 4-8)
+#Loads cached features from pose_features.py into contiguous tensors once, runs k-fold
+#cross-validation with one process per fold, then trains on the train split and saves
+#versioned weights that backend/main.py loads via MODEL_WEIGHTS_PATH.
+#
+#Usage: python train_pose_mlp.py pose_features.npz [--folds 5] [--epochs 20] [--version v7]
+import os
+import re
+import json
+import time
+import argparse
+import numpy as np
+import torch
+import torch.nn as nn
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pose_features import load_features, phaseToIdx
+from pose_mlp import PoseMLP
+
+WEIGHTS_DIR = "MLweights"
+WEIGHTS_PREFIX = "broke_jump_shot_detector_weights_"
+
+# same hyperparameters as the notebook
+DEFAULTS = {
+    "epochs": 20,
+    "batch_size": 16,
+    "lr": 1e-3,
+    "weight_decay": 1e-5,
+    "hidden_dim1": 128,
+    "hidden_dim2": 64,
+    "dropout": 0.2,
+}
+
+
+def stratified_folds(y, phase, k, seed=0):
+    #Split indices into k folds, keeping the label/phase mix roughly equal in each
+    rng = np.random.default_rng(seed)
+    folds = [[] for _ in range(k)]
+    strata = y * len(phaseToIdx) + phase
+    for stratum in np.unique(strata):
+        idx = rng.permutation(np.nonzero(strata == stratum)[0])
+        for i, chunk in enumerate(np.array_split(idx, k)):
+            folds[(i + stratum) % k].extend(chunk.tolist())
+    return [np.array(sorted(f), dtype=np.int64) for f in folds]
+
+
+def train_model(X, y, params, seed=0, device="cpu", log_prefix="[train]", X_val=None, y_val=None):
+    """
+    X, y: contiguous float32 / float32 tensors already on `device`.
+    Batches are index slices of X, so no per-sample tensors are built.
+    Returns the trained model and per-epoch logs.
+    """
+    torch.manual_seed(seed)
+    model = PoseMLP(input_dim=X.shape[1], hidden_dim1=params["hidden_dim1"], hidden_dim2=params["hidden_dim2"],
+                    dropout=params["dropout"], output_dim=1).to(device)
+    criterion = nn.BCEWithLogitsLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=params["lr"], weight_decay=params["weight_decay"])
+    batch_size = params["batch_size"]
+    n = X.shape[0]
+    generator = torch.Generator().manual_seed(seed)
+
+    history = []
+    for epoch in range(params["epochs"]):
+        start = time.perf_counter()
+        model.train()
+        perm = torch.randperm(n, generator=generator).to(device)
+        total_loss = 0.0
+        num_batches = 0
+        # drop_last like the notebook's DataLoader (BatchNorm needs > 1 sample)
+        for b in range(0, n - batch_size + 1, batch_size):
+            idx = perm[b:b + batch_size]
+            predictions = model(X[idx])
+            loss = criterion(predictions, y[idx])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+            num_batches += 1
+        entry = {"epoch": epoch + 1, "train_loss": total_loss / max(1, num_batches)}
+        if X_val is not None and len(X_val):
+            entry["val_loss"], entry["val_accuracy"] = evaluate(model, X_val, y_val, criterion)
+        entry["seconds"] = time.perf_counter() - start
+        history.append(entry)
+        val = f", Val Loss: {entry['val_loss']:.4f}, Val Acc: {entry['val_accuracy'] * 100:.1f}%" if "val_loss" in entry else ""
+        print(f"{log_prefix} Epoch {epoch + 1}/{params['epochs']}, Train Loss: {entry['train_loss']:.4f}{val} ({entry['seconds'] * 1000:.0f} ms)")
+    return model, history
+
+
+def evaluate(model, X, y, criterion=None):
+    model.eval()
+    with torch.no_grad():
+        logits = model(X)
+        loss = (criterion or nn.BCEWithLogitsLoss())(logits, y).item()
+        accuracy = ((torch.sigmoid(logits) > 0.5).float() == y).float().mean().item()
+    return loss, accuracy
+
+
+def _run_fold(args):
+    #Runs in a worker process; one torch thread per fold so folds don't fight over cores
+    fold, X_np, y_np, train_idx, val_idx, params, seed = args
+    torch.set_num_threads(1)
+    X = torch.from_numpy(X_np)
+    y = torch.from_numpy(y_np)
+    start = time.perf_counter()
+    _, history = train_model(X[train_idx], y[train_idx], params, seed=seed + fold,
+                             log_prefix=f"[fold {fold + 1}]", X_val=X[val_idx], y_val=y[val_idx])
+    return {
+        "fold": fold + 1,
+        "val_loss": history[-1]["val_loss"],
+        "val_accuracy": history[-1]["val_accuracy"],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def cross_validate(X, y, phase, params, k=5, workers=None, seed=0):
+    folds = stratified_folds(y.astype(np.int64), phase, k, seed)
+    jobs = []
+    for fold in range(k):
+        val_idx = folds[fold]
+        train_idx = np.concatenate([folds[j] for j in range(k) if j != fold])
+        jobs.append((fold, X, y, train_idx, val_idx, params, seed))
+    # spawn: fresh interpreters, no inherited torch thread pools
+    with ProcessPoolExecutor(max_workers=workers or min(k, os.cpu_count() or 1), mp_context=get_context("spawn")) as pool:
+        results = list(pool.map(_run_fold, jobs))
+    accs = np.array([r["val_accuracy"] for r in results])
+    print(f"[cv] {k}-fold accuracy: {accs.mean() * 100:.1f}% +/- {accs.std() * 100:.1f}%")
+    return results
+
+
+def next_weights_version(weights_dir=WEIGHTS_DIR):
+    #v<N+1> after the highest existing broke_jump_shot_detector_weights_v<N>.pth
+    versions = [0]
+    if os.path.isdir(weights_dir):
+        for name in os.listdir(weights_dir):
+            match = re.fullmatch(re.escape(WEIGHTS_PREFIX) + r"v(\d+)\.pth", name)
+            if match:
+                versions.append(int(match.group(1)))
+    return f"v{max(versions) + 1}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train PoseMLP from cached pose features")
+    parser.add_argument("features", help=".npz written by pose_features.py")
+    parser.add_argument("--folds", type=int, default=5, help="k for cross-validation (0 to skip)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel fold processes")
+    parser.add_argument("--test-size", type=float, default=0.1, help="held-out fraction for the final model")
+    parser.add_argument("--version", default=None, help="weights version tag (default: next vN in MLweights)")
+    parser.add_argument("--weights-dir", default=WEIGHTS_DIR)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--seed", type=int, default=42)
+    for key, value in DEFAULTS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+    params = {key: getattr(args, key) for key in DEFAULTS}
+
+    X_np, y_np, phase = load_features(args.features)
+    X_np = np.ascontiguousarray(X_np, dtype=np.float32)
+    y_np = y_np.astype(np.float32)
+    print(f"[train] Loaded {len(X_np)} samples from {args.features}")
+
+    cv_results = None
+    if args.folds and args.folds > 1:
+        cv_results = cross_validate(X_np, y_np, phase, params, args.folds, args.workers, args.seed)
+
+    # final model: train on everything but a held-out test split
+    rng = np.random.default_rng(args.seed)
+    perm = rng.permutation(len(X_np))
+    n_test = int(round(len(X_np) * args.test_size))
+    test_idx, train_idx = perm[:n_test], perm[n_test:]
+    X = torch.from_numpy(X_np).to(args.device)
+    y = torch.from_numpy(y_np).to(args.device)
+    start = time.perf_counter()
+    model, history = train_model(X[train_idx], y[train_idx], params, seed=args.seed, device=args.device)
+    train_seconds = time.perf_counter() - start
+
+    test_accuracy = None
+    if n_test:
+        _, test_accuracy = evaluate(model, X[test_idx], y[test_idx])
+        print(f"[train] Test Accuracy: {test_accuracy * 100:.1f}% ({n_test} samples)")
+
+    version = args.version or next_weights_version(args.weights_dir)
+    os.makedirs(args.weights_dir, exist_ok=True)
+    weights_path = os.path.join(args.weights_dir, f"{WEIGHTS_PREFIX}{version}.pth")
+    torch.save(model.cpu().state_dict(), weights_path)
+
+    # metadata next to the weights so each version can be traced back to its run
+    metadata = {
+        "version": version,
+        "created": datetime.now().isoformat(),
+        "features": os.path.abspath(args.features),
+        "samples": int(len(X_np)),
+        "params": params,
+        "seed": args.seed,
+        "cv": cv_results,
+        "test_accuracy": test_accuracy,
+        "train_seconds": train_seconds,
+        "epochs": history,
+    }
+    with open(os.path.join(args.weights_dir, f"{WEIGHTS_PREFIX}{version}.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+    print(f"[train] Saved weights to {weights_path} (load with MODEL_WEIGHTS_PATH={weights_path})")
+
+
+if __name__ == "__main__":
+    main()
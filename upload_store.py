@@ -0,0 +1,265 @@
+# upload_store.py
+#Staging area for resumable chunked uploads. Each upload is a directory holding the partially written
+#video and a meta.json with the byte ranges received so far. All state lives on disk and every update
+#holds an flock on the upload's lock file, so chunks of one upload may land on different worker processes.
+#Writing a chunk at an offset is idempotent: a retried chunk overwrites the same bytes.
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import hashlib
+from contextlib import contextmanager
+
+UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+DATA_NAME = "data.part"
+
+
+class UploadError(Exception):
+    #status mirrors the HTTP status the API should answer with
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def merge_ranges(ranges, start, end):
+    #Adds [start, end) to a sorted list of disjoint [start, end) ranges, merging touching ones
+    merged = []
+    for s, e in sorted(ranges + [[start, end]]):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return merged
+
+
+def missing_ranges(ranges, size):
+    missing, pos = [], 0
+    for s, e in ranges:
+        if s > pos:
+            missing.append([pos, s])
+        pos = max(pos, e)
+    if pos < size:
+        missing.append([pos, size])
+    return missing
+
+
+class UploadStore:
+    def __init__(self, root, max_bytes, max_chunk_bytes, ttl_s=3600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_chunk_bytes = max_chunk_bytes
+        self.ttl_s = ttl_s  # uploads untouched this long are removed by collect_garbage()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, upload_id):
+        if not UPLOAD_ID_RE.match(upload_id or ""):
+            raise UploadError(404, "Upload not found")
+        return os.path.join(self.root, upload_id)
+
+    @contextmanager
+    def _locked(self, upload_id):
+        #Yields the upload's meta dict under an exclusive lock; changes to it are written back, even
+        #when the block raises (e.g. after resetting the ranges of a corrupted upload)
+        path = self._dir(upload_id)
+        try:
+            lock = open(os.path.join(path, "lock"), "a+")
+        except FileNotFoundError:
+            raise UploadError(404, "Upload not found")
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            meta_path = os.path.join(path, "meta.json")
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except FileNotFoundError:
+                raise UploadError(404, "Upload not found")
+            before = json.dumps(meta, sort_keys=True)
+            try:
+                yield meta
+            finally:
+                if json.dumps(meta, sort_keys=True) != before:
+                    meta["updated_at"] = time.time()
+                    tmp = meta_path + ".tmp"
+                    with open(tmp, "w") as f:
+                        json.dump(meta, f)
+                    os.replace(tmp, meta_path)
+
+    @staticmethod
+    def status(meta):
+        received = sum(e - s for s, e in meta["ranges"])
+        status = {
+            "upload_id": meta["upload_id"],
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "received": received,
+            "missing": missing_ranges(meta["ranges"], meta["size"]),
+            "state": meta["state"],
+            "expires_at": meta["updated_at"] + meta["ttl_s"],
+        }
+        if meta["state"] == "done":
+            status["result"] = meta["result"]
+        return status
+
+    def create(self, filename, size, sha256=None, source_path=None):
+        """
+        Starts an upload of `size` bytes. With source_path, that (complete) file is moved in instead,
+        e.g. a video already received by another endpoint that should be analyzed later.
+        """
+        if size <= 0:
+            raise UploadError(400, "size must be > 0")
+        if size > self.max_bytes:
+            raise UploadError(413, f"Video file size exceeds the maximum limit of {self.max_bytes // (1024 * 1024)} MB")
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self.root, upload_id)
+        os.makedirs(path)
+        if source_path is not None:
+            shutil.move(source_path, os.path.join(path, DATA_NAME))
+        else:
+            # sparse file of the final size; chunks are written in place at their offsets
+            with open(os.path.join(path, DATA_NAME), "wb") as f:
+                f.truncate(size)
+        now = time.time()
+        meta = {
+            "upload_id": upload_id,
+            "filename": os.path.basename(filename),
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "ranges": [[0, size]] if source_path is not None else [],
+            "state": "uploading",  # uploading -> analyzing -> done
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+            "ttl_s": self.ttl_s,
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return self.status(meta)
+
+    def get(self, upload_id):
+        with self._locked(upload_id) as meta:
+            return self.status(meta)
+
+    def write_chunk(self, upload_id, offset, data):
+        if offset < 0:
+            raise UploadError(400, "offset must be >= 0")
+        if not data:
+            raise UploadError(400, "Empty chunk")
+        if len(data) > self.max_chunk_bytes:
+            raise UploadError(413, f"Chunk exceeds the maximum of {self.max_chunk_bytes // (1024 * 1024)} MB")
+        with self._locked(upload_id) as meta:
+            if meta["state"] != "uploading":
+                raise UploadError(409, "Upload is already finalized")
+            end = offset + len(data)
+            if end > meta["size"]:
+                raise UploadError(416, f"Chunk ends at {end}, past the declared size {meta['size']}")
+            fd = os.open(os.path.join(self._dir(upload_id), DATA_NAME), os.O_WRONLY)
+            try:
+                os.pwrite(fd, data, offset)
+            finally:
+                os.close(fd)
+            meta["ranges"] = merge_ranges(meta["ranges"], offset, end)
+            return self.status(meta)
+
+    @contextmanager
+    def finalizing(self, upload_id):
+        """
+        Marks a complete upload as being analyzed and yields (video path, cached result). If the upload
+        was already analyzed, the cached result is yielded and the path is None. Record the analysis
+        result with set_result() before leaving the block; on error the upload is reopened so the
+        client can retry finalize.
+        """
+        with self._locked(upload_id) as meta:
+            if meta["state"] == "done":
+                cached = meta["result"]
+            elif meta["state"] == "analyzing":
+                raise UploadError(409, "Analysis already in progress")
+            else:
+                cached = None
+                missing = missing_ranges(meta["ranges"], meta["size"])
+                if missing:
+                    raise UploadError(409, f"Upload incomplete, missing {len(missing)} byte ranges")
+                data_path = os.path.join(self._dir(upload_id), DATA_NAME)
+                if meta["sha256"] and _sha256(data_path) != meta["sha256"]:
+                    # some chunk was corrupted in transit; the client has to send everything again
+                    meta["ranges"] = []
+                    raise UploadError(422, "Checksum mismatch, upload the file again")
+                meta["state"] = "analyzing"
+        if cached is not None:
+            yield None, cached
+            return
+
+        data_path = os.path.join(self._dir(upload_id), DATA_NAME)
+        video_path = _video_path(self._dir(upload_id), meta)
+        os.replace(data_path, video_path)
+        try:
+            yield video_path, None
+        except BaseException:
+            with self._locked(upload_id) as meta:
+                if meta["state"] == "analyzing":
+                    os.replace(video_path, data_path)
+                    meta["state"] = "uploading"
+            raise
+
+    def set_result(self, upload_id, result):
+        #Stores the analysis result (so a retried finalize returns it) and drops the video
+        path = self._dir(upload_id)
+        with self._locked(upload_id) as meta:
+            meta["state"] = "done"
+            meta["result"] = result
+            video_path = _video_path(path, meta)
+        if os.path.exists(video_path):
+            os.remove(video_path)
+
+    def delete(self, upload_id):
+        path = self._dir(upload_id)
+        if not os.path.isdir(path):
+            raise UploadError(404, "Upload not found")
+        shutil.rmtree(path, ignore_errors=True)
+
+    def collect_garbage(self, now=None):
+        #Removes uploads idle for longer than their ttl, whatever their state (an "analyzing" upload
+        #that old belongs to a worker that died mid-analysis); returns how many were removed
+        now = now or time.time()
+        removed = 0
+        for upload_id in os.listdir(self.root):
+            if not UPLOAD_ID_RE.match(upload_id):
+                continue
+            try:
+                with self._locked(upload_id) as meta:
+                    stale = now - meta["updated_at"] > meta["ttl_s"]
+            except (UploadError, ValueError):
+                # half-created or corrupt upload: fall back to the directory's age
+                stale = now - os.path.getmtime(os.path.join(self.root, upload_id)) > self.ttl_s
+            if stale:
+                shutil.rmtree(os.path.join(self.root, upload_id), ignore_errors=True)
+                removed += 1
+        return removed
+
+    def stats(self):
+        uploads = [d for d in os.listdir(self.root) if UPLOAD_ID_RE.match(d)]
+        staged = 0
+        for upload_id in uploads:
+            try:
+                for entry in os.scandir(os.path.join(self.root, upload_id)):
+                    if entry.is_file():
+                        staged += entry.stat().st_blocks * 512  # allocated bytes; the data file is sparse
+            except FileNotFoundError:
+                continue  # removed meanwhile
+        return {"uploads": len(uploads), "staged_mb": round(staged / (1024 * 1024), 1)}
+
+
+def _video_path(upload_dir, meta):
+    #Keeps the extension (decoders may rely on it) but never the client's name
+    return os.path.join(upload_dir, "video" + os.path.splitext(meta["filename"])[1].lower())
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
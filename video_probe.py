@@ -0,0 +1,122 @@
+# video_probe.py
+#Reads container metadata (fps, frame count, resolution) without decoding any frames, estimates what a
+#full analysis would cost, and turns that into an admission plan: reject, cap the window, lower the
+#analysis rate, or downscale, so the worst-case cost of a request is bounded before VideoProcessor starts.
+import cv2
+
+DEFAULT_ADMISSION_POLICY = {
+    "max_video_s": 180.0,       # longer uploads are rejected outright
+    "max_window_s": 15.0,       # analysis window is capped to this many seconds from start_s
+    "min_window_s": 1.0,        # if the budget can't cover this much, the upload is rejected
+    "target_fps": 30.0,         # normal analysis rate (TARGET_ANALYSIS_FPS)
+    "min_fps": 10.0,            # analysis rate is never lowered below this
+    "max_frames": 450,          # pose inferences per request
+    "max_side": 1280,           # frames are downscaled so their long side fits (0 disables)
+    "max_cost_s": 30.0,         # estimated seconds of work per request
+    "pose_ms_per_frame": 60.0,  # estimated pose + classification time per analyzed frame
+    "decode_ms_per_mpixel": 1.0,  # estimated decode time per source frame per megapixel
+}
+
+
+def probe_video(video_path):
+    """
+    Container metadata only. Returns None if the file can't be opened.
+    frame_count / duration_s are 0 when the container doesn't report them.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        return None
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC) or 0)
+        return {
+            "fps": round(float(fps), 3),
+            "frame_count": frame_count,
+            "duration_s": round(frame_count / fps, 3) if fps > 0 else 0.0,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0),
+            "codec": "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00") or None,
+        }
+    finally:
+        cap.release()
+
+
+def estimate_cost_s(window_s, source_fps, analysis_fps, width, height, policy):
+    #Every source frame in the window is demuxed/decoded (grab), only analysis_fps of them get pose
+    decode = window_s * source_fps * (width * height / 1e6) * policy["decode_ms_per_mpixel"]
+    pose = window_s * analysis_fps * policy["pose_ms_per_frame"]
+    return (decode + pose) / 1000.0
+
+
+def plan_analysis(meta, start_s=None, end_s=None, policy=None):
+    """
+    meta: probe_video output. Returns a plan dict:
+      action "reject" with status (400/413) and reason, or
+      action "accept" with start_s, end_s, target_fps, max_side, estimated_frames, estimated_cost_s
+      and the list of adjustments made to fit the policy.
+    """
+    p = dict(DEFAULT_ADMISSION_POLICY, **(policy or {}))
+    if meta is None:
+        return {"action": "reject", "status": 400, "reason": "Cannot read video metadata"}
+
+    fps = meta["fps"] or p["target_fps"]
+    duration = meta["duration_s"]
+    width, height = meta["width"], meta["height"]
+    adjustments = []
+
+    if duration and duration > p["max_video_s"]:
+        return {"action": "reject", "status": 413, "probe": meta,
+                "reason": f"Video is {duration:.1f}s long, maximum is {p['max_video_s']:.0f}s. Trim it before uploading"}
+
+    start = start_s or 0.0
+    end = end_s if end_s is not None else (duration or start + p["max_window_s"])
+    if duration:
+        if start >= duration:
+            return {"action": "reject", "status": 400, "probe": meta, "reason": f"start_s is past the end of the video ({duration:.2f}s)"}
+        end = min(end, duration)
+    window = end - start
+
+    if window > p["max_window_s"]:
+        window = p["max_window_s"]
+        adjustments.append(f"window capped to {window:.1f}s from {start:.2f}s")
+
+    # sampling: lower the analysis rate until the pose budget fits (down to min_fps)
+    analysis_fps = min(fps, p["target_fps"]) if p["target_fps"] else fps
+    if window * analysis_fps > p["max_frames"]:
+        lowered = max(min(p["min_fps"], analysis_fps), p["max_frames"] / window)
+        if lowered < analysis_fps:
+            analysis_fps = lowered
+            adjustments.append(f"analysis rate lowered to {analysis_fps:.1f} fps")
+    if window * analysis_fps > p["max_frames"]:
+        window = p["max_frames"] / analysis_fps
+        adjustments.append(f"window capped to {window:.1f}s to fit {p['max_frames']} frames")
+
+    # downscale: decode still runs at full size, everything after it (pose, buffers, JPEGs) doesn't
+    max_side = None
+    if p["max_side"] and max(width, height) > p["max_side"]:
+        max_side = int(p["max_side"])
+        adjustments.append(f"frames downscaled from {width}x{height} to fit {max_side}px")
+
+    cost = estimate_cost_s(window, fps, analysis_fps, width, height, p)
+    if cost > p["max_cost_s"]:
+        per_second = cost / window
+        window = p["max_cost_s"] / per_second
+        if window < p["min_window_s"]:
+            return {"action": "reject", "status": 413, "probe": meta,
+                    "reason": f"Video is too expensive to analyze ({per_second:.1f}s of work per second of video at "
+                              f"{width}x{height}, {fps:.0f} fps)"}
+        adjustments.append(f"window capped to {window:.1f}s to fit the {p['max_cost_s']:.0f}s cost budget")
+        cost = estimate_cost_s(window, fps, analysis_fps, width, height, p)
+
+    return {
+        "action": "accept",
+        "probe": meta,
+        "start_s": round(start, 3),
+        "end_s": round(start + window, 3),
+        "target_fps": round(analysis_fps, 3),
+        "max_side": max_side,
+        "estimated_frames": int(window * analysis_fps),
+        "estimated_cost_s": round(cost, 2),
+        "adjustments": adjustments,
+    }
@@ -1,19 +1,171 @@
 # video_processor.py
 import cv2
 import os
+import json
+import math
+import bisect
+import itertools
 import numpy as np
 from collections import defaultdict, deque
 from pose_classifier import PoseClassifier  # your existing classifier
+from pose_timeline import write_timeline
 from datetime import datetime
 from pathlib import Path
 
+# gaps longer than this are crossed with a seek instead of grabbing frame by frame;
+# a seek still decodes from the previous keyframe, so short gaps are cheaper to grab
+SEEK_THRESHOLD = 60
+
+# motion features (velocities, pose_delta) are expressed per step at this rate,
+# so thresholds tuned on 30 fps clips hold at any source or sampling rate
+REFERENCE_FPS = 30.0
+
+# phase candidates closer than this (seconds) to a more confident one of the same phase are
+# suppressed, so the top-k slots hold distinct poses instead of neighbours of one smoothed peak
+CANDIDATE_NMS_S = 0.15
+
+# landmarks kept per frame (right and left)
+KEYPOINT_NAMES = [
+    "RIGHT_WRIST", "LEFT_WRIST",
+    "RIGHT_ELBOW", "LEFT_ELBOW",
+    "RIGHT_SHOULDER", "LEFT_SHOULDER",
+    "RIGHT_HIP", "LEFT_HIP",
+    "NOSE"
+]
+
+
+def iter_sampled_frames(cap, frame_indices, seek_threshold=SEEK_THRESHOLD, frame_lease=None):
+    """
+    Yield (frame_idx, frame) for ascending `frame_indices` (may be an endless iterator).
+    Skipped frames are only grabbed (demuxed, never retrieved/converted), and gaps longer
+    than `seek_threshold` are crossed with a seek. Stops at the first frame that can't be read.
+    frame_lease: optional frame_pool.FrameLease; frames after the first are decoded into its
+      pooled buffers, which stay valid until the lease is released
+    """
+    pos = 0  # index of the next frame cap.read() would return
+    shape = None
+    for idx in frame_indices:
+        gap = idx - pos
+        if gap < 0 or gap > seek_threshold:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        else:
+            for _ in range(gap):
+                if not cap.grab():
+                    return
+        buffer = frame_lease.acquire(shape) if frame_lease is not None and shape is not None else None
+        ret, frame = cap.read(image=buffer) if buffer is not None else cap.read()
+        if buffer is not None and (not ret or frame is not buffer):
+            # unreadable, or the decoder allocated a new array (frame size changed)
+            frame_lease.give_back(buffer)
+        if not ret:
+            return
+        shape = frame.shape
+        pos = idx + 1
+        yield idx, frame
+
+
+def temporal_nms(timestamps, confs, window_s):
+    """
+    Temporal non-maximum suppression: indices of the candidates that are the most confident within
+    +/- window_s of themselves (greedy, best first). Returned in descending confidence order.
+    """
+    order = sorted(range(len(confs)), key=lambda i: confs[i], reverse=True)
+    if not window_s or window_s <= 0:
+        return order
+    kept, kept_times = [], []  # kept_times sorted for bisect
+    for i in order:
+        t = timestamps[i]
+        pos = bisect.bisect_left(kept_times, t)
+        if (pos < len(kept_times) and kept_times[pos] - t < window_s) or (pos > 0 and t - kept_times[pos - 1] < window_s):
+            continue
+        kept.append(i)
+        kept_times.insert(pos, t)
+    return kept
+
+
+def times_to_frame_indices(target_times, fps):
+    # timestamps (seconds) -> sorted unique frame indices
+    return sorted({max(0, int(round(t * fps))) for t in target_times})
+
+
+# Weights and thresholds used by _score_candidate / find_best_sequence.
+# Hand-tuned defaults; calibrate_scoring.py searches over these and writes a JSON override.
+DEFAULT_SCORING_CONFIG = {
+    # single-candidate scoring
+    "conf_weight": 50.0,
+    "pocket_ideal": 0.15, "pocket_tol": 0.25, "pocket_weight": 20.0, "pocket_upward_weight": 10.0,
+    "set_ideal": -0.05, "set_tol": 0.20, "set_weight": 50.0,
+    "set_pause_vel": 0.3, "set_pause_weight": 35.0,
+    "set_stable_delta": 0.25, "set_stable_weight": 25.0,
+    "set_center_xoff": 0.6, "set_center_weight": 15.0,
+    "ft_ideal": -0.08, "ft_tol": 0.28, "ft_weight": 50.0,
+    "ft_hold_vel": 0.15, "ft_hold_weight": 30.0,
+    "ft_xoff_weight": 10.0,
+    "ft_stable_delta": 0.2, "ft_stable_weight": 20.0,
+    "noise_penalty_weight": 10.0, "noise_penalty_cap": 10.0,
+    # triplet bonuses
+    "min_gap_s": 0.03, "max_gap_s": 2.5,
+    "chrono_bonus_ps": 15.0, "chrono_bonus_sf": 20.0,
+    "height_bonus_ps": 10.0, "height_bonus_sf": 12.0,
+    "set_pause_bonus_vel": 0.06, "set_pause_bonus_delta": 0.12, "set_pause_bonus": 20.0,
+    "ft_hold_bonus_vel": 0.05, "ft_hold_bonus": 12.0,
+    "close_frames": 2, "close_frames_penalty": 10.0,  # in REFERENCE_FPS frames
+    "triplet_min_score": 20.0,
+    # pair fallbacks
+    "pair_ps_height_bonus": 12.0, "pair_ps_pause_vel": 0.1, "pair_ps_pause_bonus": 12.0,
+    "pair_sf_height_bonus": 8.0, "pair_sf_hold_vel": 0.05, "pair_sf_hold_bonus": 8.0,
+    "pair_pf_height_bonus": 5.0,
+    "pair_min_score": 15.0,
+}
+
+
+def load_scoring_config(config=None):
+    """
+    Merge a scoring override (dict or path to a JSON file) over DEFAULT_SCORING_CONFIG.
+    Unknown keys are ignored with a warning.
+    """
+    merged = dict(DEFAULT_SCORING_CONFIG)
+    if config is None:
+        return merged
+    if not isinstance(config, dict):
+        with open(config) as f:
+            config = json.load(f)
+    for key, value in config.items():
+        if key not in merged:
+            print(f"[scoring_config] Ignoring unknown key: {key}")
+            continue
+        merged[key] = value
+    return merged
+
+
 class VideoProcessor:
-    def __init__(self, video_path, output_dir, smooth_window=5):
+    def __init__(self, video_path, output_dir, smooth_window=5, classifier=None, scoring_config=None,
+                 gap_fill_s=None, interp_method="linear", frame_lease=None, lite_classifier=None,
+                 cascade_top_k=8, cascade_radius=1, max_side=None, nms_window_s=CANDIDATE_NMS_S):
         self.video_path = video_path
         self.base_output_dir = Path(output_dir)
-        self.classifier = PoseClassifier()
+        # pass a classifier (e.g. checked out of a PoseClassifierPool) to skip building a new graph
+        self.classifier = classifier if classifier is not None else PoseClassifier()
+        # scoring weights/thresholds: dict or JSON path, merged over DEFAULT_SCORING_CONFIG
+        self.scoring = load_scoring_config(scoring_config)
         self.smooth_window = smooth_window  # frames for smoothing confidences
         self.frames = []  # will hold per-frame dicts
+        self.fps = REFERENCE_FPS  # source fps, set by extract_frames
+        # fill landmark gaps up to gap_fill_s seconds long ("linear" or "spline"); None disables
+        self.gap_fill_s = gap_fill_s
+        self.interp_method = interp_method
+        # decode into pooled buffers (frame_pool.FrameLease); the caller releases the lease when done with the frames
+        self.frame_lease = frame_lease
+        # cascade mode: lite_classifier (e.g. PoseClassifier(model_complexity=0)) scans every frame and
+        # self.classifier only re-runs on the top cascade_top_k frames per phase, +/- cascade_radius frames
+        self.lite_classifier = lite_classifier
+        self.cascade_top_k = cascade_top_k
+        self.cascade_radius = cascade_radius
+        self.cascade_stats = None
+        # downscale decoded frames so their long side is at most max_side pixels (None keeps full size)
+        self.max_side = max_side
+        # temporal NMS window (seconds) for phase candidates; None/0 keeps every candidate
+        self.nms_window_s = nms_window_s
         
         # Prepare output folder
         self.base_output_dir.mkdir(parents=True, exist_ok=True)
@@ -38,78 +190,215 @@ class VideoProcessor:
         return v >= thr
 
     # Stage 1: extract frames + landmarks + classifier
-    def extract_frames(self, sample_rate=1):
+    def extract_frames(self, sample_rate=1, target_times=None, start_s=None, end_s=None, target_fps=None):
         """
         Read video and record per-frame:
           - frame_number, timestamp
           - classifier phase & confidence
           - normalized landmarks (wrist/elbow/shoulder/hip/nose)
-        sample_rate: process every `sample_rate` frame (1 = every frame)
+        sample_rate: process every `sample_rate` frame (1 = every frame); skipped frames are not decoded
+        target_times: optional list of timestamps (seconds) to process instead of a regular stride
+        start_s, end_s: optional trim window (seconds); decoding seeks to start_s and stops after end_s.
+          frame_idx/timestamp stay relative to the original video
+        target_fps: optional effective analysis rate (e.g. 30); high-fps sources are strided down to it
         """
         cap = cv2.VideoCapture(self.video_path)
         if not cap.isOpened():
             raise ValueError(f"Cannot open video: {self.video_path}")
 
         fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-        frame_idx = 0
-        saved = 0
-        print("[extract_frames] Starting frame extraction...")
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if frame_idx % sample_rate != 0:
-                frame_idx += 1
-                continue
-
-            results = self.classifier.detect_pose(frame)
-            phase, conf = self.classifier.classify_shot_phase(results)
-
+        self.fps = fps
+        stride = max(1, int(sample_rate))
+        if target_fps and fps > target_fps:
+            # round the stride up so the effective rate never exceeds target_fps (admission budgets
+            # frames at that rate); the tolerance keeps e.g. 60.0001 / 30 at stride 2
+            stride = max(stride, math.ceil(fps / target_fps - 1e-3))
+        start_idx = max(0, int(round(start_s * fps))) if start_s is not None else 0
+        end_idx = int(end_s * fps) if end_s is not None else None
+        if target_times is not None:
+            frame_indices = [i for i in times_to_frame_indices(target_times, fps) if i >= start_idx]
+        else:
+            frame_indices = itertools.count(start_idx, stride)
+        if end_idx is not None:
+            frame_indices = itertools.takewhile(lambda i: i <= end_idx, frame_indices)
+        print(f"[extract_frames] Starting frame extraction ({fps:.1f} fps source, stride {stride})...")
+
+        scan_classifier = self.lite_classifier or self.classifier
+        for frame_idx, frame in iter_sampled_frames(cap, frame_indices, frame_lease=self.frame_lease):
+            if self.max_side and max(frame.shape[:2]) > self.max_side:
+                frame = self._downscale(frame)
             # default record
             record = {
                 "frame_idx": frame_idx,
                 "timestamp": frame_idx / fps,
-                "phase_raw": phase,        # e.g., "Shot pocket", "Set point", ...
-                "phase_conf": float(conf), # 0.0-1.0
                 "frame": frame,
-                "landmarks": None          # will fill below if available
+                "interpolated": False,     # True when landmarks were reconstructed from neighbours
+                "heavy": self.lite_classifier is None  # landmarks come from the scoring model
             }
-
-            if results and results.pose_landmarks:
-                lm = results.pose_landmarks.landmark
-                # Try to extract key points (right and left)
-                try:
-                    keypoints = {}
-                    for name in [
-                        "RIGHT_WRIST", "LEFT_WRIST",
-                        "RIGHT_ELBOW", "LEFT_ELBOW",
-                        "RIGHT_SHOULDER", "LEFT_SHOULDER",
-                        "RIGHT_HIP", "LEFT_HIP",
-                        "NOSE"
-                    ]:
-                        idx = getattr(self.classifier.mp_pose.PoseLandmark, name).value
-                        keypoints[name] = {
-                            "x": lm[idx].x,
-                            "y": lm[idx].y,
-                            "visibility": getattr(lm[idx], "visibility", 1.0)
-                        }
-                    record["landmarks"] = keypoints
-                except Exception:
-                    record["landmarks"] = None
+            # phase_raw (e.g. "Shot pocket"), phase_conf (0.0-1.0), landmarks (None if no pose)
+            record.update(self._detect(scan_classifier, frame))
 
             self.frames.append(record)
-            frame_idx += 1
 
-            if frame_idx % 50 == 0:
-                print(f"[extract_frames] processed {frame_idx} frames")
+            if len(self.frames) % 50 == 0:
+                print(f"[extract_frames] processed {len(self.frames)} frames (at frame {frame_idx})")
 
         cap.release()
         print(f"[extract_frames] Done. Total processed frames: {len(self.frames)}")
-        # compute normalization and velocities next
+        # reconstruct short landmark gaps, then compute normalization and velocities
+        self._interpolate_landmarks()
         self._compute_normalized_metrics()
+        if self.lite_classifier is not None:
+            self._refine_with_heavy()
         return self.frames
 
+    def _downscale(self, frame):
+        h, w = frame.shape[:2]
+        scale = self.max_side / max(h, w)
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        if self.frame_lease is None:
+            return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        # resize into a pooled buffer and hand the full-size decode buffer straight back
+        small = cv2.resize(frame, size, dst=self.frame_lease.acquire((size[1], size[0]) + frame.shape[2:], frame.dtype),
+                           interpolation=cv2.INTER_AREA)
+        self.frame_lease.give_back(frame)
+        return small
+
+    def _detect(self, classifier, frame):
+        results = classifier.detect_pose(frame)
+        phase, conf = classifier.classify_shot_phase(results)
+        fields = {"phase_raw": phase, "phase_conf": float(conf), "landmarks": None}
+
+        if results and results.pose_landmarks:
+            lm = results.pose_landmarks.landmark
+            # Try to extract key points (right and left)
+            try:
+                keypoints = {}
+                for name in KEYPOINT_NAMES:
+                    idx = getattr(classifier.mp_pose.PoseLandmark, name).value
+                    keypoints[name] = {
+                        "x": lm[idx].x,
+                        "y": lm[idx].y,
+                        "visibility": getattr(lm[idx], "visibility", 1.0)
+                    }
+                fields["landmarks"] = keypoints
+            except Exception:
+                fields["landmarks"] = None
+        return fields
+
+    # Stage 1c (cascade mode): heavy model on the lite scan's best candidate windows
+    def _refine_with_heavy(self):
+        """
+        Picks the top cascade_top_k confidence peaks per phase from the lite timeline (smoothed
+        confidence, temporal NMS over nms_window_s), re-runs self.classifier on them and their
+        +/- cascade_radius neighbours, and marks those records heavy=True. Only heavy records become phase candidates. If the lite scan found no
+        candidates at all, every frame is re-run (same result as heavy-only mode).
+        """
+        phases = ("pocket", "set", "follow")
+        ranked = {p: [] for p in phases}
+        for i, rec in enumerate(self.frames):
+            if rec["landmarks"] is None:
+                continue
+            for p in phases:
+                if p in rec["phase_raw"].lower():
+                    ranked[p].append((rec.get("phase_conf_smooth", rec["phase_conf"]), i))
+
+        selected = set()
+        for p in phases:
+            # distinct confidence peaks, not the neighbours of one peak
+            confs = [conf for conf, _ in ranked[p]]
+            times = [self.frames[i]["timestamp"] for _, i in ranked[p]]
+            for j in temporal_nms(times, confs, self.nms_window_s)[:self.cascade_top_k]:
+                i = ranked[p][j][1]
+                selected.update(range(max(0, i - self.cascade_radius), min(len(self.frames), i + self.cascade_radius + 1)))
+        if not selected:
+            selected = set(range(len(self.frames)))
+
+        for i in sorted(selected):
+            rec = self.frames[i]
+            rec.update(self._detect(self.classifier, rec["frame"]))
+            rec["interpolated"] = False
+            rec["heavy"] = True
+
+        self.cascade_stats = {
+            "frames": len(self.frames),
+            "heavy_inferences": len(selected),
+            "heavy_avoided": len(self.frames) - len(selected),
+        }
+        print(f"[cascade] heavy model on {len(selected)}/{len(self.frames)} frames "
+              f"({self.cascade_stats['heavy_avoided']} heavy inferences avoided)")
+        # heavy landmarks replace the lite ones, so normalization and velocities are recomputed
+        self._compute_normalized_metrics()
+
+    # Stage 1b: temporal reconstruction of missing landmarks
+    def _interpolate_landmarks(self):
+        """
+        Fill frames without landmarks (failed detection) when the observed frames on both
+        sides are at most self.gap_fill_s seconds apart. Filled records get interpolated=True.
+        - "linear": straight-line interpolation in time; observed frames are left untouched
+        - "spline": smoothing spline per coordinate (needs scipy, else falls back to linear);
+          observed x/y are replaced by the smoothed trajectory too, which steadies velocities
+        Interpolated frames keep their "No pose detected" phase and are skipped as candidates,
+        but velocities/pose deltas across the gap are now computed from the reconstruction.
+        """
+        if not self.gap_fill_s or len(self.frames) < 3:
+            return
+        t = np.array([rec["timestamp"] for rec in self.frames])
+        observed = np.array([rec["landmarks"] is not None for rec in self.frames])
+        obs_idx = np.nonzero(observed)[0]
+        if len(obs_idx) < 2:
+            return
+
+        # landmark tensor (frames, keypoints, [x, y, visibility]); NaN where missing
+        L = np.full((len(self.frames), len(KEYPOINT_NAMES), 3), np.nan)
+        for i in obs_idx:
+            lm = self.frames[i]["landmarks"]
+            L[i] = [[lm[name]["x"], lm[name]["y"], lm[name]["visibility"]] for name in KEYPOINT_NAMES]
+
+        # nearest observed frame before/after every frame
+        pos = np.searchsorted(obs_idx, np.arange(len(self.frames)))
+        has_next = pos < len(obs_idx)
+        has_prev = pos > 0
+        next_obs = obs_idx[np.minimum(pos, len(obs_idx) - 1)]
+        prev_obs = obs_idx[np.maximum(pos - 1, 0)]
+        fill = ~observed & has_prev & has_next & ((t[next_obs] - t[prev_obs]) <= self.gap_fill_s)
+        if not fill.any() and self.interp_method != "spline":
+            return
+
+        t_obs = t[obs_idx]
+        recon = L.copy()
+        smooth = None
+        if self.interp_method == "spline":
+            try:
+                from scipy.interpolate import make_smoothing_spline
+                smooth = make_smoothing_spline
+            except ImportError:
+                print("[interpolate] scipy not installed, using linear interpolation")
+        # make_smoothing_spline needs >= 5 strictly increasing samples
+        if smooth is not None and len(obs_idx) >= 5 and np.all(np.diff(t_obs) > 0):
+            targets = observed | fill
+            for k in range(len(KEYPOINT_NAMES)):
+                for c in range(2):
+                    recon[targets, k, c] = smooth(t_obs, L[obs_idx, k, c])(t[targets])
+            # visibility isn't a trajectory; interpolate it linearly
+            for k in range(len(KEYPOINT_NAMES)):
+                recon[fill, k, 2] = np.interp(t[fill], t_obs, L[obs_idx, k, 2])
+            update = targets
+        else:
+            for k in range(len(KEYPOINT_NAMES)):
+                for c in range(3):
+                    recon[fill, k, c] = np.interp(t[fill], t_obs, L[obs_idx, k, c])
+            update = fill
+
+        for i in np.nonzero(update)[0]:
+            self.frames[i]["landmarks"] = {
+                name: {"x": float(recon[i, k, 0]), "y": float(recon[i, k, 1]), "visibility": float(recon[i, k, 2])}
+                for k, name in enumerate(KEYPOINT_NAMES)
+            }
+            if fill[i]:
+                self.frames[i]["interpolated"] = True
+        print(f"[interpolate] Reconstructed landmarks for {int(fill.sum())} frames ({self.interp_method})")
+
     # Stage 2: normalization & velocities
     def _compute_normalized_metrics(self):
         """
@@ -119,6 +408,8 @@ class VideoProcessor:
          - normalized wrist/elbow/head heights relative to torso
          - wrist/elbow x-offset relative to shoulder center and normalized by shoulder_width
          - placeholder for velocities (computed next)
+        Velocities and pose_delta are scaled to a REFERENCE_FPS step, so sampled or
+        high-frame-rate clips produce the same magnitudes as dense 30 fps ones.
         """
         for rec in self.frames:
             lm = rec["landmarks"]
@@ -189,9 +480,12 @@ class VideoProcessor:
                 # compute using raw y coordinates (normalized by current torso)
                 prev_rw_y = prev.get("right_wrist_xy", (0,0))[1]
                 cur_rw_y = rec.get("right_wrist_xy", (0,0))[1]
+                # per REFERENCE_FPS step: exactly 1.0 for consecutive frames of a 30 fps clip
+                # (displacement over gap/fps seconds, rescaled to 1/REFERENCE_FPS seconds)
+                step_scale = self.fps / (max(1, rec["frame_idx"] - prev["frame_idx"]) * REFERENCE_FPS)
                 # convert to normalized distances by torso of current frame
-                rec["vel_wrist_y"] = (cur_rw_y - prev_rw_y) / (cur_torso + 1e-6)
-                rec["vel_wrist_x"] = (rec.get("right_wrist_xy", (0,0))[0] - prev.get("right_wrist_xy",(0,0))[0]) / (rec.get("shoulder_width",1e-6))
+                rec["vel_wrist_y"] = (cur_rw_y - prev_rw_y) / (cur_torso + 1e-6) * step_scale
+                rec["vel_wrist_x"] = (rec.get("right_wrist_xy", (0,0))[0] - prev.get("right_wrist_xy",(0,0))[0]) / (rec.get("shoulder_width",1e-6)) * step_scale
                 # pose_delta: L2 across key points (right wrist/elbow/shoulder)
                 pts_cur = np.array([
                     rec.get("right_wrist_xy",[0,0]),
@@ -203,7 +497,7 @@ class VideoProcessor:
                     prev.get("right_elbow_xy",[0,0]),
                     (prev.get("shoulder_center_x",0), 0)
                 ]).reshape(-1)
-                rec["pose_delta"] = float(np.linalg.norm(pts_cur - pts_prev))
+                rec["pose_delta"] = float(np.linalg.norm(pts_cur - pts_prev)) * step_scale
             prev = rec
 
         # Smooth confidences (simple moving average)
@@ -240,7 +534,8 @@ class VideoProcessor:
     # Candidate scoring
     def _collect_phase_candidates(self):
         """
-        Build candidate lists for phases: 'Shot pocket', 'Set point', 'Follow through'
+        Build candidate lists for phases: 'Shot pocket', 'Set point', 'Follow through', best first,
+        with candidates within nms_window_s of a more confident one of the same phase dropped.
         Each candidate contains:
           - frame_idx, phase_conf_smooth, normalized heights, velocities, forwardness, pose_delta
         """
@@ -248,7 +543,9 @@ class VideoProcessor:
         sets = []
         fts = []
         for rec in self.frames:
-            if rec["landmarks"] is None:
+            # in cascade mode only frames re-run with the heavy model are scored; reconstructed frames
+            # have no detected pose, their smoothed confidence is borrowed from the neighbours
+            if rec["landmarks"] is None or not rec.get("heavy", True) or rec.get("interpolated"):
                 continue
             phase_name = rec["phase_raw"]
             conf = rec.get("phase_conf_smooth", rec.get("phase_conf", 0.0))
@@ -299,11 +596,10 @@ class VideoProcessor:
                     else:
                         fts.append(candidate)
 
-        # Sort by descending confidence (best first)
-        pockets.sort(key=lambda x: x["conf"], reverse=True)
-        sets.sort(key=lambda x: x["conf"], reverse=True)
-        fts.sort(key=lambda x: x["conf"], reverse=True)
-        return pockets, sets, fts
+        # Sort by descending confidence (best first), keeping only local peaks within nms_window_s
+        def peaks(cands):
+            return [cands[i] for i in temporal_nms([c["timestamp"] for c in cands], [c["conf"] for c in cands], self.nms_window_s)]
+        return peaks(pockets), peaks(sets), peaks(fts)
 
     def _score_candidate(self, candidate, phase_type, reference=None):
         """
@@ -314,9 +610,10 @@ class VideoProcessor:
         - set: prefers wrist near head (~0 to -0.15), low vel_y (pause), low pose_delta
         - ft: prefers wrist above set (more negative y_norm), low vel, forwardness (vel_x or x offset)
         """
+        c = self.scoring
         score = 0.0
         conf = candidate["conf"]
-        score += conf * 50.0  # classifier confidence weighted heavily
+        score += conf * c["conf_weight"]  # classifier confidence weighted heavily
 
         wy = candidate.get("wrist_y_norm", 0.0)
         vel = candidate.get("vel_y", 0.0)
@@ -325,40 +622,40 @@ class VideoProcessor:
 
         if phase_type == "pocket":
             # ideal pocket wrist around 0.1..0.25 (slightly above hip)
-            ideal = 0.15
-            tol = 0.25
+            ideal = c["pocket_ideal"]
+            tol = c["pocket_tol"]
             dist = abs(wy - ideal)
-            score += max(0, (tol - dist)) * 20.0
+            score += max(0, (tol - dist)) * c["pocket_weight"]
             # pocket tends to have upward motion after it (vel < 0 means upward because y decreases up)
             # but for single-frame scoring we lightly reward small upward movement in immediate next frames handled later
-            score += max(0, -vel) * 10.0  # negative vel (upward) is good
+            score += max(0, -vel) * c["pocket_upward_weight"]  # negative vel (upward) is good
         elif phase_type == "set":
             # set point wrist around slightly above head: approx -0.05
-            ideal = -0.05
-            tol = 0.20
+            ideal = c["set_ideal"]
+            tol = c["set_tol"]
             dist = abs(wy - ideal)
-            score += max(0, (tol - dist)) * 50.0
+            score += max(0, (tol - dist)) * c["set_weight"]
             # reward low velocity (a pause) but allow some micro-movement
-            score += max(0, (0.3 - abs(vel))) * 35.0
+            score += max(0, (c["set_pause_vel"] - abs(vel))) * c["set_pause_weight"]
             # reward stable pose (low pose_delta) but allow natural sway
-            score += max(0, (0.25 - pd)) * 25.0
+            score += max(0, (c["set_stable_delta"] - pd)) * c["set_stable_weight"]
             # slightly prefer centered positions (xoff small)
-            score += max(0, (0.6 - xoff)) * 15.0
+            score += max(0, (c["set_center_xoff"] - xoff)) * c["set_center_weight"]
         elif phase_type == "ft":
             # follow through expect wrist slightly above head (negative small), and forward extension
-            ideal = -0.08
-            tol = 0.28
+            ideal = c["ft_ideal"]
+            tol = c["ft_tol"]
             dist = abs(wy - ideal)
-            score += max(0, (tol - dist)) * 50.0
+            score += max(0, (tol - dist)) * c["ft_weight"]
             # reward very low velocity (holding)
-            score += max(0, (0.15 - abs(vel))) * 30.0
+            score += max(0, (c["ft_hold_vel"] - abs(vel))) * c["ft_hold_weight"]
             # reward forwardness: small x offset in direction of forward (we don't know orientation, so prefer non-centered)
-            score += (xoff) * 10.0
+            score += (xoff) * c["ft_xoff_weight"]
             # reward low pose delta (held)
-            score += max(0, (0.2 - pd)) * 20.0
+            score += max(0, (c["ft_stable_delta"] - pd)) * c["ft_stable_weight"]
 
         # small penalty for huge pose deltas (noisy)
-        score -= min(pd * 10.0, 10.0)
+        score -= min(pd * c["noise_penalty_weight"], c["noise_penalty_cap"])
         return float(score)
 
     # Sequence building & selection
@@ -367,6 +664,9 @@ class VideoProcessor:
         Build best chronological sequences (pocket -> set -> ft), encourage order via bonuses,
         return best 3-frame sequence or fallback to 2-frame / 1-frame.
         """
+        c = self.scoring
+        # frame gaps are compared in REFERENCE_FPS frames
+        ref_frames_per_frame = REFERENCE_FPS / self.fps
         pockets, sets, fts = self._collect_phase_candidates()
         if not (pockets or sets or fts):
             return None
@@ -398,35 +698,35 @@ class VideoProcessor:
                     time_gap_ps = s["timestamp"] - p["timestamp"]
                     time_gap_sf = f["timestamp"] - s["timestamp"]
                     # bonus if gaps look realistic (nonzero and not huge)
-                    if 0.03 < time_gap_ps < 2.5:
-                        chrono_bonus += 15.0
-                    if 0.03 < time_gap_sf < 2.5:
-                        chrono_bonus += 20.0
+                    if c["min_gap_s"] < time_gap_ps < c["max_gap_s"]:
+                        chrono_bonus += c["chrono_bonus_ps"]
+                    if c["min_gap_s"] < time_gap_sf < c["max_gap_s"]:
+                        chrono_bonus += c["chrono_bonus_sf"]
 
                     # height spacing bonus: set should be above pocket, ft above set
                     height_bonus = 0.0
                     if s["wrist_y_norm"] is not None and p["wrist_y_norm"] is not None:
                         if s["wrist_y_norm"] < p["wrist_y_norm"]:
-                            height_bonus += 10.0
+                            height_bonus += c["height_bonus_ps"]
                     if f["wrist_y_norm"] is not None and s["wrist_y_norm"] is not None:
                         if f["wrist_y_norm"] < s["wrist_y_norm"]:
-                            height_bonus += 12.0
+                            height_bonus += c["height_bonus_sf"]
 
                     # motion pause bonus: set should have low vel (pause)
                     motion_bonus = 0.0
-                    if abs(s.get("vel_y", 0.0)) < 0.06 and s.get("pose_delta", 1.0) < 0.12:
-                        motion_bonus += 20.0
+                    if abs(s.get("vel_y", 0.0)) < c["set_pause_bonus_vel"] and s.get("pose_delta", 1.0) < c["set_pause_bonus_delta"]:
+                        motion_bonus += c["set_pause_bonus"]
                     # ft should be relatively held
-                    if abs(f.get("vel_y", 0.0)) < 0.05:
-                        motion_bonus += 12.0
+                    if abs(f.get("vel_y", 0.0)) < c["ft_hold_bonus_vel"]:
+                        motion_bonus += c["ft_hold_bonus"]
 
                     total = sp + ss + sf + chrono_bonus + height_bonus + motion_bonus
 
                     # small penalty if chosen frames are extremely close (likely same frame)
-                    if (s["frame_idx"] - p["frame_idx"]) < 2:
-                        total -= 10
-                    if (f["frame_idx"] - s["frame_idx"]) < 2:
-                        total -= 10
+                    if (s["frame_idx"] - p["frame_idx"]) * ref_frames_per_frame < c["close_frames"]:
+                        total -= c["close_frames_penalty"]
+                    if (f["frame_idx"] - s["frame_idx"]) * ref_frames_per_frame < c["close_frames"]:
+                        total -= c["close_frames_penalty"]
 
                     if total > best_score:
                         best_score = total
@@ -438,7 +738,7 @@ class VideoProcessor:
                         }
 
         # If we found a good triplet, return it
-        if best_seq and best_score > 20.0:
+        if best_seq and best_score > c["triplet_min_score"]:
             return ("triplet", best_seq)
 
         # Try best pair combos: pocket+set, set+ft, pocket+ft
@@ -453,9 +753,9 @@ class VideoProcessor:
                 score = self._score_candidate(p, "pocket") + self._score_candidate(s, "set")
                 # encourage height and pause
                 if s["wrist_y_norm"] is not None and p["wrist_y_norm"] is not None and s["wrist_y_norm"] < p["wrist_y_norm"]:
-                    score += 12.0
-                if abs(s.get("vel_y",0)) < 0.1:
-                    score += 12.0
+                    score += c["pair_ps_height_bonus"]
+                if abs(s.get("vel_y",0)) < c["pair_ps_pause_vel"]:
+                    score += c["pair_ps_pause_bonus"]
                 if score > best_pair_score:
                     best_pair_score = score
                     best_pair = ("pocket_set", {"pocket": p, "set": s, "score": score})
@@ -466,9 +766,9 @@ class VideoProcessor:
                     continue
                 score = self._score_candidate(s, "set") + self._score_candidate(f, "ft")
                 if f["wrist_y_norm"] is not None and s["wrist_y_norm"] is not None and f["wrist_y_norm"] < s["wrist_y_norm"]:
-                    score += 8.0
-                if abs(f.get("vel_y",0)) < 0.05:
-                    score += 8.0
+                    score += c["pair_sf_height_bonus"]
+                if abs(f.get("vel_y",0)) < c["pair_sf_hold_vel"]:
+                    score += c["pair_sf_hold_bonus"]
                 if score > best_pair_score:
                     best_pair_score = score
                     best_pair = ("set_ft", {"set": s, "ft": f, "score": score})
@@ -479,12 +779,12 @@ class VideoProcessor:
                     continue
                 score = self._score_candidate(p, "pocket") + self._score_candidate(f, "ft")
                 if f["wrist_y_norm"] is not None and p["wrist_y_norm"] is not None and f["wrist_y_norm"] < p["wrist_y_norm"]:
-                    score += 5.0
+                    score += c["pair_pf_height_bonus"]
                 if score > best_pair_score:
                     best_pair_score = score
                     best_pair = ("pocket_ft", {"pocket": p, "ft": f, "score": score})
 
-        if best_pair and best_pair_score > 15.0:
+        if best_pair and best_pair_score > c["pair_min_score"]:
             return ("pair", best_pair)
 
         # Otherwise choose the single best frame across all candidates
@@ -540,11 +840,29 @@ class VideoProcessor:
 
         return saved_paths
 
+    # Compact per-frame timeline (see pose_timeline.py)
+    def save_timeline(self, path=None, dtype=np.float16):
+        """
+        Writes landmarks, phase, confidences and derived metrics for every analyzed frame to
+        an .npz (default <session_dir>/timeline.npz). Read it back with pose_timeline.TimelineReader.
+        """
+        path = Path(path) if path is not None else self.session_dir / "timeline.npz"
+        meta = {
+            "video": str(self.video_path),
+            "dominant_hand": getattr(self, "dominant", None),
+            "created": datetime.now().isoformat(),
+        }
+        write_timeline(self.frames, path, KEYPOINT_NAMES, self.fps, meta=meta, dtype=dtype)
+        print(f"[save_timeline] Saved {len(self.frames)} frames to {path} ({path.stat().st_size / 1024:.1f} KB)")
+        return path
+
     # High-level run
-    def process_and_save(self):
+    def process_and_save(self, save_frames=True, save_timeline=False):
         self.extract_frames()
         seq = self.find_best_sequence()
-        saved = self.save_sequence_frames(seq)
+        saved = self.save_sequence_frames(seq) if save_frames else []
+        if save_timeline:
+            saved = (saved or []) + [self.save_timeline()]
         print("[process_and_save] Done.")
         return seq, saved
 
@@ -552,12 +870,15 @@ class VideoProcessor:
 if __name__ == "__main__":
     import sys
     if len(sys.argv) < 3:
-        print("Usage: python video_processor.py <video_path> <output_dir>")
+        print("Usage: python video_processor.py <video_path> <output_dir> [--timeline | --timeline-only]")
         sys.exit(1)
     video_path = sys.argv[1]
     output_dir = sys.argv[2]
+    # --timeline writes timeline.npz alongside the JPEGs, --timeline-only instead of them
+    flags = sys.argv[3:]
     vp = VideoProcessor(video_path, output_dir)
-    seq, paths = vp.process_and_save()
+    seq, paths = vp.process_and_save(save_frames="--timeline-only" not in flags,
+                                     save_timeline="--timeline" in flags or "--timeline-only" in flags)
     #print("Result:", seq)
     if paths:
         print("Saved files:", paths)